@@ -2,15 +2,15 @@ import pygame
 import pygame.gfxdraw
 import sys
 import math
-import subprocess
 import tempfile
 import os
 import time
+import threading
 # Safe stub for TSX background loader (project may provide a real loader elsewhere)
 def create_tsx_background(path, w, h):
     return None
 
-# optional animation module (animationtest) and rainfall loader (viewchart)
+# optional animation module (animationtest) and cached rainfall data store (datacache/rainfallstore)
 try:
     from hkvis_core import animationtest as animationtest
 except Exception:
@@ -18,13 +18,70 @@ except Exception:
         import animationtest
     except Exception:
         animationtest = None
+# optional fast paths: vectorised pattern engine, color tables and glyph atlas renderer (need numpy)
 try:
-    from hkvis_core.viewchart import load_rainfall_data
+    import numpy as np
+    from hkvis_core import patternengine, glyphatlas, colortables
+except Exception:
+    np = patternengine = glyphatlas = colortables = None
+# optional per-year cache of the animation's data-dependent terms (background precompute)
+try:
+    from hkvis_core import yearcache
+except Exception:
+    yearcache = None
+# optional baked animation loops for kiosk use (precomputed, palette-indexed frames)
+try:
+    from hkvis_core import bakedloop
+except Exception:
+    bakedloop = None
+# optional worker thread producing the animation's char/color grids ahead of the render loop
+try:
+    from hkvis_core import framepipeline
+except Exception:
+    framepipeline = None
+# optional native chart panel (pygame bar chart with an LRU of rendered surfaces)
+try:
+    from hkvis_core import chartsurface, chartprefetch
+except Exception:
+    chartsurface = chartprefetch = None
+# optional packed chart atlas (rainfall_charts/charts.atlas, built by hkvis_core.chartatlas)
+try:
+    from hkvis_core import chartatlas
+except Exception:
+    chartatlas = None
+# optional long-term statistics (climatology, anomalies, ranks) for the year label colour
+try:
+    from hkvis_core import climatology
+except Exception:
+    climatology = None
+# optional background reloading of the dataset (file watcher + off-thread parse)
+try:
+    from hkvis_core import datawatcher
+except Exception:
+    datawatcher = None
+try:
+    from hkvis_core.datacache import load_store as load_rainfall_store
+except Exception:
+    try:
+        from datacache import load_store as load_rainfall_store
+    except Exception:
+        load_rainfall_store = None
+# optional adaptive quality controller (grid density, scaling filter, pattern rate)
+try:
+    from hkvis_core import adaptivequality
 except Exception:
     try:
-        from viewchart import load_rainfall_data
+        import adaptivequality
     except Exception:
-        load_rainfall_data = None
+        adaptivequality = None
+# optional per-frame profiling HUD (off unless HKVIS_PROFILE / HKVIS_PROFILE_TRACE is set; F3 toggles)
+try:
+    from hkvis_core import frameprofiler
+except Exception:
+    try:
+        import frameprofiler
+    except Exception:
+        frameprofiler = None
 
 # ---------- Image Button Class ----------
 class ImageButton:
@@ -50,6 +107,40 @@ class ImageButton:
                     self.callback(self)
             self.down = False
 
+# ---------- Scaled Sprite Cache ----------
+class SpriteCache:
+    """Scaled copies of images keyed by (image, target size, variant).
+
+    `variant` carries extra state that changes the result (e.g. pressed).
+    Call `invalidate()` when the window is resized so stale sizes are dropped.
+    """
+    def __init__(self):
+        self._cache = {}
+
+    def scaled(self, image, size, variant=None):
+        key = (id(image), size, variant)
+        hit = self._cache.get(key)
+        # keep a reference to the source so its id() cannot be reused
+        if hit is not None and hit[0] is image:
+            return hit[1]
+        surf = pygame.transform.smoothscale(image, size)
+        self._cache[key] = (image, surf)
+        return surf
+
+    def overlay(self, size, rgba):
+        """Solid translucent surface of `size` (used for the disabled-button dimming)."""
+        key = ('overlay', size, rgba)
+        hit = self._cache.get(key)
+        if hit is not None:
+            return hit[1]
+        surf = pygame.Surface(size, pygame.SRCALPHA)
+        surf.fill(rgba)
+        self._cache[key] = (None, surf)
+        return surf
+
+    def invalidate(self):
+        self._cache.clear()
+
 # Simple Pygame demo: 3 image buttons (start, stop, reload) with color change on press.
 
 # ---------- Configuration ----------
@@ -80,6 +171,32 @@ TEMP_VARIANT_DURATION = 0.35
 
 FPS_CLOCK = pygame.time.Clock()
 
+# While paused with no input, block in pygame.event.wait for at most this long
+# instead of redrawing at FPS (only changed widgets are redrawn when paused).
+IDLE_WAIT_MS = 250
+
+# Animation quality: None adapts to hold FPS (see hkvis_core.adaptivequality),
+# an index into adaptivequality.LEVELS pins that level (0 = full quality).
+QUALITY_LEVEL = None
+
+# Generate pattern/color grids on a worker thread (hkvis_core.framepipeline) so the
+# loop only blits the newest finished frame; False computes them inline.
+USE_FRAME_PIPELINE = True
+
+# Kiosk mode: bake the selected year's animation into a loop of this many frames
+# (hkvis_core.bakedloop) and play it back instead of rendering live. 0 disables;
+# 600 frames is a 10 s loop at 60 fps and takes about 160 MB.
+BAKED_LOOP_FRAMES = 0
+# Keep baked loops here as memory-mapped .npy files (reused across runs); None keeps them in memory
+BAKED_LOOP_DIR = None
+
+# Chart atlas from `python -m hkvis_core.chartatlas` (or saveallcharts): when present the
+# chart panel shows the packed matplotlib charts, and draws natively for years without one.
+CHART_ATLAS_PATH = os.path.join(os.path.dirname(__file__), "rainfall_charts", "charts.atlas")
+
+# Print the once-per-second status line to the terminal (debug only)
+DEBUG_STATUS_LOG = False
+
 # (removed unused point_in_rect)
 # ---------- Icon ----------
 
@@ -143,6 +260,11 @@ def main():
             self.range = year_max - year_min
             self.year = initial if initial is not None else year_max
             self.dragging = False
+            # year -> label colour (rainfall anomaly tint), set when the data is (re)loaded
+            self.label_colors = {}
+
+        def label_color(self):
+            return self.label_colors.get(str(self.year), (255,255,255))
 
         def year_to_pos(self, year):
             t = (year - self.year_min) / max(1, self.range)
@@ -195,9 +317,9 @@ def main():
             pygame.draw.circle(surface, (100,120,140), (pos, bar_rect.centery), thumb_r, 2)
             # year label above bar (use smaller YEAR_FONT if available)
             try:
-                year_surf = YEAR_FONT.render(str(self.year), True, (255,255,255))
+                year_surf = YEAR_FONT.render(str(self.year), True, self.label_color())
             except Exception:
-                year_surf = font.render(str(self.year), True, (255,255,255))
+                year_surf = font.render(str(self.year), True, self.label_color())
             # place year label flush with the left end of the slider bar
             bg_margin = 6
             # left end x coordinate of the bar
@@ -227,6 +349,9 @@ def main():
             text_x = bg_x + bg_margin
             text_y = bg_y + bg_margin
             surface.blit(year_surf, (text_x, text_y))
+            # area touched by this draw (used for dirty-rect updates)
+            thumb_rect = pygame.Rect(pos - thumb_r, bar_rect.centery - thumb_r, thumb_r * 2 + 1, thumb_r * 2 + 1)
+            return self.rect.union(bg_rect).union(thumb_rect)
 
     # instantiate year slider and place it bottom-center
     slider_w = int(WIDTH * 0.4)
@@ -241,28 +366,53 @@ def main():
     anim_font = None
     anim_surface = None
     anim_char_w = anim_char_h = None
-    rainfall_by_year = None
-    # try loading monthlyElement.xml via viewchart if available
+    # glyph masks rasterised once per anim_font (see hkvis_core.glyphatlas)
+    glyph_atlas = None
+    rainfall_store = None
+    data_xml_path = os.path.join(os.path.dirname(__file__), 'data', 'monthlyElement.xml')
+    # try loading monthlyElement.xml into the shared RainfallStore (binary cache when valid)
     try:
-        if load_rainfall_data is not None:
-            xml_path = os.path.join(os.path.dirname(__file__), 'data', 'monthlyElement.xml')
-            if os.path.exists(xml_path):
-                years_list, rainfall_list = load_rainfall_data(xml_path)
-                rainfall_by_year = {str(y): vals for y, vals in zip(years_list, rainfall_list)}
+        if load_rainfall_store is not None:
+            if os.path.exists(data_xml_path):
+                rainfall_store = load_rainfall_store(data_xml_path).freeze()
     except Exception:
-        rainfall_by_year = None
+        rainfall_store = None
+
+    def start_year_terms(store):
+        """Per-year animation terms for `store`, precomputed in the background from the slider year."""
+        if yearcache is None or patternengine is None or not store:
+            return None
+        try:
+            cache = yearcache.YearTermsCache(store)
+            cache.start_precompute(center=year_slider.year, cols=animationtest.COLS, rows=animationtest.ROWS)
+            return cache
+        except Exception:
+            return None
+    year_terms = start_year_terms(rainfall_store)
+
+    def year_label_colors(store):
+        """Slider label colour per year: wetter than the 1991-2020 normal tints orange, drier blue (as in the chart)."""
+        if climatology is None or not store:
+            return {}
+        try:
+            return climatology.for_store(store).anomaly_colors()
+        except Exception:
+            return {}
+    year_slider.label_colors = year_label_colors(rainfall_store)
+    # later reloads (file changes, reload button, F5 refresh) parse on the watcher thread;
+    # the loop swaps the new store in between frames (see swap_rainfall_store)
+    data_watcher = None
+    if datawatcher is not None and load_rainfall_store is not None:
+        try:
+            data_watcher = datawatcher.DataWatcher(data_xml_path, load_rainfall_store).start()
+        except Exception:
+            data_watcher = None
     # Audio: load rain sound (best-effort) and setup per-month volume control
     rain_sound_path = os.path.join(os.path.dirname(__file__), 'image', 'rain_sound_image.mp3')
     music_available = False
-    # compute per-year min/max monthly values for normalization
-    per_year_month_minmax = {}
-    try:
-        if rainfall_by_year:
-            for y, vals in rainfall_by_year.items():
-                if vals:
-                    per_year_month_minmax[y] = (min(vals), max(vals))
-    except Exception:
-        per_year_month_minmax = {}
+    # per-year min/max monthly values for normalization come from rainfall_store.minmax()
+    # scaled button backgrounds/icons; cleared on VIDEORESIZE
+    sprite_cache = SpriteCache()
     try:
         pygame.mixer.init()
         if os.path.exists(rain_sound_path):
@@ -307,18 +457,17 @@ def main():
                 # shrink by a few pixels so the change is subtle
                 new_w = max(1, self.rect.width - 6)
                 new_h = max(1, self.rect.height - 6)
-                bg_scaled = pygame.transform.smoothscale(bg, (new_w, new_h))
+                bg_scaled = sprite_cache.scaled(bg, (new_w, new_h), True)
                 bg_x = self.rect.x + (self.rect.width - new_w) // 2
                 bg_y = self.rect.y + (self.rect.height - new_h) // 2 - 3  # raise by 3px
                 surface.blit(bg_scaled, (bg_x, bg_y))
             else:
-                bg_scaled = pygame.transform.smoothscale(bg, (self.rect.width, self.rect.height))
+                bg_scaled = sprite_cache.scaled(bg, (self.rect.width, self.rect.height), False)
                 surface.blit(bg_scaled, (self.rect.x, self.rect.y))
             # If disabled, draw a dimmed background/icon to indicate locked state
             if not getattr(self, 'enabled', True):
                 # draw a slightly darker overlay on top of button background
-                overlay = pygame.Surface((self.rect.width, self.rect.height), pygame.SRCALPHA)
-                overlay.fill((0,0,0,120))
+                overlay = sprite_cache.overlay((self.rect.width, self.rect.height), (0,0,0,120))
                 surface.blit(overlay, (self.rect.x, self.rect.y))
 
             # Draw icon centered, keep original aspect ratio, fit within 40% of button size
@@ -334,7 +483,7 @@ def main():
             scale = min(max_w / iw, max_h / ih, 1.0)
             new_w = int(iw * scale)
             new_h = int(ih * scale)
-            icon_scaled = pygame.transform.smoothscale(icon, (new_w, new_h))
+            icon_scaled = sprite_cache.scaled(icon, (new_w, new_h), effective_down)
             # Keep the icon centered in the original button rect.
             # When pressed, move the icon 3px lower to give a pressed-in effect.
             icon_x = self.rect.x + (self.rect.width - new_w) // 2
@@ -345,6 +494,7 @@ def main():
             if effective_down:
                 icon_y += 3
             surface.blit(icon_scaled, (icon_x, icon_y))
+            return pygame.Rect(self.rect)
 
         def handle_event(self, event):
             # Ignore interactions when disabled
@@ -386,98 +536,15 @@ def main():
     btn_chart = OverlayButton((0,0,80,80), icon_chart_off, icon_chart_on, toggle=True)
     btn_reload.is_reload = True  # Mark this button as reload for larger icon
 
-    # External chart viewer state
-    external_chart_path = None
-    chart_temp_file = None
-    external_chart_opened = False
-    external_chart_open_time = None
-    external_chart_block_autoclose = False
-    external_chart_checker_thread = None
-    # per-button debounce handled by OverlayButton.last_toggle_time
-
-    def open_file(path):
-        """Open a file using system command."""
-        try:
-            if sys.platform == 'darwin':
-                subprocess.Popen(['open', path])
-            elif sys.platform.startswith('win'):
-                os.startfile(path)
-            else:
-                # linux/unix
-                subprocess.Popen(['xdg-open', path])
-        except Exception:
-            pass
-
-    def close_external_chart():
-        """Best-effort close of external viewer and temp-file cleanup."""
-        try:
-            nonlocal external_chart_path, chart_temp_file, external_chart_opened, external_chart_open_time, external_chart_block_autoclose
-        except SyntaxError:
-            pass
-        try:
-            if external_chart_opened and external_chart_path:
-                if sys.platform == 'darwin':
-                    try:
-                        fname = os.path.basename(external_chart_path)
-                        script = f'tell application "Preview" to close (every document whose name is "{fname}")'
-                        subprocess.Popen(['osascript', '-e', script])
-                    except Exception:
-                        pass
-                # For other platforms we avoid force-closing arbitrary apps
-                external_chart_opened = False
-                external_chart_open_time = None
-                external_chart_block_autoclose = False
-                try:
-                    btn_chart.toggled = False
-                except Exception:
-                    pass
-        except Exception:
-            pass
-        try:
-            if chart_temp_file and os.path.exists(chart_temp_file):
-                os.remove(chart_temp_file)
-        except Exception:
-            pass
-    chart_temp_file = None
-    external_chart_path = None
-    external_chart_open_time = None
-    external_chart_block_autoclose = False
-
-    def is_preview_document_open(fname):
-        """Return True if Preview has `fname` open (macOS only)."""
-        try:
-            if sys.platform != 'darwin':
-                return False
-            script = (
-                'tell application "System Events"\n'
-                ' set isRunning to (name of processes) contains "Preview"\n'
-                'end tell\n'
-                'if isRunning then\n'
-                ' tell application "Preview" to return (name of every document as string)\n'
-                'else\n'
-                ' return ""\n'
-                'end if'
-            )
-            proc = subprocess.Popen(['osascript', '-e', script], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-            out, err = proc.communicate(timeout=0.5)
-            out = out.decode(errors='ignore').strip()
-            if not out:
-                return False
-            names = [n.strip() for n in out.split(',') if n.strip()]
-            return fname in names
-        except Exception:
-            return False
-
-
-    # Removed background preview checker: chart open/close is now controlled only by the UI toggle.
-
-
     def on_start(btn):
         # start the animation
         try:
             nonlocal animation_enabled, btn_start, btn_stop, btn_chart, chart_alpha
         except SyntaxError:
             pass
+        # frame times from before the pause (and the first frames after it) say nothing about now
+        if quality is not None and not animation_enabled:
+            quality.reset()
         animation_enabled = True
         # update visual toggles
         btn_start.toggled = True
@@ -523,73 +590,54 @@ def main():
     def on_reload(btn):
         # reset animation state so it restarts from initial frame
         try:
-            nonlocal anim_frame_time, anim_surface, anim_font, anim_char_w, anim_char_h, rainfall_by_year
+            nonlocal anim_frame_time, anim_surface, anim_font, anim_char_w, anim_char_h, glyph_atlas, full_redraw
         except SyntaxError:
             pass
         anim_frame_time = 0.0
         anim_surface = None
         anim_font = None
+        glyph_atlas = None
+        full_redraw = True
         anim_char_w = anim_char_h = None
-        # attempt to re-load rainfall data if loader is available
-        try:
-            if load_rainfall_data is not None:
-                xml_path = os.path.join(os.path.dirname(__file__), 'data', 'monthlyElement.xml')
-                if os.path.exists(xml_path):
-                    years_list, rainfall_list = load_rainfall_data(xml_path)
-                    rainfall_by_year = {str(y): vals for y, vals in zip(years_list, rainfall_list)}
-        except Exception:
-            rainfall_by_year = rainfall_by_year
+        reload_rainfall_data()
         print("Reload button clicked; animation reset")
-    def on_chart(btn):
-        # Chart button callback: open/close external chart viewer and prepare in-window panel.
+
+    def reload_rainfall_data():
+        """Re-load the rainfall store: on the watcher thread when available, inline otherwise."""
+        if data_watcher is not None:
+            data_watcher.request_reload()
+            return
         try:
-            nonlocal external_chart_path, chart_temp_file, external_chart_opened, chart_pos, chart_alpha, last_chart_rect, external_chart_open_time, external_chart_block_autoclose
+            if load_rainfall_store is not None and os.path.exists(data_xml_path):
+                swap_rainfall_store(load_rainfall_store(data_xml_path).freeze())
         except Exception:
             pass
+
+    def swap_rainfall_store(store):
+        """Make `store` current (between frames) and drop everything derived from the old one."""
+        nonlocal rainfall_store, year_terms
+        rainfall_store = store
+        if year_terms is not None:
+            year_terms.stop()
+        year_terms = start_year_terms(store)
+        year_slider.label_colors = year_label_colors(store)
+        if chart_cache is not None:
+            chart_cache.set_store(store)
+        # new data may bake fine; in-memory baked loops whose year's values changed must be re-baked
+        failed_loop_bakes.clear()
+        for year, loop in list(baked_loops.items()):
+            vals = store.values_list(year)
+            if vals is None or loop.meta.get('values') != [float(v) for v in vals]:
+                del baked_loops[year]
+    def on_chart(btn):
+        # Chart button callback: show/hide the in-window chart panel (drawn in the main loop)
+        nonlocal chart_alpha, chart_dragging, last_chart_rect
         print("Chart button clicked; toggled=" + str(btn.toggled) + ", down=" + str(btn.down))
-        # If the button was turned off, close external viewer and clear state
-        if not (btn.toggled or btn.down): 
-            last_chart_rect = None  # Clear last_chart_rect to prevent drag interactions
-            try:
-                close_external_chart()
-            except Exception:
-                pass
+        if not (btn.toggled or btn.down):
+            chart_dragging = False
+            last_chart_rect = None
             return
-        # Otherwise, show chart in-window (panel positioning will be handled in main loop)
         chart_alpha = 255
-        # Try to open an on-disk PNG for the selected year; otherwise dump cached surface to temp PNG
-        try:
-            chart_year = year_slider.year
-            chart_path = os.path.join(os.path.dirname(__file__), 'rainfall_charts', f'rainfall_{chart_year}.png')
-            if os.path.exists(chart_path):
-                open_file(chart_path)
-                external_chart_path = chart_path
-                external_chart_opened = True
-                external_chart_open_time = time.time()
-                external_chart_block_autoclose = True
-                chart_temp_file = None
-            else:
-                # fallback to cached surface if present
-                surf = chart_image_cache.get(chart_year)
-                if surf is not None:
-                    try:
-                        fd, tmp = tempfile.mkstemp(suffix='.png', prefix=f'rainfall_{chart_year}_')
-                        os.close(fd)
-                        pygame.image.save(surf, tmp)
-                        open_file(tmp)
-                        chart_temp_file = tmp
-                        external_chart_path = tmp
-                        external_chart_opened = True
-                        external_chart_open_time = time.time()
-                        external_chart_block_autoclose = True
-                        # no background checker; rely on manual toggle to close external chart
-                    except Exception:
-                        try:
-                            os.remove(tmp)
-                        except Exception:
-                            pass
-        except Exception:
-            pass
 
     btn_start.callback = on_start
     btn_stop.callback = on_stop
@@ -603,12 +651,36 @@ def main():
 
 
     running = True
-    # cache loaded yearly chart images to avoid repeated disk IO
-    chart_image_cache = {}
+    # rendered chart surfaces keyed by (year, size): the chart panel never touches disk
+    chart_cache = chartsurface.ChartCache(rainfall_store) if chartsurface is not None else None
+    if chart_cache is not None and chartatlas is not None and os.path.exists(CHART_ATLAS_PATH + '.json'):
+        # loads on a background thread; charts drawn natively before that are dropped once it is in
+        chart_cache.renderer = chartatlas.AtlasRenderer(CHART_ATLAS_PATH, chart_cache.renderer,
+                                                        on_loaded=chart_cache.clear)
+    # renders the charts of the years the slider is heading for on a background thread
+    chart_prefetch = chartprefetch.ChartPrefetcher(chart_cache).start() if chart_cache is not None else None
     # TSX background surface cache
     tsx_background_surface = None
     # cache last scaled animation frame so we can freeze it when paused
     last_anim_frame = None
+    # unscaled surface the last frame came from (rescaled only if the window size changes)
+    last_anim_source = None
+
+    def frozen_frame(size):
+        """Last animation frame at `size`; rescaled once per window size, never per frame."""
+        nonlocal last_anim_frame
+        if last_anim_frame is not None and last_anim_frame.get_size() != size:
+            source = last_anim_source if last_anim_source is not None else last_anim_frame
+            last_anim_frame = pygame.transform.smoothscale(source, size)
+        return last_anim_frame
+    def restore_background(frame, rect):
+        """Repaint `rect` of the paused screen: frozen frame plus the chart panel if it is under it."""
+        screen.blit(frame, rect, rect)
+        if drawn_chart_state is not None and last_chart_rect is not None and last_chart_rect.colliderect(rect):
+            chart_surf = chart_cache.get(drawn_chart_state[0], last_chart_rect.size)
+            if chart_surf is not None:
+                clip = last_chart_rect.clip(rect)
+                screen.blit(chart_surf, clip, clip.move(-last_chart_rect.x, -last_chart_rect.y))
     # debug: whether we've saved a snapshot of the first frame
     _debug_snapshot_saved = False
     # music month cycling state: which month index (0..11) is currently driving volume
@@ -624,9 +696,100 @@ def main():
     chart_dragging = False
     chart_drag_offset = (0, 0)
     last_chart_rect = None  # pygame.Rect of last drawn chart (for hit testing)
+    drawn_chart_state = None  # (year, rect) of the chart panel on screen, None when hidden
     # chart opacity (0..255). When animation is stopped we set to 0 to hide chart.
     chart_alpha = 255
     
+    # dirty-rect bookkeeping for the paused state
+    paused_presented = False    # a full paused frame has been flipped to the display
+    full_redraw = True          # next iteration must redraw the whole window
+    resumed_from_idle = False
+    drawn_widget_state = {}
+    drawn_widget_rect = {}
+    # where the profiling HUD was last drawn (repainted over the frozen frame while paused)
+    drawn_hud_rect = None
+
+    # adaptive animation quality, driven by the measured frame time
+    quality = adaptivequality.AdaptiveQuality(FPS, fixed_level=QUALITY_LEVEL) if adaptivequality is not None else None
+    # last generated grid, reused until the quality level's pattern rate asks for a new one
+    last_pattern = None
+    last_grid = None
+    last_pattern_key = None
+    last_pattern_time = 0.0
+    # baked loops (kiosk mode): year -> BakedLoop, and the bake thread in progress
+    baked_loops = {}
+    loop_bake = None
+    # years whose bake raised; not retried until the data is reloaded
+    failed_loop_bakes = set()
+    loop_bake_enabled = BAKED_LOOP_FRAMES > 0 and bakedloop is not None
+
+    def start_loop_bake(year, data):
+        """Bake `year`'s loop on a background thread; the renderer (fonts) is set up here on the pygame thread."""
+        nonlocal loop_bake_enabled
+        try:
+            from hkvis_core.offlinerender import FrameRenderer
+            renderer = FrameRenderer(list(data))
+        except Exception as e:
+            print(f"Baked loop disabled: {e}")
+            loop_bake_enabled = False
+            return None
+
+        def run():
+            try:
+                loop = bakedloop.load_or_bake(renderer, year, data, BAKED_LOOP_FRAMES, FPS, BAKED_LOOP_DIR,
+                                              should_stop=lambda: not running)
+            except Exception as e:
+                print(f"Baking loop for {year} failed: {e}")
+                failed_loop_bakes.add(year)
+                return
+            if loop is not None:
+                # a loop is tens of MB: keep only the newest
+                baked_loops.clear()
+                baked_loops[year] = loop
+        thread = threading.Thread(target=run, name='hkvis-bakedloop', daemon=True)
+        thread.start()
+        return thread
+
+    # background frame producer (created on first use and whenever the grid size changes)
+    frame_pipeline = None
+    pipeline_enabled = USE_FRAME_PIPELINE and framepipeline is not None
+
+    # F5 refreshes the data files in the background; the thread appends its results
+    # here and the loop reloads the dataset between frames if the XML changed
+    refresh_thread = None
+    refresh_results = []
+    data_refresh = None
+
+    def start_data_refresh():
+        # imported on first use: asyncio/urllib would add ~25 ms to start-up
+        nonlocal data_refresh
+        if data_refresh is None:
+            try:
+                from hkvis_core import refresh as data_refresh
+            except Exception as e:
+                print(f"Data refresh unavailable: {e}")
+                return None
+        print("Refreshing data files...")
+        return data_refresh.start_background_refresh(on_done=refresh_results.extend)
+
+    # per-phase frame timing (see hkvis_core.frameprofiler)
+    profiler = frameprofiler.from_env() if frameprofiler is not None else None
+
+    def prof_mark(name):
+        if profiler is not None:
+            profiler.mark(name)
+
+    def widget_states():
+        """(key, state, draw) for every widget; `draw()` returns the area it painted."""
+        items = []
+        for key, btn in (('start', btn_start), ('stop', btn_stop), ('reload', btn_reload), ('chart', btn_chart)):
+            state = (btn.down, btn.toggled, btn.enabled, tuple(btn.rect))
+            items.append((key, state, lambda b=btn: b.draw(screen)))
+        items.append(('slider', (year_slider.year, year_slider.dragging, tuple(year_slider.rect),
+                                 year_slider.label_color()),
+                      lambda: year_slider.draw(screen, UI_FONT)))
+        return items
+
     # Load TSX background if specified
     if TSX_BACKGROUND_PATH and os.path.exists(TSX_BACKGROUND_PATH):
         print(f"Loading TSX background from: {TSX_BACKGROUND_PATH}")
@@ -642,13 +805,39 @@ def main():
         print(f"TSX background file not found: {TSX_BACKGROUND_PATH}")
     
     while running:
-        for event in pygame.event.get():
+        # the frame pipeline worker's time on the frame shown (0 when the loop drew it itself)
+        worker_ms = 0.0
+        if paused_presented and not animation_enabled and not full_redraw:
+            # idle while paused: sleep until input arrives (or the timeout passes)
+            first = pygame.event.wait(IDLE_WAIT_MS)
+            events = ([first] if first.type != pygame.NOEVENT else []) + pygame.event.get()
+            resumed_from_idle = True
+            # the wait is idle time, not part of the frame
+            if profiler is not None:
+                profiler.begin_frame()
+        else:
+            if profiler is not None:
+                profiler.begin_frame()
+            events = pygame.event.get()
+        for event in events:
             if event.type == pygame.QUIT:
                 running = False
             elif event.type == pygame.VIDEORESIZE:
-                pass
+                # scaled sprites are keyed by size; drop the old sizes
+                sprite_cache.invalidate()
+                full_redraw = True
+                if quality is not None:
+                    quality.reset()
+            elif event.type == getattr(pygame, 'WINDOWEXPOSED', -1):
+                full_redraw = True
             elif event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE:
                 running = False
+            elif event.type == pygame.KEYDOWN and event.key == pygame.K_F3 and profiler is not None:
+                profiler.toggle()
+                full_redraw = True
+            elif event.type == pygame.KEYDOWN and event.key == pygame.K_F5:
+                if refresh_thread is None or not refresh_thread.is_alive():
+                    refresh_thread = start_data_refresh()
             # --- chart drag handling (start/stop/drag) ---
             if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
                 # start dragging if user clicked on the last drawn chart while it's visible
@@ -668,9 +857,20 @@ def main():
             btn_reload.handle_event(event)
             btn_chart.handle_event(event)
             year_slider.handle_event(event)
-        # Poll external chart viewer: if we opened an external chart and the user closed it,
-        # un-toggle the chart button and clean up.
-        # No auto-close polling; chart open/close controlled by button only.
+        if refresh_results:
+            finished = refresh_results[:]
+            del refresh_results[:len(finished)]
+            for result in finished:
+                print(data_refresh.describe(result))
+            if any(r.changed and r.name == 'xml' for r in finished):
+                reload_rainfall_data()
+        # pick up a store reloaded in the background (file change, reload button, refresh)
+        if data_watcher is not None:
+            new_store = data_watcher.poll()
+            if new_store is not None:
+                swap_rainfall_store(new_store)
+                print(f"Rainfall data reloaded ({len(new_store)} years)")
+        prof_mark('events')
         w, h = screen.get_size()
         inner = layout(w, h)
         # centered black square area that hosts the animation
@@ -688,7 +888,78 @@ def main():
         btn_reload.rect = pygame.Rect(base_x + (btn_size + spacing) * 2, base_y, btn_size, btn_size)
         # place chart button above the reload button
         btn_chart.rect = pygame.Rect(base_x + (btn_size + spacing) * 2, base_y - (btn_size + spacing), btn_size, btn_size)
-        
+        # chart panel: bottom left unless dragged, 2:1 like the exported PNGs
+        chart_rect = None
+        chart_year = str(year_slider.year)
+        if (chart_cache is not None and (btn_chart.toggled or btn_chart.down) and chart_alpha > 0
+                and rainfall_store is not None and chart_year in rainfall_store):
+            # width snapped to 16 px so window resizes don't fill the cache with near-identical sizes
+            panel_w = min(int(w * 0.45), int(h * 0.60) * 2) // 16 * 16
+            panel_h = panel_w // 2
+            if panel_w >= 160:
+                if chart_pos is None:
+                    panel_x, panel_y = int(w * 0.047), h - int(h * 0.04) - panel_h
+                else:
+                    panel_x, panel_y = chart_pos
+                panel_x = max(0, min(panel_x, w - panel_w))
+                panel_y = max(0, min(panel_y, h - panel_h))
+                chart_rect = pygame.Rect(panel_x, panel_y, panel_w, panel_h)
+        last_chart_rect = chart_rect
+        if chart_rect is not None and chart_prefetch is not None:
+            chart_prefetch.update(chart_year, chart_rect.size)
+        chart_state = (chart_year, tuple(chart_rect), chart_alpha) if chart_rect is not None else None
+        if chart_state != drawn_chart_state:
+            # the panel can overlap the other widgets: repaint everything rather than dirty rects
+            full_redraw = True
+        prof_mark('layout')
+
+        # Paused and already on screen: redraw only the widgets whose state changed
+        # over the frozen frame and push just those rects to the display.
+        if (paused_presented and not animation_enabled and not full_redraw
+                and not tsx_background_surface and last_anim_frame is not None):
+            frame = frozen_frame((w, h))
+            dirty = []
+            for key, state, draw_widget in widget_states():
+                if drawn_widget_state.get(key) == state:
+                    continue
+                old_rect = drawn_widget_rect.get(key)
+                if old_rect is not None:
+                    restore_background(frame, old_rect)
+                new_rect = draw_widget()
+                if old_rect is None or not old_rect.contains(new_rect):
+                    # grew past the old area: clear the new area too and draw again
+                    restore_background(frame, new_rect)
+                    new_rect = draw_widget()
+                drawn_widget_state[key] = state
+                drawn_widget_rect[key] = new_rect
+                dirty.append(new_rect.union(old_rect) if old_rect is not None else new_rect)
+            prof_mark('widgets')
+            if profiler is not None and profiler.hud_due():
+                # the HUD is translucent: restore what is under it (and redraw widgets there) first
+                area = drawn_hud_rect
+                under = []
+                if area is not None:
+                    under = [(key, draw_widget) for key, _, draw_widget in widget_states()
+                             if drawn_widget_rect.get(key) is not None and drawn_widget_rect[key].colliderect(area)]
+                    area = area.unionall([drawn_widget_rect[key] for key, _ in under])
+                    restore_background(frame, area)
+                    for key, draw_widget in under:
+                        drawn_widget_rect[key] = draw_widget()
+                drawn_hud_rect = profiler.draw(screen, UI_FONT)
+                dirty.append(drawn_hud_rect.union(area) if area is not None else drawn_hud_rect)
+                prof_mark('hud')
+            if dirty:
+                pygame.display.update(dirty)
+                prof_mark('flip')
+                if profiler is not None:
+                    profiler.end_frame()
+                FPS_CLOCK.tick(FPS)
+            else:
+                if profiler is not None:
+                    profiler.end_frame()
+                FPS_CLOCK.tick()
+            continue
+
         # Draw background - TSX background if available, otherwise animation or solid color
         if tsx_background_surface:
             # Scale TSX background to current window size if needed
@@ -704,6 +975,10 @@ def main():
                 now = time.time()
                 # use FPS_CLOCK to compute dt for smoother timing
                 dt = FPS_CLOCK.get_time() / 1000.0 if FPS_CLOCK else 1.0 / FPS
+                if resumed_from_idle:
+                    # the last tick spans the idle wait; don't jump the animation
+                    dt = 1.0 / FPS
+                    resumed_from_idle = False
                 anim_frame_time += dt
                 # prepare font and surface on first use
                 if anim_font is None:
@@ -714,12 +989,23 @@ def main():
                         anim_font = pygame.font.SysFont('couriernew', animationtest.FONT_SIZE)
                     sample = anim_font.render('M', True, (255,255,255))
                     anim_char_w, anim_char_h = sample.get_size()
-                    anim_surface = pygame.Surface((anim_char_w * animationtest.COLS + animationtest.PADDING*2,
-                                                   anim_char_h * animationtest.ROWS + animationtest.PADDING*2))
+                    if glyphatlas is not None:
+                        try:
+                            glyph_atlas = glyphatlas.GlyphAtlas(anim_font, animationtest.ASCII_CHARS, (anim_char_w, anim_char_h))
+                        except Exception:
+                            glyph_atlas = None
+                # grid density and scaling come from the current quality level
+                qlevel = quality.level if quality is not None else None
+                grid_cols = qlevel.cols if qlevel else animationtest.COLS
+                grid_rows = qlevel.rows if qlevel else animationtest.ROWS
+                surf_size = (anim_char_w * grid_cols + animationtest.PADDING*2,
+                             anim_char_h * grid_rows + animationtest.PADDING*2)
+                if anim_surface is None or anim_surface.get_size() != surf_size:
+                    anim_surface = pygame.Surface(surf_size)
                 # choose rainfall data for selected year
                 sel_year = str(year_slider.year)
-                if rainfall_by_year and sel_year in rainfall_by_year:
-                    data_for_year = rainfall_by_year[sel_year]
+                if rainfall_store and sel_year in rainfall_store:
+                    data_for_year = rainfall_store.values_list(sel_year)
                 else:
                     data_for_year = getattr(animationtest, 'RAIN_DATA', None)
                 # Update music month timer and set volume based on monthly rainfall
@@ -742,8 +1028,9 @@ def main():
                         # normalize month_val to 0..1 using per-year min/max if available
                         vol = 0.35
                         try:
-                            if sel_year in per_year_month_minmax:
-                                lo, hi = per_year_month_minmax[sel_year]
+                            minmax = rainfall_store.minmax(sel_year) if rainfall_store else None
+                            if minmax is not None:
+                                lo, hi = minmax
                                 if hi > lo:
                                     t = (month_val - lo) / (hi - lo)
                                 else:
@@ -764,21 +1051,103 @@ def main():
                         pygame.mixer.music.set_volume(max(0.0, min(1.0, current_music_volume)))
                 except Exception:
                     pass
-                # generate grid
-                try:
-                    grid = animationtest.generate_fluid_pattern(data_for_year, anim_frame_time,
-                                                               cols=animationtest.COLS, rows=animationtest.ROWS,
-                                                               speed_factor=animationtest.SPEED_FACTOR,
-                                                               base_scale=animationtest.BASE_TIME_SCALE)
-                except Exception:
+                prof_mark('update')
+                # generate grid: array engine when available, scalar fallback otherwise.
+                # At reduced quality the grid is regenerated at pattern_hz and reused in
+                # between (colors still follow anim_frame_time every frame).
+                pattern_key = (sel_year, grid_cols, grid_rows, patternengine is not None and glyph_atlas is not None)
+                pattern_hz = qlevel.pattern_hz if qlevel else None
+                # kiosk mode: once the year's baked loop is ready, playback replaces rendering
+                loop_frame = None
+                if loop_bake_enabled and rainfall_store and sel_year in rainfall_store:
+                    loop = baked_loops.get(sel_year)
+                    if loop is not None:
+                        loop_frame = loop.surface_at(anim_frame_time)
+                    elif (not year_slider.dragging and sel_year not in failed_loop_bakes
+                            and (loop_bake is None or not loop_bake.is_alive())):
+                        loop_bake = start_loop_bake(sel_year, data_for_year)
+                # with the worker pipeline: request the next frame, take the newest finished one
+                piped = None
+                if loop_frame is None and pipeline_enabled and pattern_key[3]:
+                    try:
+                        if frame_pipeline is None or frame_pipeline.shape != (grid_rows, grid_cols):
+                            if frame_pipeline is not None:
+                                frame_pipeline.stop()
+                            tables = colortables.get_tables(grid_rows, grid_cols, animationtest.BLUE_PALETTE,
+                                                            animationtest.TOP_WHITEN_BIAS, animationtest.BOTTOM_WHITEN_BOOST)
+                            frame_pipeline = framepipeline.FramePipeline(grid_cols, grid_rows, tables).start()
+                        terms = year_terms.get(sel_year, grid_cols, grid_rows) if year_terms is not None else None
+                        if terms is not None:
+                            intensity, time_scale = terms.intensity, terms.time_scale
+                        else:
+                            intensity, time_scale = patternengine.get_engine(grid_cols, grid_rows).column_terms(data_for_year)
+                        frame_pipeline.submit((sel_year, id(rainfall_store)), intensity, time_scale,
+                                              anim_frame_time + dt, pattern_hz)
+                        # only the very first frame waits for the worker
+                        piped = frame_pipeline.acquire(timeout=0.1)
+                        if frame_pipeline.error is not None:
+                            raise frame_pipeline.error
+                        if piped is not None:
+                            worker_ms = frame_pipeline.work_ms
+                    except Exception as e:
+                        print(f"Frame pipeline disabled: {e}")
+                        pipeline_enabled = False
+                        piped = None
+                if loop_frame is not None or piped is not None:
+                    pattern = grid = None
+                elif (pattern_hz and pattern_key == last_pattern_key
+                        and 0.0 <= anim_frame_time - last_pattern_time < 1.0 / pattern_hz):
+                    pattern, grid = last_pattern, last_grid
+                else:
+                    pattern = None
                     grid = None
+                    try:
+                        # per-year terms are a cache lookup; unknown years (demo data) compute them
+                        terms = year_terms.get(sel_year, grid_cols, grid_rows) if (pattern_key[3] and year_terms is not None) else None
+                        if terms is not None:
+                            pattern = patternengine.get_engine(grid_cols, grid_rows).generate_from_terms(
+                                terms.intensity, terms.time_scale, anim_frame_time)
+                        elif pattern_key[3]:
+                            pattern = patternengine.generate_fluid_pattern_np(data_for_year, anim_frame_time,
+                                                                              cols=grid_cols, rows=grid_rows,
+                                                                              speed_factor=animationtest.SPEED_FACTOR,
+                                                                              base_scale=animationtest.BASE_TIME_SCALE)
+                        else:
+                            grid = animationtest.generate_fluid_pattern(data_for_year, anim_frame_time,
+                                                                       cols=grid_cols, rows=grid_rows,
+                                                                       speed_factor=animationtest.SPEED_FACTOR,
+                                                                       base_scale=animationtest.BASE_TIME_SCALE)
+                    except Exception:
+                        pattern = grid = None
+                    last_pattern, last_grid = pattern, grid
+                    last_pattern_key = pattern_key
+                    last_pattern_time = anim_frame_time
+                prof_mark('pattern')
                 # render to anim_surface
                 if anim_surface and anim_char_w is not None and anim_char_h is not None:
-                    anim_surface.fill(animationtest.BG_COLOR if hasattr(animationtest, 'BG_COLOR') else (0,0,0))
-                    if grid:
+                    frame_src = anim_surface
+                    if loop_frame is None:
+                        anim_surface.fill(animationtest.BG_COLOR if hasattr(animationtest, 'BG_COLOR') else (0,0,0))
+                    if loop_frame is not None:
+                        # baked loop playback: the frame is already composed
+                        frame_src = loop_frame
+                    elif piped is not None:
+                        # grids and colors were produced by the worker thread
+                        glyph_atlas.render(anim_surface, piped.char_idx, piped.colors,
+                                           (animationtest.PADDING, animationtest.PADDING))
+                    elif pattern is not None:
+                        # colors for the whole frame from the precomputed tables, then one
+                        # composite pass from the cached glyph masks
+                        tables = colortables.get_tables(grid_rows, grid_cols, animationtest.BLUE_PALETTE,
+                                                        animationtest.TOP_WHITEN_BIAS, animationtest.BOTTOM_WHITEN_BOOST)
+                        colors = tables.frame_colors(pattern.norm, anim_frame_time)
+                        prof_mark('colors')
+                        glyph_atlas.render(anim_surface, pattern.char_idx, colors,
+                                           (animationtest.PADDING, animationtest.PADDING))
+                    elif grid:
                         for row_idx, row in enumerate(grid):
                             y = animationtest.PADDING + row_idx * anim_char_h
-                            base = animationtest.row_base_color(row_idx, animationtest.ROWS,
+                            base = animationtest.row_base_color(row_idx, grid_rows,
                                                                top_whiten=animationtest.TOP_WHITEN_BIAS,
                                                                bottom_boost=animationtest.BOTTOM_WHITEN_BOOST)
                             for col_idx, (ch, norm) in enumerate(row):
@@ -789,17 +1158,22 @@ def main():
                                 white_factor = (white_osc ** 3) * 0.9
                                 sparsity = ((seed >> 3) & 31) / 31.0
                                 white_factor = white_factor * (sparsity * 0.8)
-                                color = animationtest.final_cell_color(base, norm, row_idx, animationtest.ROWS,
+                                color = animationtest.final_cell_color(base, norm, row_idx, grid_rows,
                                                                        time_mod=col_mod, white_factor=white_factor)
                                 surf = anim_font.render(ch, True, color)
                                 x = animationtest.PADDING + col_idx * anim_char_w
                                 anim_surface.blit(surf, (x, y))
+                    # scalar path: colors and glyphs are interleaved and both land in 'glyphs'
+                    prof_mark('glyphs')
                     # scale and blit (also cache the scaled frame so we can show it when paused)
                     try:
                         cur_w, cur_h = screen.get_size()
-                        scaled = pygame.transform.smoothscale(anim_surface, (cur_w, cur_h))
+                        scale = pygame.transform.smoothscale if (qlevel is None or qlevel.smooth) else pygame.transform.scale
+                        scaled = scale(frame_src, (cur_w, cur_h))
                         screen.blit(scaled, (0,0))
-                        last_anim_frame = scaled.copy()
+                        # (smooth)scale returns a new surface, so no copy is needed
+                        last_anim_frame = scaled
+                        last_anim_source = frame_src
                         # save a snapshot of the first rendered scaled frame for debugging
                         if not _debug_snapshot_saved:
                             try:
@@ -810,21 +1184,18 @@ def main():
                             except Exception as e:
                                 print(f"Failed to save snapshot: {e}")
                     except Exception:
-                        screen.blit(anim_surface, (0,0))
+                        screen.blit(frame_src, (0,0))
                         try:
-                            last_anim_frame = anim_surface.copy()
+                            last_anim_frame = frame_src.copy()
+                            last_anim_source = None
                         except Exception:
                             last_anim_frame = None
+                    prof_mark('scale')
                 else:
                     # if we have a cached last frame, show it (freeze); otherwise fallback to BG
                     if last_anim_frame is not None:
                         try:
-                            cur_w, cur_h = screen.get_size()
-                            # if cached frame is different size, scale it to current window
-                            if (last_anim_frame.get_width(), last_anim_frame.get_height()) != (cur_w, cur_h):
-                                screen.blit(pygame.transform.smoothscale(last_anim_frame, (cur_w, cur_h)), (0,0))
-                            else:
-                                screen.blit(last_anim_frame, (0,0))
+                            screen.blit(frozen_frame(screen.get_size()), (0,0))
                         except Exception:
                             screen.fill(BG_COLOR)
                     else:
@@ -833,44 +1204,68 @@ def main():
                 # animation disabled: keep last frame visible (freeze) if present
                 if last_anim_frame is not None:
                     try:
-                        cur_w, cur_h = screen.get_size()
-                        if (last_anim_frame.get_width(), last_anim_frame.get_height()) != (cur_w, cur_h):
-                            screen.blit(pygame.transform.smoothscale(last_anim_frame, (cur_w, cur_h)), (0,0))
-                        else:
-                            screen.blit(last_anim_frame, (0,0))
+                        screen.blit(frozen_frame(screen.get_size()), (0,0))
                     except Exception:
                         screen.fill(BG_COLOR)
                 else:
                     screen.fill(BG_COLOR)
         
-    # Panel layout (in-window chart rendering removed; charts are external)
-        max_panel_w = int(w * 0.45)
-        max_panel_h = int(h * 0.60)
-        panel_x = int(w * 0.047)
-        # default place near bottom with a small bottom margin
-        bottom_margin = int(h * 0.04)
-        # We no longer draw the in-window chart panel. Clear hit-test rect to prevent dragging.
-        last_chart_rect = None
-        btn_start.draw(screen)
-        btn_stop.draw(screen)
-        btn_reload.draw(screen)
-        btn_chart.draw(screen)
-        # draw year slider on bottom center
-        year_slider.draw(screen, UI_FONT)
-        # Terminal-only debug logging (periodic)
-        try:
-            # print status once per second
-            if not hasattr(main, '_last_dbg_print'):
-                main._last_dbg_print = 0.0
-            nowt = time.time()
-            if (nowt - main._last_dbg_print) >= 1.0:
-                main._last_dbg_print = nowt
-                print(f"debug: animationtest_loaded={animationtest is not None} anim_surface_set={anim_surface is not None} last_anim_frame_set={last_anim_frame is not None}")
-        except Exception:
-            pass
+        # chart panel, under the buttons and the slider
+        if chart_rect is not None:
+            if chart_prefetch is not None:
+                chart_surf = chart_prefetch.get(chart_year, chart_rect.size)
+            else:
+                chart_surf = chart_cache.get(chart_year, chart_rect.size)
+            if chart_surf is not None:
+                chart_surf.set_alpha(chart_alpha)
+                screen.blit(chart_surf, chart_rect)
+        drawn_chart_state = chart_state
+        # draw buttons and the year slider (bottom center), remembering what was drawn
+        for key, state, draw_widget in widget_states():
+            drawn_widget_rect[key] = draw_widget()
+            drawn_widget_state[key] = state
+        prof_mark('widgets')
+        # Terminal-only debug logging (periodic, off unless DEBUG_STATUS_LOG)
+        if DEBUG_STATUS_LOG:
+            try:
+                # print status once per second
+                if not hasattr(main, '_last_dbg_print'):
+                    main._last_dbg_print = 0.0
+                nowt = time.time()
+                if (nowt - main._last_dbg_print) >= 1.0:
+                    main._last_dbg_print = nowt
+                    print(f"debug: animationtest_loaded={animationtest is not None} anim_surface_set={anim_surface is not None} last_anim_frame_set={last_anim_frame is not None}")
+                    if chart_prefetch is not None and drawn_chart_state is not None:
+                        print(chart_prefetch.describe())
+            except Exception:
+                pass
+        if profiler is not None and profiler.show:
+            drawn_hud_rect = profiler.draw(screen, UI_FONT)
+            prof_mark('hud')
         pygame.display.flip()
+        prof_mark('flip')
+        if profiler is not None:
+            profiler.end_frame()
+        # once a paused frame is on screen the loop switches to idle/dirty-rect mode
+        paused_presented = not animation_enabled
+        full_redraw = False
         FPS_CLOCK.tick(FPS)
+        # rawtime is this frame's work without the tick delay; the worker runs alongside
+        # the loop, so a frame costs whichever of the two is slower
+        if quality is not None and animation_enabled and not tsx_background_surface:
+            if quality.observe(max(FPS_CLOCK.get_rawtime(), worker_ms)) and DEBUG_STATUS_LOG:
+                print(quality.describe())
 
+    if profiler is not None:
+        profiler.close()
+    if year_terms is not None:
+        year_terms.stop()
+    if data_watcher is not None:
+        data_watcher.stop()
+    if chart_prefetch is not None:
+        chart_prefetch.stop()
+    if frame_pipeline is not None:
+        frame_pipeline.stop()
     pygame.quit()
     sys.exit()
 
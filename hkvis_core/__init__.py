@@ -9,11 +9,50 @@ Modules included:
 - scraping_utils
 - saveallcharts
 - Viusalizedatatest
+- patternengine
+- glyphatlas
+- colortables
+- rainfallstore
+- datacache
+- chartexport
+- startupbench
+- offlinerender
+- benchmark
+- frameprofiler
+- adaptivequality
+- yearcache
+- framepipeline
+- bakedloop
+- refresh
+- datawatcher
+- streamparse
+- chartsurface
+- chartprefetch
+- chartatlas
+- svgchart
+- climatology
+
+Modules are split by what they pull in, and heavy imports are deferred:
+- data loading (rainfallstore, streamparse, datacache, datawatcher) and
+  statistics (climatology): json + numpy only
+- animation (animationtest, patternengine, colortables, glyphatlas, frameprofiler,
+  adaptivequality, yearcache, framepipeline, bakedloop): pygame/numpy
+- chart plotting (chartexport, viewchart, downloadchart): matplotlib is
+  imported inside the plotting functions; chartsurface (and chartprefetch,
+  which renders ahead of the year slider) draws the same chart with pygame only;
+  chartatlas packs the chart PNGs into one palette image (pygame/numpy);
+  svgchart writes the charts as SVG from a string template (stdlib only)
+- network fetching (refresh, xmldata, scraping_utils): stdlib urllib/asyncio
+  only; xmldata and scraping_utils delegate to refresh
+
+Importing the package itself loads nothing; submodules are imported on
+first attribute access.
 
 Import as:
-    from hkvis_core.viewchart import load_rainfall_data
+    from hkvis_core.rainfallstore import RainfallStore
     import hkvis_core.animationtest as animationtest
 """
+import importlib
 
 __all__ = [
     'animationtest',
@@ -23,4 +62,33 @@ __all__ = [
     'scraping_utils',
     'saveallcharts',
     'Viusalizedatatest',
+    'patternengine',
+    'glyphatlas',
+    'colortables',
+    'rainfallstore',
+    'datacache',
+    'chartexport',
+    'startupbench',
+    'offlinerender',
+    'benchmark',
+    'frameprofiler',
+    'adaptivequality',
+    'yearcache',
+    'framepipeline',
+    'bakedloop',
+    'refresh',
+    'datawatcher',
+    'streamparse',
+    'chartsurface',
+    'chartprefetch',
+    'chartatlas',
+    'svgchart',
+    'climatology',
 ]
+
+
+def __getattr__(name):
+    # lazy submodule access: `hkvis_core.viewchart` imports it on first use
+    if name in __all__:
+        return importlib.import_module(f'{__name__}.{name}')
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,115 @@
+"""Adaptive quality controller for the ASCII rain animation.
+
+Watches the per-frame work time (`FPS_CLOCK.get_rawtime()`, i.e. without
+the tick delay) and steps through a ladder of quality levels to hold the
+target frame rate. Levels trade, in order: smoothscale for plain scale, the
+pattern update rate (the grid is regenerated at `pattern_hz` while colors
+still animate every frame), and grid density (cols x rows).
+
+Hysteresis keeps it from oscillating:
+- a step down needs the smoothed frame time over budget for `down_frames`
+- a step up needs it well under budget (`up_ratio`) for `up_frames`, and
+  the wait doubles each time a level had to be abandoned again
+- no change is made within `cooldown_frames` of the previous one
+
+Usage:
+    quality = AdaptiveQuality(target_fps=60)
+    level = quality.level            # .cols, .rows, .smooth, .pattern_hz
+    ...
+    FPS_CLOCK.tick(FPS)
+    # with a FramePipeline, the worker's time counts too
+    if quality.observe(max(FPS_CLOCK.get_rawtime(), pipe.work_ms)):
+        level = quality.level        # changed
+"""
+from collections import namedtuple
+
+QualityLevel = namedtuple('QualityLevel', 'cols rows smooth pattern_hz')
+
+# best first; the first level is the original 100x36 smoothscaled animation
+LEVELS = (
+    QualityLevel(100, 36, True, None),
+    QualityLevel(100, 36, False, None),
+    QualityLevel(100, 36, False, 30),
+    QualityLevel(80, 29, False, 30),
+    QualityLevel(64, 23, False, 30),
+    QualityLevel(50, 18, False, 20),
+)
+
+
+class AdaptiveQuality:
+    def __init__(self, target_fps=60, levels=LEVELS, start_level=0, fixed_level=None,
+                 down_frames=30, up_frames=180, up_ratio=0.6, cooldown_frames=60, smoothing=0.1,
+                 warmup_frames=10):
+        self.levels = tuple(levels)
+        self.budget_ms = 1000.0 / target_fps
+        self.fixed = fixed_level is not None
+        self.index = max(0, min(len(self.levels) - 1, fixed_level if self.fixed else start_level))
+        self.down_frames = down_frames
+        self.up_frames = up_frames
+        self.up_ratio = up_ratio
+        self.cooldown_frames = cooldown_frames
+        self.smoothing = smoothing
+        self.warmup_frames = warmup_frames
+        self.avg_ms = None
+        # frames to ignore after a reset (font/atlas set-up, first scale at a new size)
+        self._skip = warmup_frames
+        self._over = 0
+        self._under = 0
+        self._cooldown = 0
+        # per-level multiplier on up_frames: 1 after the first failure, doubled after each later one
+        self._backoff = [0] * len(self.levels)
+
+    @property
+    def level(self):
+        return self.levels[self.index]
+
+    def reset(self):
+        """Forget the measurements (e.g. after a resize or resuming from pause)."""
+        self.avg_ms = None
+        self._over = self._under = 0
+        self._skip = self.warmup_frames
+
+    def observe(self, frame_ms):
+        """Feed one frame's work time in ms; returns True if the level changed."""
+        if self.fixed:
+            return False
+        if self._skip > 0:
+            self._skip -= 1
+            return False
+        if self.avg_ms is None:
+            self.avg_ms = float(frame_ms)
+        else:
+            self.avg_ms += (frame_ms - self.avg_ms) * self.smoothing
+        if self._cooldown > 0:
+            self._cooldown -= 1
+            return False
+        if self.avg_ms > self.budget_ms:
+            self._over += 1
+            self._under = 0
+        elif self.avg_ms < self.budget_ms * self.up_ratio:
+            self._under += 1
+            self._over = 0
+        else:
+            self._over = self._under = 0
+
+        if self._over >= self.down_frames and self.index < len(self.levels) - 1:
+            self._backoff[self.index] = min(max(1, self._backoff[self.index] * 2), 32)
+            return self._step(1)
+        if self.index > 0 and self._under >= self.up_frames * max(1, self._backoff[self.index - 1]):
+            return self._step(-1)
+        return False
+
+    def _step(self, delta):
+        self.index += delta
+        self._over = self._under = 0
+        self._cooldown = self.cooldown_frames
+        # the new level's cost differs; start the average afresh
+        self.avg_ms = None
+        self._skip = self.warmup_frames
+        return True
+
+    def describe(self):
+        lv = self.level
+        hz = f'{lv.pattern_hz} Hz pattern' if lv.pattern_hz else 'pattern every frame'
+        scale = 'smoothscale' if lv.smooth else 'scale'
+        return f'quality {self.index}: {lv.cols}x{lv.rows}, {scale}, {hz}'
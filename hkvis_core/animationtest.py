@@ -98,7 +98,7 @@ def lerp_color(a, b, t):
             int(a[1] + (b[1]-a[1]) * t),
             int(a[2] + (b[2]-a[2]) * t))
 
-def row_base_color(row_idx, total_rows, top_whiten=TOP_WHITEN_BIAS, bottom_boost=BOTTOM_WHITEN_BOOST):
+def row_base_color(row_idx, total_rows, top_whiten=TOP_WHITEN_BIAS, bottom_boost=BOTTOM_WHITEN_BOOST, palette=BLUE_PALETTE):
     t = row_idx / max(1, total_rows - 1)
     t_top_biased = max(0.0, t - (1.0 - t) * (top_whiten * 0.15))
     if t > 0.6:
@@ -107,12 +107,12 @@ def row_base_color(row_idx, total_rows, top_whiten=TOP_WHITEN_BIAS, bottom_boost
         t_final = min(1.0, t_bottom_biased)
     else:
         t_final = t_top_biased
-    segs = len(BLUE_PALETTE) - 1
+    segs = len(palette) - 1
     seg_pos = t_final * segs
     i = int(seg_pos)
     frac = seg_pos - i
-    c1 = BLUE_PALETTE[i]
-    c2 = BLUE_PALETTE[min(i+1, segs)]
+    c1 = palette[i]
+    c2 = palette[min(i+1, segs)]
     base = lerp_color(c1, c2, frac)
     top_influence = max(0.0, 1.0 - t) * top_whiten
     bottom_influence = 0.0
@@ -0,0 +1,305 @@
+"""Baked animation loops: precomputed frames played back from memory.
+
+For kiosk set-ups that show one year for hours, rendering the animation
+live is wasted work. `bake` renders N frames of one year once, blends the
+first frames with the frames that follow the loop's end (so frame N-1 runs
+smoothly into frame 0), and stores them palette-indexed: one uint8 per
+pixel plus a <=256 color palette. Playback is an index copy into an 8-bit
+surface and one palette blit, whatever the grid size.
+
+The palette is quantised per channel, with each channel's levels fitted
+(Lloyd-Max) to sampled frame colors so they concentrate on the blues the
+animation actually uses. Loops can be saved as .npy + .json and memory-mapped back.
+
+Frames are stored in surfarray layout, (frames, width, height).
+
+Usage:
+    python -m hkvis_core.bakedloop --year 1997 --frames 600 --fps 60 --out loops/loop_1997
+
+    loop = BakedLoop.load('loops/loop_1997')      # memory-mapped
+    surface = loop.surface_at(anim_time)
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pygame
+
+LOOP_VERSION = 1
+# quantisation levels per channel (R, G, B); 6 * 7 * 6 = 252 palette entries
+PALETTE_LEVELS = (6, 7, 6)
+PALETTE_SAMPLES = 8
+
+
+class Quantizer:
+    """Maps RGB pixels to palette indices via per-channel lookup tables."""
+
+    def __init__(self, channel_levels):
+        self.channel_levels = [np.asarray(lv, dtype=np.uint8) for lv in channel_levels]
+        nr, ng, nb = (len(lv) for lv in self.channel_levels)
+        if nr * ng * nb > 256:
+            raise ValueError('palette needs more than 256 entries')
+        r, g, b = np.meshgrid(*self.channel_levels, indexing='ij')
+        self.palette = np.stack([r.ravel(), g.ravel(), b.ravel()], axis=1).astype(np.uint8)
+        strides = (ng * nb, nb, 1)
+        self._luts = []
+        values = np.arange(256)
+        for levels, stride in zip(self.channel_levels, strides):
+            lv = levels.astype(np.int32)
+            # nearest level for every 0..255 value
+            mids = (lv[1:] + lv[:-1]) / 2.0
+            nearest = np.searchsorted(mids, values, side='right')
+            self._luts.append((nearest * stride).astype(np.uint8))
+
+    @classmethod
+    def from_samples(cls, samples, levels=PALETTE_LEVELS, background=(0, 0, 0), iterations=30):
+        """Fit each channel's levels to the non-background sample pixels.
+
+        Levels start at quantiles and are refined with Lloyd-Max iterations on
+        the channel histogram; the background value is always kept exact.
+        """
+        px = np.concatenate([s.reshape(-1, 3) for s in samples])
+        fg = px[np.any(px != np.asarray(background, dtype=px.dtype), axis=1)]
+        if not len(fg):
+            fg = px
+        x = np.arange(256, dtype=np.float64)
+        channel_levels = []
+        for c, n in enumerate(levels):
+            vals = fg[:, c]
+            hist = np.bincount(vals, minlength=256).astype(np.float64)
+            bg = float(background[c])
+            lv = np.unique(np.concatenate([[bg], np.rint(np.quantile(vals, np.linspace(0.0, 1.0, n - 1)))]))
+            for _ in range(iterations):
+                # move each level to the mean of the values nearest to it
+                cell = np.searchsorted((lv[1:] + lv[:-1]) / 2.0, x, side='right')
+                weight = np.bincount(cell, weights=hist, minlength=len(lv))
+                total = np.bincount(cell, weights=hist * x, minlength=len(lv))
+                new = np.where(weight > 0, total / np.maximum(weight, 1e-9), lv)
+                new[lv == bg] = bg
+                new = np.unique(np.rint(new))
+                if len(new) == len(lv) and np.array_equal(new, lv):
+                    break
+                lv = new
+            channel_levels.append(lv.clip(0, 255).astype(np.uint8))
+        return cls(channel_levels)
+
+    def index(self, rgb):
+        """(..., 3) uint8 RGB -> (...) uint8 palette indices."""
+        lr, lg, lb = self._luts
+        return lr[rgb[..., 0]] + lg[rgb[..., 1]] + lb[rgb[..., 2]]
+
+
+class BakedLoop:
+    """N palette-indexed frames that loop at `fps`."""
+
+    def __init__(self, frames, palette, fps, meta=None):
+        self.frames = frames
+        self.palette = np.asarray(palette, dtype=np.uint8)
+        self.fps = float(fps)
+        self.meta = dict(meta or {})
+        self._indexed = None
+        self._rgb = None
+
+    def __len__(self):
+        return len(self.frames)
+
+    @property
+    def size(self):
+        return int(self.frames.shape[1]), int(self.frames.shape[2])
+
+    @property
+    def duration(self):
+        return len(self.frames) / self.fps
+
+    def index_at(self, t):
+        return int(t * self.fps) % len(self.frames)
+
+    def surface_at(self, t):
+        """RGB surface showing the frame for animation time `t` (reused between calls)."""
+        if self._indexed is None:
+            self._indexed = pygame.Surface(self.size, 0, 8)
+            self._indexed.set_palette([tuple(c) for c in self.palette.tolist()])
+            # 32-bit: smoothscale is much slower on 24-bit surfaces
+            self._rgb = pygame.Surface(self.size, 0, 32)
+        view = pygame.surfarray.pixels2d(self._indexed)
+        view[...] = self.frames[self.index_at(t)]
+        del view  # release the surface lock
+        self._rgb.blit(self._indexed, (0, 0))
+        return self._rgb
+
+    def save(self, base_path):
+        """Write `<base>.frames.npy` and `<base>.json` (the key goes last)."""
+        directory = os.path.dirname(os.path.abspath(base_path))
+        os.makedirs(directory, exist_ok=True)
+        frames_path = base_path + '.frames.npy'
+        if getattr(self.frames, 'filename', None) != os.path.abspath(frames_path):
+            _write_atomic(frames_path, lambda f: np.save(f, np.ascontiguousarray(self.frames)))
+        meta = dict(self.meta, version=LOOP_VERSION, fps=self.fps, palette=self.palette.tolist(),
+                    frames=len(self.frames), size=list(self.size))
+        _write_atomic(base_path + '.json', lambda f: f.write(json.dumps(meta).encode('utf-8')))
+
+    @classmethod
+    def load(cls, base_path, mmap=True):
+        """Load a saved loop (memory-mapped by default); None if missing or stale format."""
+        try:
+            with open(base_path + '.json', 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            if meta.get('version') != LOOP_VERSION:
+                return None
+            frames = np.load(base_path + '.frames.npy', mmap_mode='r' if mmap else None)
+            if frames.ndim != 3 or len(frames) != meta.get('frames'):
+                return None
+            return cls(frames, meta['palette'], meta['fps'], meta)
+        except Exception:
+            return None
+
+
+def _write_atomic(path, write):
+    fd, tmp = tempfile.mkstemp(prefix='.tmp_', dir=os.path.dirname(os.path.abspath(path)))
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            write(f)
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, path)
+    except Exception:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+
+
+def bake(render_rgb, frames, fps, start_time=0.0, crossfade=None, meta=None, out_path=None,
+         levels=PALETTE_LEVELS, should_stop=None):
+    """Render and quantise a loop of `frames` frames.
+
+    `render_rgb(t)` returns the frame at time t as a (width, height, 3)
+    uint8 array. The first `crossfade` frames (default: a tenth of the
+    loop) fade in from the frames that follow the end of the loop, which
+    hides the seam. With `out_path` the frames are written straight to a
+    memory-mapped .npy there and the loop is saved. Returns the BakedLoop,
+    or None if `should_stop()` returned True part-way.
+    """
+    if frames < 2:
+        raise ValueError('a loop needs at least 2 frames')
+    if crossfade is None:
+        crossfade = max(1, frames // 10)
+    crossfade = max(0, min(crossfade, frames - 1))
+    dt = 1.0 / fps
+
+    samples = [render_rgb(start_time + (frames * i // PALETTE_SAMPLES) * dt)
+               for i in range(PALETTE_SAMPLES)]
+    quant = Quantizer.from_samples(samples, levels)
+    w, h = samples[0].shape[:2]
+
+    tmp_frames = None
+    if out_path:
+        os.makedirs(os.path.dirname(os.path.abspath(out_path)), exist_ok=True)
+        fd, tmp_frames = tempfile.mkstemp(prefix='.tmp_', suffix='.npy',
+                                          dir=os.path.dirname(os.path.abspath(out_path)))
+        os.close(fd)
+        store = np.lib.format.open_memmap(tmp_frames, mode='w+', dtype=np.uint8, shape=(frames, w, h))
+    else:
+        store = np.empty((frames, w, h), dtype=np.uint8)
+
+    try:
+        head = []  # RGB of the first `crossfade` frames, blended at the end
+        for i in range(frames + crossfade):
+            if should_stop is not None and should_stop():
+                raise _Stopped()
+            rgb = render_rgb(start_time + i * dt)
+            if i < crossfade:
+                head.append(rgb.astype(np.float32))
+            elif i < frames:
+                store[i] = quant.index(rgb)
+            else:
+                # frame i continues the loop's end; fade from it into head frame j
+                j = i - frames
+                wgt = j / crossfade
+                mixed = rgb.astype(np.float32) * (1.0 - wgt) + head[j] * wgt
+                store[j] = quant.index(np.rint(mixed).astype(np.uint8))
+        loop_meta = dict(meta or {}, start_time=start_time, crossfade=crossfade)
+        if out_path:
+            store.flush()
+            del store
+            os.chmod(tmp_frames, 0o644)
+            os.replace(tmp_frames, out_path + '.frames.npy')
+            tmp_frames = None
+            loop = BakedLoop(np.load(out_path + '.frames.npy', mmap_mode='r'), quant.palette, fps, loop_meta)
+            loop.save(out_path)
+            return loop
+        return BakedLoop(store, quant.palette, fps, loop_meta)
+    except _Stopped:
+        return None
+    finally:
+        if tmp_frames is not None:
+            try:
+                os.remove(tmp_frames)
+            except OSError:
+                pass
+
+
+class _Stopped(Exception):
+    pass
+
+
+def loop_path(directory, year, frames, fps):
+    return os.path.join(directory, f'loop_{year}_{frames}f_{fps:g}fps')
+
+
+def load_or_bake(renderer, year, data, frames, fps, directory=None, should_stop=None):
+    """Loop for `year`: reuse a saved one when its data matches, else bake (and save if `directory`).
+
+    `renderer` is an `offlinerender.FrameRenderer` for `data`.
+    """
+    meta = {'year': str(year), 'values': [float(v) for v in data], 'size': list(renderer.size)}
+    path = loop_path(directory, year, frames, fps) if directory else None
+    if path:
+        loop = BakedLoop.load(path)
+        if (loop is not None and loop.meta.get('values') == meta['values']
+                and loop.meta.get('size') == meta['size']):
+            return loop
+
+    def render_rgb(t):
+        return pygame.surfarray.array3d(renderer.render(t))
+
+    return bake(render_rgb, frames, fps, meta=meta, out_path=path, should_stop=should_stop)
+
+
+def main(argv=None):
+    # the renderer sets up SDL's dummy video driver for headless use
+    from hkvis_core.offlinerender import DEFAULT_XML, FrameRenderer, year_data
+    parser = argparse.ArgumentParser(description='Bake a looping rainfall animation for one year.')
+    parser.add_argument('--year', help='year to bake (default: demo data)')
+    parser.add_argument('--xml', default=DEFAULT_XML, help='path to monthlyElement.xml')
+    parser.add_argument('--frames', type=int, default=600)
+    parser.add_argument('--fps', type=float, default=60.0)
+    parser.add_argument('--crossfade', type=int, default=None, help='frames blended at the seam (default: frames/10)')
+    parser.add_argument('--out', required=True, help='output base path (writes <out>.frames.npy and <out>.json)')
+    args = parser.parse_args(argv)
+
+    data = year_data(args.year, args.xml)
+    pygame.font.init()
+    renderer = FrameRenderer(data)
+    start = time.perf_counter()
+
+    def render_rgb(t):
+        return pygame.surfarray.array3d(renderer.render(t))
+
+    loop = bake(render_rgb, args.frames, args.fps, crossfade=args.crossfade,
+                meta={'year': str(args.year), 'values': [float(v) for v in data], 'size': list(renderer.size)},
+                out_path=args.out)
+    elapsed = time.perf_counter() - start
+    w, h = loop.size
+    mb = loop.frames.nbytes / (1 << 20)
+    print(f'{len(loop)} frames ({w}x{h}, {len(loop.palette)} colors) in {elapsed:.1f}s -> '
+          f'{args.out}.frames.npy ({mb:.1f} MB, {loop.duration:.1f}s loop)', file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
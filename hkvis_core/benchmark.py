@@ -0,0 +1,356 @@
+"""Benchmark suite for the animation, color and data-loading hot paths.
+
+Scenarios:
+- pattern.*   generate_fluid_pattern (scalar) and the array engine at several grid sizes
+- colors.*    per-frame colors: row_base_color/final_cell_color vs the color tables
+- frame.*     full frame composition under SDL's dummy driver (per-cell
+              font.render vs glyph atlas), including the window smoothscale
+- load.*      the store parse, the binary cache hit and the cached load plus
+              to_lists() (what load_rainfall_data returns)
+- chart.*     single chart and batch chart export (skipped without matplotlib)
+
+Results are written as JSON (ops/sec plus p50/p90/p99 per scenario) and can
+be compared against a stored baseline; a scenario whose median got slower
+than the threshold is reported as a regression and the exit status is 1.
+
+bench_baseline.json at the repository root is the reference run; its
+"environment" block records the machine and library versions it was taken
+with. Timings only compare on similar hardware: on another machine, save a
+baseline from the unchanged tree first and compare your branch against that.
+
+Usage:
+    python -m hkvis_core.benchmark --json results.json
+    python -m hkvis_core.benchmark --baseline                  # vs bench_baseline.json
+    python -m hkvis_core.benchmark --save-baseline my_baseline.json
+    python -m hkvis_core.benchmark --baseline my_baseline.json --threshold 0.25
+    python -m hkvis_core.benchmark --filter pattern --quick
+"""
+import argparse
+import json
+import math
+import os
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+
+GRID_SIZES = ((50, 18), (100, 36), (200, 72))
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'bench_baseline.json')
+# environment keys that make timings incomparable when they differ
+MACHINE_KEYS = ('platform', 'machine', 'cpus', 'python', 'numpy', 'pygame')
+
+
+def write_synthetic_xml(path, seed=1884):
+    """Write a monthlyElement.xml-shaped file with RF plus two other elements."""
+    rng = random.Random(seed)
+    years = list(range(1884, 1940)) + list(range(1947, 2026))
+
+    def month_data(lo, hi):
+        rows = []
+        for y in years:
+            row = [str(y)]
+            for _ in range(12):
+                p = rng.random()
+                if p < 0.02:
+                    row.append('Trace')
+                elif p < 0.03:
+                    row.append('***')
+                else:
+                    row.append(f'{rng.uniform(lo, hi):.1f}')
+            rows.append(row)
+        return rows
+
+    doc = {'stn': {'code': 'HKO', 'data': [
+        {'code': 'MEANTEMP', 'unit': 'degC', 'monthData': month_data(14, 30)},
+        {'code': 'RF', 'unit': 'mm', 'monthData': month_data(0, 600)},
+        {'code': 'MEANRH', 'unit': '%', 'monthData': month_data(60, 90)},
+    ]}}
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(doc, f)
+
+
+def percentile(sorted_vals, q):
+    if not sorted_vals:
+        return 0.0
+    k = (len(sorted_vals) - 1) * q
+    lo = math.floor(k)
+    hi = math.ceil(k)
+    return sorted_vals[lo] + (sorted_vals[hi] - sorted_vals[lo]) * (k - lo)
+
+
+def measure(fn, min_iters, max_iters, budget_s, warmup=1):
+    for _ in range(warmup):
+        fn()
+    samples = []
+    deadline = time.perf_counter() + budget_s
+    while len(samples) < max_iters and (len(samples) < min_iters or time.perf_counter() < deadline):
+        t0 = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - t0)
+    samples.sort()
+    mean = sum(samples) / len(samples)
+    return {
+        'iterations': len(samples),
+        'mean_ms': mean * 1000,
+        'p50_ms': percentile(samples, 0.50) * 1000,
+        'p90_ms': percentile(samples, 0.90) * 1000,
+        'p99_ms': percentile(samples, 0.99) * 1000,
+        'min_ms': samples[0] * 1000,
+        'ops_per_sec': 1.0 / mean if mean > 0 else float('inf'),
+    }
+
+
+# --- scenarios: each yields (name, fn, kind) where kind picks the iteration budget ---
+def pattern_scenarios():
+    from hkvis_core import animationtest
+    from hkvis_core.patternengine import PatternEngine
+    data = animationtest.RAIN_DATA
+    for cols, rows in GRID_SIZES:
+        tag = f'{cols}x{rows}'
+        clock = [0.0]
+
+        def scalar(cols=cols, rows=rows):
+            clock[0] += 1 / 60
+            animationtest.generate_fluid_pattern(data, clock[0], cols=cols, rows=rows)
+        yield f'pattern.scalar[{tag}]', scalar, 'slow'
+
+        engine = PatternEngine(cols, rows)
+
+        def vectorised(engine=engine):
+            clock[0] += 1 / 60
+            engine.generate(data, clock[0])
+        yield f'pattern.numpy[{tag}]', vectorised, 'fast'
+
+
+def color_scenarios():
+    from hkvis_core import animationtest
+    from hkvis_core.colortables import ColorTables
+    from hkvis_core.patternengine import PatternEngine
+    rows, cols = animationtest.ROWS, animationtest.COLS
+    grid = PatternEngine(cols, rows).generate(animationtest.RAIN_DATA, 1.0)
+    norm_rows = grid.norm.tolist()
+
+    def scalar():
+        t = 1.0
+        for row_idx, norm_row in enumerate(norm_rows):
+            base = animationtest.row_base_color(row_idx, rows)
+            for col_idx, norm in enumerate(norm_row):
+                col_mod = (math.sin((t * 1.2) + col_idx * 0.12) + 1) / 2
+                seed = (row_idx * 1315423911) ^ (col_idx * 2654435761)
+                phase = (seed % 1000) / 1000.0
+                white_osc = (math.sin(t * 1.5 + phase * 6.28318) + 1) / 2
+                white_factor = (white_osc ** 3) * 0.9 * (((seed >> 3) & 31) / 31.0 * 0.8)
+                animationtest.final_cell_color(base, norm, row_idx, rows, time_mod=col_mod, white_factor=white_factor)
+    yield 'colors.scalar[100x36]', scalar, 'slow'
+
+    tables = ColorTables(rows, cols)
+
+    def vectorised():
+        tables.frame_colors(grid.norm, 1.0)
+    yield 'colors.tables[100x36]', vectorised, 'fast'
+
+    def build_tables():
+        ColorTables(rows, cols)
+    yield 'colors.tables_build[100x36]', build_tables, 'slow'
+
+
+def frame_scenarios():
+    import pygame
+    from hkvis_core import animationtest
+    from hkvis_core.colortables import get_tables
+    from hkvis_core.glyphatlas import GlyphAtlas
+    from hkvis_core.offlinerender import load_font
+    from hkvis_core.patternengine import PatternEngine
+    pygame.init()
+    screen = pygame.display.set_mode((1280, 720))
+    font = load_font()
+    atlas = GlyphAtlas(font, animationtest.ASCII_CHARS)
+    cw, chh = atlas.cell_w, atlas.cell_h
+    rows, cols, pad = animationtest.ROWS, animationtest.COLS, animationtest.PADDING
+    surface = pygame.Surface((cw * cols + pad * 2, chh * rows + pad * 2))
+    engine = PatternEngine(cols, rows)
+    tables = get_tables(rows, cols)
+    data = animationtest.RAIN_DATA
+    clock = [0.0]
+
+    def font_render():
+        clock[0] += 1 / 60
+        grid = engine.generate(data, clock[0])
+        colors = tables.frame_colors(grid.norm, clock[0]).tolist()
+        surface.fill(animationtest.BG_COLOR)
+        chars = animationtest.ASCII_CHARS
+        for r, idx_row in enumerate(grid.char_idx.tolist()):
+            for c, i in enumerate(idx_row):
+                surface.blit(font.render(chars[i], True, colors[r][c]), (pad + c * cw, pad + r * chh))
+        screen.blit(pygame.transform.smoothscale(surface, screen.get_size()), (0, 0))
+    yield 'frame.font_render[100x36]', font_render, 'slow'
+
+    def atlas_frame():
+        clock[0] += 1 / 60
+        grid = engine.generate(data, clock[0])
+        colors = tables.frame_colors(grid.norm, clock[0])
+        surface.fill(animationtest.BG_COLOR)
+        atlas.render(surface, grid.char_idx, colors, (pad, pad))
+        screen.blit(pygame.transform.smoothscale(surface, screen.get_size()), (0, 0))
+    yield 'frame.glyph_atlas[100x36]', atlas_frame, 'fast'
+
+    fixed = engine.generate(data, 1.0)
+    fixed_colors = tables.frame_colors(fixed.norm, 1.0)
+
+    def atlas_only():
+        atlas.render(surface, fixed.char_idx, fixed_colors, (pad, pad))
+    yield 'frame.atlas_blit_only[100x36]', atlas_only, 'fast'
+
+
+def load_scenarios(xml_path, cache_dir):
+    from hkvis_core import datacache
+    from hkvis_core.rainfallstore import RainfallStore
+    yield 'load.store_parse', lambda: RainfallStore.load(xml_path), 'fast'
+    datacache.load_store(xml_path, cache_dir=cache_dir)
+    yield 'load.store_cached', lambda: datacache.load_store(xml_path, cache_dir=cache_dir), 'fast'
+    # what viewchart/downloadchart.load_rainfall_data do, against the benchmark's own
+    # cache rather than a .hkvis_cache next to the user's data file
+    yield 'load.to_lists', lambda: datacache.load_store(xml_path, cache_dir=cache_dir).to_lists(), 'fast'
+
+
+def chart_scenarios(xml_path, out_dir, batch_years, workers):
+    try:
+        import matplotlib  # noqa: F401
+    except ImportError:
+        print('skipping chart.*: matplotlib not installed', file=sys.stderr)
+        return
+    from hkvis_core.chartexport import export_charts, render_chart_png
+    from hkvis_core.datacache import load_store
+    store = load_store(xml_path, use_cache=False)
+    year = store.years[-1]
+    vals = store.values_list(year)
+    path = os.path.join(out_dir, 'single.png')
+    yield 'chart.single_png', lambda: render_chart_png(year, vals, path), 'chart'
+    years = store.years[:batch_years]
+    yield (f'chart.batch_png[{len(years)}y,workers={workers or "auto"}]',
+           lambda: export_charts(store, os.path.join(out_dir, 'batch'), years=years, workers=workers), 'batch')
+
+
+BUDGETS = {
+    # kind: (min_iters, max_iters, seconds)
+    'fast': (20, 500, 2.0),
+    'slow': (5, 100, 3.0),
+    'chart': (3, 20, 4.0),
+    'batch': (1, 3, 10.0),
+}
+
+
+def run(selected, quick=False, xml_path=None, batch_years=24, workers=None):
+    tmp = tempfile.mkdtemp(prefix='hkvis_bench_')
+    try:
+        if xml_path is None:
+            xml_path = os.path.join(tmp, 'monthlyElement.xml')
+            write_synthetic_xml(xml_path)
+        groups = [
+            ('pattern', pattern_scenarios),
+            ('colors', color_scenarios),
+            ('frame', frame_scenarios),
+            ('load', lambda: load_scenarios(xml_path, os.path.join(tmp, 'cache'))),
+            ('chart', lambda: chart_scenarios(xml_path, tmp, batch_years, workers)),
+        ]
+        # a filter naming a group ('chart', 'frame.glyph') only sets up that
+        # group; other filters ('numpy') are matched against every scenario
+        named = {g for g, _ in groups if any(s.split('.')[0] == g for s in selected)}
+        only_named = bool(selected) and all(s.split('.')[0] in {g for g, _ in groups} for s in selected)
+        results = {}
+        for group, factory in groups:
+            if only_named and group not in named:
+                continue
+            try:
+                scenarios = list(factory())
+            except Exception as e:
+                print(f'skipping {group}.*: {e}', file=sys.stderr)
+                continue
+            for name, fn, kind in scenarios:
+                if selected and not any(s in name for s in selected):
+                    continue
+                min_iters, max_iters, budget = BUDGETS[kind]
+                if quick:
+                    min_iters, max_iters, budget = max(1, min_iters // 4), max(1, max_iters // 4), budget / 4
+                results[name] = measure(fn, min_iters, max_iters, budget)
+                r = results[name]
+                print(f"{name:48s} {r['ops_per_sec']:10.1f} ops/s  p50 {r['p50_ms']:9.3f} ms  "
+                      f"p99 {r['p99_ms']:9.3f} ms  (n={r['iterations']})")
+        return results
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+def environment():
+    info = {'python': platform.python_version(), 'platform': platform.platform(),
+            'machine': platform.machine(), 'cpus': os.cpu_count(),
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S')}
+    for mod in ('numpy', 'pygame', 'matplotlib'):
+        try:
+            info[mod] = __import__(mod).__version__
+        except Exception:
+            info[mod] = None
+    return info
+
+
+def compare(results, baseline, threshold):
+    """Print a comparison table; return the names of regressed scenarios."""
+    regressions = []
+    print(f"\n{'scenario':48s} {'baseline p50':>13s} {'current p50':>13s} {'change':>8s}")
+    for name, r in results.items():
+        b = baseline.get(name)
+        if not b:
+            print(f'{name:48s} {"-":>13s} {r["p50_ms"]:11.3f}ms {"new":>8s}')
+            continue
+        change = r['p50_ms'] / b['p50_ms'] - 1.0 if b['p50_ms'] > 0 else 0.0
+        flag = ''
+        if change > threshold:
+            regressions.append(name)
+            flag = '  REGRESSION'
+        print(f"{name:48s} {b['p50_ms']:11.3f}ms {r['p50_ms']:11.3f}ms {change * 100:+7.1f}%{flag}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the HK Rainfall Visualiser hot paths.')
+    parser.add_argument('--filter', action='append', default=[], help='only run scenarios containing this text')
+    parser.add_argument('--quick', action='store_true', help='fewer iterations (smoke run)')
+    parser.add_argument('--xml', help='rainfall file to load (default: synthetic data)')
+    parser.add_argument('--batch-years', type=int, default=24, help='years in the batch chart scenario')
+    parser.add_argument('--workers', type=int, default=None, help='workers for the batch chart scenario')
+    parser.add_argument('--json', help='write results to this JSON file')
+    parser.add_argument('--baseline', nargs='?', const=DEFAULT_BASELINE,
+                        help='compare against this results JSON (default: the committed bench_baseline.json)')
+    parser.add_argument('--save-baseline', help='write results to this file as the new baseline')
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help='relative p50 slow-down counted as a regression (default 0.25)')
+    args = parser.parse_args(argv)
+
+    results = run(args.filter, args.quick, args.xml, args.batch_years, args.workers)
+    doc = {'environment': environment(), 'results': results}
+    for path in (args.json, args.save_baseline):
+        if path:
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(doc, f, indent=2)
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            stored = json.load(f)
+        env = stored.get('environment', {})
+        differs = [k for k in MACHINE_KEYS if env.get(k) != doc['environment'].get(k)]
+        if differs:
+            print('\nNote: the baseline was taken with a different ' + ', '.join(differs)
+                  + f" ({env.get('platform')}, {env.get('cpus')} CPUs); compare with care")
+        regressions = compare(results, stored.get('results', {}), args.threshold)
+        if regressions:
+            print(f'\n{len(regressions)} regression(s): ' + ', '.join(regressions))
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,370 @@
+"""Pack the yearly chart PNGs into one atlas.
+
+Opening, inflating and converting ~140 PNGs one by one is slow where the
+filesystem is slow (the PyInstaller one-file build extracts into a temp
+directory). `build_atlas` packs every rainfall_<year>.png of a chart
+directory into:
+
+- charts.atlas.png         all charts stacked vertically, 8-bit palette
+- charts.atlas.thumbs.png  thumbnails in a grid (for a year picker)
+- charts.atlas.pixels.npy  optional (--raw): the same palette indices,
+                           uncompressed and memory-mappable
+- charts.atlas.json        palette and year -> rect index, written last
+
+The matplotlib charts use under 300 distinct colors; the 256 most common
+cover all but ~0.01% of the pixels, and the rest map to their nearest
+palette entry, so the 8-bit atlas is visually lossless and smaller than
+the separate PNGs. At runtime the atlas is read once (memory-mapped, or a
+single PNG decode) and any year is cut out of it with no per-year I/O.
+
+Each year records the hash of the values its chart was drawn from (from
+the chartexport manifest, or from `store` when given), and a chart is only
+used while the loaded data still has those values.
+
+Usage:
+    python -m hkvis_core.chartatlas rainfall_charts [--raw] [--xml data/monthlyElement.xml]
+
+    atlas = ChartAtlas.load('rainfall_charts/charts.atlas')
+    surf = atlas.surface('1997')               # 8-bit, full size
+    sheet = atlas.thumbnail_sheet()            # all thumbnails
+    year = atlas.year_at(pos_in_sheet)
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+
+import numpy as np
+import pygame
+
+try:
+    from hkvis_core.chartexport import CHART_FILE_RE, read_manifest, year_hash
+    from hkvis_core.chartsurface import ChartRenderer
+except ImportError:
+    from chartexport import CHART_FILE_RE, read_manifest, year_hash
+    from chartsurface import ChartRenderer
+
+ATLAS_VERSION = 1
+ATLAS_NAME = 'charts.atlas'
+THUMB_WIDTH = 160
+THUMB_COLUMNS = 12
+# colors matched per pass when mapping off-palette colors (bounds the distance matrix)
+_NEAREST_CHUNK = 4096
+
+
+def default_base(chart_dir):
+    return os.path.join(chart_dir, ATLAS_NAME)
+
+
+def _pack(rgb):
+    """(..., 3) uint8 -> (...) uint32 0xRRGGBB keys."""
+    rgb = rgb.astype(np.uint32)
+    return (rgb[..., 0] << 16) | (rgb[..., 1] << 8) | rgb[..., 2]
+
+
+def _unpack(keys):
+    keys = np.asarray(keys, dtype=np.uint32)
+    return np.stack([(keys >> 16) & 255, (keys >> 8) & 255, keys & 255], axis=-1).astype(np.uint8)
+
+
+class PaletteMapper:
+    """Maps RGB pixels to indices of a fixed palette (exact where possible, else nearest)."""
+
+    def __init__(self, palette_keys):
+        self.keys = np.asarray(palette_keys, dtype=np.uint32)
+        self.rgb = _unpack(self.keys).astype(np.int32)
+        self._order = np.argsort(self.keys)
+        self._sorted = self.keys[self._order]
+
+    def indices(self, rgb):
+        """(h, w, 3) uint8 -> (h, w) uint8 palette indices."""
+        uniq, inverse = np.unique(_pack(rgb).ravel(), return_inverse=True)
+        pos = np.searchsorted(self._sorted, uniq).clip(0, len(self._sorted) - 1)
+        exact = self._sorted[pos] == uniq
+        lut = np.empty(len(uniq), dtype=np.uint8)
+        lut[exact] = self._order[pos[exact]]
+        missing = np.nonzero(~exact)[0]
+        for start in range(0, len(missing), _NEAREST_CHUNK):
+            sel = missing[start:start + _NEAREST_CHUNK]
+            d = ((_unpack(uniq[sel]).astype(np.int32)[:, None, :] - self.rgb[None, :, :]) ** 2).sum(axis=2)
+            lut[sel] = d.argmin(axis=1)
+        return lut[inverse].reshape(rgb.shape[:2])
+
+
+def _palette_surface(indices, palette):
+    """8-bit surface from (h, w) palette indices."""
+    h, w = indices.shape
+    surf = pygame.Surface((w, h), depth=8)
+    surf.set_palette([tuple(int(c) for c in p) for p in palette])
+    pygame.surfarray.blit_array(surf, indices.T)
+    return surf
+
+
+def _save_atomic(path, save):
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp = tempfile.mkstemp(prefix='.tmp_', suffix=os.path.splitext(path)[1], dir=directory)
+    os.close(fd)
+    try:
+        save(tmp)
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, path)
+    except Exception:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+
+
+def chart_files(chart_dir):
+    """{year: path} of the chart PNGs in `chart_dir`."""
+    files = {}
+    for name in sorted(os.listdir(chart_dir)):
+        m = CHART_FILE_RE.match(name)
+        if m:
+            files[m.group(1)] = os.path.join(chart_dir, name)
+    return files
+
+
+def build_atlas(chart_dir, out_base=None, thumb_width=THUMB_WIDTH, columns=THUMB_COLUMNS, raw=False,
+                store=None):
+    """Pack the charts of `chart_dir` into an atlas at `out_base`; returns the index.
+
+    Years missing from the chart manifest take their hash from `store`
+    (the data the charts are known to be drawn from); without either the
+    year is packed but never matches any data.
+    """
+    out_base = out_base or default_base(chart_dir)
+    files = chart_files(chart_dir)
+    if not files:
+        raise ValueError(f'No rainfall_<year>.png charts in {chart_dir}')
+    years = list(files)
+    images = [pygame.surfarray.array3d(pygame.image.load(files[y])).transpose(1, 0, 2) for y in years]
+
+    # palette: the 256 most common colors over all charts
+    keys, counts = np.unique(np.concatenate([_pack(im).ravel() for im in images]), return_counts=True)
+    palette_keys = keys[np.argsort(-counts, kind='stable')[:256]]
+    mapper = PaletteMapper(palette_keys)
+    palette = _unpack(palette_keys)
+
+    # full size: stacked vertically, so each year's rows are contiguous in the raw array
+    width = max(im.shape[1] for im in images)
+    height = sum(im.shape[0] for im in images)
+    pixels = np.zeros((height, width), dtype=np.uint8)
+    index = {}
+    y = 0
+    for year, im in zip(years, images):
+        h, w = im.shape[:2]
+        pixels[y:y + h, :w] = mapper.indices(im)
+        index[year] = {'rect': [0, y, w, h]}
+        y += h
+
+    # thumbnails: a grid, one row per `columns` years
+    th_w = thumb_width
+    th_h = max(1, round(thumb_width * images[0].shape[0] / images[0].shape[1]))
+    rows = -(-len(years) // columns)
+    sheet = pygame.Surface((columns * th_w, rows * th_h), 0, 24)
+    sheet.fill((255, 255, 255))
+    for i, (year, im) in enumerate(zip(years, images)):
+        x, y = (i % columns) * th_w, (i // columns) * th_h
+        small = pygame.transform.smoothscale(pygame.surfarray.make_surface(im.transpose(1, 0, 2)), (th_w, th_h))
+        sheet.blit(small, (x, y))
+        index[year]['thumb'] = [x, y, th_w, th_h]
+    thumbs = mapper.indices(pygame.surfarray.array3d(sheet).transpose(1, 0, 2))
+
+    hashes = read_manifest(chart_dir).get('charts', {})
+    for year in years:
+        h = hashes.get(year)
+        if h is None and store is not None and year in store:
+            h = year_hash(year, store.values[store.row(year)])
+        index[year]['hash'] = h
+
+    base_name = os.path.basename(out_base)
+    _save_atomic(out_base + '.png', lambda p: pygame.image.save(_palette_surface(pixels, palette), p))
+    _save_atomic(out_base + '.thumbs.png', lambda p: pygame.image.save(_palette_surface(thumbs, palette), p))
+    if raw:
+        _save_atomic(out_base + '.pixels.npy', lambda p: np.save(p, pixels))
+    elif os.path.exists(out_base + '.pixels.npy'):
+        os.remove(out_base + '.pixels.npy')
+    meta = {
+        'version': ATLAS_VERSION,
+        'image': base_name + '.png',
+        'thumbs': base_name + '.thumbs.png',
+        'raw': base_name + '.pixels.npy' if raw else None,
+        'size': [width, height],
+        'columns': columns,
+        'palette': palette.tolist(),
+        'years': index,
+    }
+
+    def write_index(path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+    # the index goes last so a half-written atlas is never picked up
+    _save_atomic(out_base + '.json', write_index)
+    return meta
+
+
+class ChartAtlas:
+    def __init__(self, meta, pixels, thumbs, keep=()):
+        self.meta = meta
+        self.years = list(meta['years'])
+        self.palette = [tuple(c) for c in meta['palette']]
+        self.pixels = pixels
+        self.thumbs = thumbs
+        # surfaces whose pixel buffers back `pixels`/`thumbs`
+        self._keep = keep
+        self._sheet = None
+
+    @classmethod
+    def load(cls, base, mmap=True):
+        """Load an atlas (raw pixels memory-mapped if present); None if missing or stale format."""
+        try:
+            with open(base + '.json', 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            if meta.get('version') != ATLAS_VERSION:
+                return None
+            directory = os.path.dirname(os.path.abspath(base))
+            keep = []
+            pixels = None
+            if meta.get('raw') and os.path.exists(os.path.join(directory, meta['raw'])):
+                pixels = np.load(os.path.join(directory, meta['raw']), mmap_mode='r' if mmap else None)
+            if pixels is None:
+                surf = pygame.image.load(os.path.join(directory, meta['image']))
+                keep.append(surf)
+                pixels = pygame.surfarray.pixels2d(surf).T
+            thumb_surf = pygame.image.load(os.path.join(directory, meta['thumbs']))
+            keep.append(thumb_surf)
+            thumbs = pygame.surfarray.pixels2d(thumb_surf).T
+            if list(pixels.shape[::-1]) != meta['size']:
+                return None
+            return cls(meta, pixels, thumbs, tuple(keep))
+        except Exception:
+            return None
+
+    def __contains__(self, year):
+        return str(year) in self.meta['years']
+
+    def __len__(self):
+        return len(self.years)
+
+    def rect(self, year):
+        return pygame.Rect(self.meta['years'][str(year)]['rect'])
+
+    def thumb_rect(self, year):
+        return pygame.Rect(self.meta['years'][str(year)]['thumb'])
+
+    def hash(self, year):
+        """chartexport.year_hash of the data the chart was drawn from, if recorded."""
+        return self.meta['years'][str(year)].get('hash')
+
+    def matches(self, year, vals):
+        """True if the atlas has `year`, drawn from exactly these values."""
+        if str(year) not in self:
+            return False
+        h = self.hash(year)
+        return h is not None and h == year_hash(str(year), vals)
+
+    def surface(self, year):
+        """The full-size chart as a new 8-bit surface (safe to use from any thread)."""
+        x, y, w, h = self.meta['years'][str(year)]['rect']
+        return _palette_surface(self.pixels[y:y + h, x:x + w], self.palette)
+
+    def thumbnail(self, year):
+        x, y, w, h = self.meta['years'][str(year)]['thumb']
+        return _palette_surface(self.thumbs[y:y + h, x:x + w], self.palette)
+
+    def thumbnail_sheet(self):
+        """All thumbnails in one 8-bit surface, laid out as `thumb_rect` says."""
+        if self._sheet is None:
+            self._sheet = _palette_surface(self.thumbs, self.palette)
+        return self._sheet
+
+    def year_at(self, pos):
+        """Year whose thumbnail covers `pos` in the thumbnail sheet, or None."""
+        for year, entry in self.meta['years'].items():
+            if pygame.Rect(entry['thumb']).collidepoint(pos):
+                return year
+        return None
+
+
+class AtlasRenderer:
+    """Chart renderer that scales charts out of an atlas and draws natively otherwise.
+
+    The atlas is loaded on a background thread; until it is ready, and for
+    years whose data changed since the atlas was built, charts come from
+    the fallback `ChartRenderer`. `on_loaded()` is called from the loading
+    thread once the atlas is in (e.g. to drop charts cached before that).
+    """
+
+    def __init__(self, base, fallback=None, on_loaded=None, _shared=None):
+        self.base = base
+        self.fallback = fallback or ChartRenderer()
+        self.font_path = self.fallback.font_path
+        if _shared is None:
+            _shared = {'atlas': None, 'thread': None}
+            _shared['thread'] = threading.Thread(target=self._load, args=(_shared, on_loaded),
+                                                 name='hkvis-chartatlas', daemon=True)
+            _shared['thread'].start()
+        self._shared = _shared
+
+    def _load(self, shared, on_loaded):
+        shared['atlas'] = ChartAtlas.load(self.base)
+        if shared['atlas'] is not None and on_loaded is not None:
+            on_loaded()
+
+    @property
+    def atlas(self):
+        return self._shared['atlas']
+
+    def fork(self):
+        """A renderer for another thread: own fonts, same atlas."""
+        return AtlasRenderer(self.base, self.fallback.fork(), _shared=self._shared)
+
+    def render(self, year, vals, size):
+        atlas = self.atlas
+        if atlas is None or not atlas.matches(year, vals):
+            return self.fallback.render(year, vals, size)
+        src = atlas.surface(year)
+        full = pygame.Surface(src.get_size(), 0, 32)
+        full.blit(src, (0, 0))
+        if full.get_size() == tuple(size):
+            return full
+        return pygame.transform.smoothscale(full, tuple(size))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Pack the yearly chart PNGs into one atlas.')
+    parser.add_argument('chart_dir', nargs='?', default='rainfall_charts')
+    parser.add_argument('--out', default=None, help='atlas base path (default: <chart_dir>/charts.atlas)')
+    parser.add_argument('--thumb-width', type=int, default=THUMB_WIDTH)
+    parser.add_argument('--columns', type=int, default=THUMB_COLUMNS, help='thumbnails per row')
+    parser.add_argument('--raw', action='store_true', help='also write the memory-mappable raw pixels')
+    parser.add_argument('--xml', default=None,
+                        help='data the charts were drawn from, for years not in the chart manifest')
+    args = parser.parse_args(argv)
+
+    store = None
+    if args.xml:
+        try:
+            from hkvis_core.datacache import load_store
+        except ImportError:
+            from datacache import load_store
+        store = load_store(args.xml)
+    meta = build_atlas(args.chart_dir, args.out, args.thumb_width, args.columns, args.raw, store)
+    base = args.out or default_base(args.chart_dir)
+    w, h = meta['size']
+    print(f"{len(meta['years'])} charts packed into {base}.png ({w}x{h}, "
+          f"{os.path.getsize(base + '.png') / 1e6:.1f} MB)")
+    unhashed = [y for y, e in meta['years'].items() if e['hash'] is None]
+    if unhashed:
+        print(f"{len(unhashed)} charts have no data hash and will not be used (pass --xml)")
+    if meta['raw']:
+        print(f"raw pixels: {base}.pixels.npy ({os.path.getsize(base + '.pixels.npy') / 1e6:.1f} MB)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,209 @@
+"""Batch export of the yearly rainfall charts.
+
+Charts are drawn with matplotlib's object-oriented API on the Agg canvas
+(no pyplot state machine), so they can be rendered in worker processes.
+The data is parsed once by the caller and only each year's 12 values are
+sent to the workers.
+
+`sync_charts` keeps a manifest (year -> hash of the 12 values plus the
+render settings) next to the charts, re-renders only stale or missing
+years and deletes charts for years that are no longer in the data.
+
+Usage:
+    from hkvis_core.chartexport import export_charts, sync_charts
+    results = export_charts(store, 'rainfall_charts', workers=4)
+    summary = sync_charts(store, 'rainfall_charts')
+"""
+import hashlib
+import json
+import math
+import os
+import re
+import tempfile
+import time
+
+import numpy as np
+
+try:
+    from hkvis_core.rainfallstore import MONTHS
+except ImportError:
+    from rainfallstore import MONTHS
+
+COLOR_ORANGE = '#ea801c'
+COLOR_BLUE = '#1a80bb'
+COLOR_GRAY = '#b8b8b8'
+FIGSIZE = (10, 5)
+# bump when the chart drawing code changes so every chart is re-rendered
+CHART_STYLE_VERSION = 1
+MANIFEST_NAME = 'manifest.json'
+CHART_FILE_RE = re.compile(r'^rainfall_(\d{4})\.png$')
+
+
+def nice_ticks(top, target=5):
+    """Tick values from 0 up to `top` with a 1/2/2.5/5 x 10^k step."""
+    if top <= 0:
+        return [0.0, 1.0]
+    raw = top / target
+    mag = 10 ** math.floor(math.log10(raw))
+    step = next(m * mag for m in (1, 2, 2.5, 5, 10) if m * mag >= raw)
+    return [i * step for i in range(int(top / step + 1e-9) + 1)]
+
+
+def tick_label(v, step):
+    return f'{v:.0f}' if float(step).is_integer() else f'{v:.1f}'
+
+
+def draw_rainfall_chart(ax, year, vals):
+    """Draw the monthly bar chart for one year onto `ax`."""
+    import matplotlib.patches as mpatches
+    vals = list(vals)
+    max_idx = vals.index(max(vals))
+    min_idx = vals.index(min(vals))
+    colors = [COLOR_GRAY] * 12
+    colors[max_idx] = COLOR_ORANGE
+    colors[min_idx] = COLOR_BLUE
+    ax.bar(MONTHS, vals, color=colors)
+    ax.set_title(f"Monthly Rainfall in Hong Kong ({year})")
+    ax.set_xlabel("Month")
+    ax.set_ylabel("Rainfall (mm)")
+    orange_patch = mpatches.Patch(color=COLOR_ORANGE, label='Highest Month')
+    blue_patch = mpatches.Patch(color=COLOR_BLUE, label='Lowest Month')
+    ax.legend(handles=[orange_patch, blue_patch], loc='upper right', frameon=False)
+
+
+def render_chart_png(year, vals, out_path):
+    """Render one chart to `out_path`; returns (year, out_path, seconds)."""
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    start = time.perf_counter()
+    fig = Figure(figsize=FIGSIZE)
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot()
+    draw_rainfall_chart(ax, year, vals)
+    fig.tight_layout()
+    fig.savefig(out_path)
+    return year, out_path, time.perf_counter() - start
+
+
+def chart_path(out_dir, year):
+    return os.path.join(out_dir, f'rainfall_{year}.png')
+
+
+def export_charts(store, out_dir, years=None, workers=None, on_done=None):
+    """Render charts for `years` (default: all years in `store`) into `out_dir`.
+
+    `workers=1` renders in this process; otherwise years are fanned out over
+    a process pool (`workers=None` lets the pool pick the CPU count).
+    `on_done(year, path, seconds)` is called as each chart completes.
+    Returns the list of (year, path, seconds) in year order.
+    """
+    if years is None:
+        years = store.years
+    os.makedirs(out_dir, exist_ok=True)
+    if not years:
+        return []
+    jobs = [(year, store.values_list(year), chart_path(out_dir, year)) for year in years]
+    results = []
+    if workers == 1 or len(jobs) <= 1:
+        for job in jobs:
+            res = render_chart_png(*job)
+            if on_done:
+                on_done(*res)
+            results.append(res)
+        return results
+    # imported here: multiprocessing would add ~5 ms to every importer of the chart helpers
+    from concurrent.futures import ProcessPoolExecutor
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(render_chart_png, *job) for job in jobs]
+        for fut in futures:
+            res = fut.result()
+            if on_done:
+                on_done(*res)
+            results.append(res)
+    return results
+
+
+def render_settings():
+    """Everything besides the data that affects the rendered PNGs."""
+    import matplotlib
+    return {
+        'style': CHART_STYLE_VERSION,
+        'figsize': list(FIGSIZE),
+        'colors': [COLOR_ORANGE, COLOR_BLUE, COLOR_GRAY],
+        'matplotlib': matplotlib.__version__,
+        'dpi': str(matplotlib.rcParams['savefig.dpi']),
+    }
+
+
+def year_hash(year, vals):
+    h = hashlib.sha1(str(year).encode('utf-8'))
+    h.update(np.asarray(vals, dtype=np.float32).tobytes())
+    return h.hexdigest()
+
+
+def read_manifest(out_dir):
+    try:
+        with open(os.path.join(out_dir, MANIFEST_NAME), 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        if isinstance(manifest.get('charts'), dict):
+            return manifest
+    except Exception:
+        pass
+    return {'settings': None, 'charts': {}}
+
+
+def write_manifest(out_dir, manifest):
+    fd, tmp = tempfile.mkstemp(prefix='.manifest_', dir=out_dir)
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=1, sort_keys=True)
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, os.path.join(out_dir, MANIFEST_NAME))
+    except Exception:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+
+
+def sync_charts(store, out_dir, workers=None, force=False, on_done=None):
+    """Bring `out_dir` up to date with `store`, touching only what changed.
+
+    Returns a dict with the 'rendered', 'skipped' and 'removed' years.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    manifest = read_manifest(out_dir)
+    settings = render_settings()
+    if force or manifest.get('settings') != settings:
+        manifest = {'settings': settings, 'charts': {}}
+    charts = manifest['charts']
+
+    hashes = {year: year_hash(year, store.values[store.row(year)]) for year in store.years}
+    stale = [year for year in store.years
+             if charts.get(year) != hashes[year] or not os.path.exists(chart_path(out_dir, year))]
+    stale_set = set(stale)
+    skipped = [year for year in store.years if year not in stale_set]
+
+    # delete charts for years that are no longer in the data
+    removed = []
+    for name in sorted(os.listdir(out_dir)):
+        m = CHART_FILE_RE.match(name)
+        if m and m.group(1) not in hashes:
+            os.remove(os.path.join(out_dir, name))
+            removed.append(m.group(1))
+    for year in list(charts):
+        if year not in hashes:
+            del charts[year]
+
+    def done(year, path, seconds):
+        charts[year] = hashes[year]
+        if on_done:
+            on_done(year, path, seconds)
+
+    try:
+        export_charts(store, out_dir, years=stale, workers=workers, on_done=done)
+    finally:
+        # record whatever finished, even if a later chart failed
+        write_manifest(out_dir, manifest)
+    return {'rendered': stale, 'skipped': skipped, 'removed': removed}
@@ -0,0 +1,165 @@
+"""Render the charts of the years the slider is heading for, ahead of time.
+
+`ChartPrefetcher` watches the year slider (fed once per frame through
+`update()`), estimates its velocity in years per second and renders the
+charts of the next few years in the drag direction into a `ChartCache` on
+a background thread, with its own `ChartRenderer`. The faster the drag,
+the further ahead it looks. When the slider reaches a year its chart is
+usually already in the cache.
+
+Hit/miss counters: `hits` counts charts the panel found ready, `misses`
+those the UI thread had to render itself; `rendered` counts background
+renders and `wasted` the ones evicted before they were shown.
+
+Usage:
+    prefetch = ChartPrefetcher(chart_cache).start()
+    # each frame while the chart panel is visible:
+    prefetch.update(year_slider.year, panel_size)
+    surf = prefetch.get(year_slider.year, panel_size)
+    ...
+    prefetch.stop()
+"""
+import threading
+import time
+
+# charts rendered ahead when the slider is still, and at most when it moves fast
+AHEAD = 3
+MAX_AHEAD = 12
+# how far ahead (seconds of slider motion) to look
+LEAD_TIME = 0.4
+BEHIND = 1
+# velocity smoothing per slider move, and how long without a move until it decays
+SMOOTHING = 0.5
+IDLE_DECAY = 0.3
+# the worker also wakes this often to notice a cleared or evicted cache
+RECHECK_INTERVAL = 0.25
+
+
+class ChartPrefetcher:
+    def __init__(self, cache, renderer=None, ahead=AHEAD, max_ahead=MAX_AHEAD, behind=BEHIND,
+                 lead_time=LEAD_TIME):
+        self.cache = cache
+        # fonts belong to one thread: never share the UI thread's renderer
+        self.renderer = renderer
+        self.ahead = ahead
+        self.max_ahead = max_ahead
+        self.behind = behind
+        self.lead_time = lead_time
+        self.hits = 0
+        self.misses = 0
+        self.rendered = 0
+        self.velocity = 0.0
+        self.direction = 0
+        self._index = None
+        self._moved_at = None
+        self._targets = ()
+        self._size = None
+        self._prefetched = set()
+        self._shown = None
+        self._cond = threading.Condition()
+        self._stopping = False
+        self._thread = None
+
+    @property
+    def wasted(self):
+        """Background renders that left the cache without being shown."""
+        with self._cond:
+            return sum(1 for key in self._prefetched if key not in self.cache)
+
+    def start(self):
+        if self._thread is None:
+            self._stopping = False
+            self._thread = threading.Thread(target=self._run, name='hkvis-chartprefetch', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout=1.0):
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def get(self, year, size):
+        """The chart from the cache or rendered now; each newly shown chart counts as a hit or a miss."""
+        key = (str(year), tuple(size))
+        if key != self._shown:
+            self._shown = key
+            if key in self.cache:
+                self.hits += 1
+            else:
+                self.misses += 1
+            with self._cond:
+                self._prefetched.discard(key)
+        return self.cache.get(year, size)
+
+    def update(self, year, size, now=None):
+        """Feed the slider position; re-plans the background work when it changes."""
+        now = time.perf_counter() if now is None else now
+        store = self.cache.store
+        if store is None or str(year) not in store:
+            return
+        years = store.years
+        index = store.index[str(year)]
+        if self._index is not None and index != self._index:
+            dt = max(now - self._moved_at, 1e-3)
+            v = (index - self._index) / dt
+            self.velocity = self.velocity * (1.0 - SMOOTHING) + v * SMOOTHING
+            self.direction = 1 if index > self._index else -1
+            self._moved_at = now
+        elif self._moved_at is None or now - self._moved_at > IDLE_DECAY:
+            # slider at rest: keep the direction, forget the speed
+            self.velocity = 0.0
+            self._moved_at = now if self._moved_at is None else self._moved_at
+        self._index = index
+
+        n = min(self.max_ahead, self.ahead + int(abs(self.velocity) * self.lead_time))
+        if self.direction:
+            order = [index + self.direction * k for k in range(1, n + 1)]
+            order += [index - self.direction * k for k in range(1, self.behind + 1)]
+        else:
+            order = [index + s * k for k in range(1, n + 1) for s in (-1, 1)]
+        targets = tuple(years[i] for i in order if 0 <= i < len(years))
+        size = tuple(size)
+        with self._cond:
+            if targets != self._targets or size != self._size:
+                self._targets = targets
+                self._size = size
+                self._cond.notify_all()
+
+    def describe(self):
+        total = self.hits + self.misses
+        rate = self.hits / total * 100 if total else 0.0
+        return (f'chart prefetch: {self.hits} hits / {self.misses} misses ({rate:.0f}%), '
+                f'{self.rendered} rendered ahead, {self.wasted} wasted, v={self.velocity:+.1f} years/s')
+
+    def _next_job(self):
+        # caller holds the lock; first target not in the cache yet
+        for year in self._targets:
+            key = (year, self._size)
+            if key not in self.cache:
+                return key
+        return None
+
+    def _run(self):
+        renderer = self.renderer or self.cache.renderer.fork()
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._stopping or self._next_job() is not None, RECHECK_INTERVAL)
+                if self._stopping:
+                    return
+                key = self._next_job()
+                if key is None:
+                    continue
+                store, generation = self.cache.store, self.cache.generation
+            vals = store.values_list(key[0])
+            if vals is None:
+                with self._cond:
+                    self._targets = tuple(y for y in self._targets if y != key[0])
+                continue
+            surf = renderer.render(key[0], vals, key[1])
+            if self.cache.put(key, surf, generation):
+                with self._cond:
+                    self.rendered += 1
+                    self._prefetched.add(key)
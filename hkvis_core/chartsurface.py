@@ -0,0 +1,201 @@
+"""Native pygame rendering of the yearly rainfall bar chart.
+
+`ChartRenderer` draws the same chart as `chartexport.draw_rainfall_chart`
+(gray bars, the wettest month orange, the driest blue, title, axis labels
+and legend) straight from a year's 12 values onto a pygame surface: no
+matplotlib, no PNG on disk, no external viewer.
+
+`ChartCache` keeps rendered surfaces in a bounded LRU keyed by
+(year, size), so toggling the chart panel or moving the year slider back
+over visited years is a dictionary lookup. The cache is thread-safe, so a
+background thread (see chartprefetch) can fill it with its own renderer.
+
+Usage:
+    cache = ChartCache(store)
+    surf = cache.get('1997', (640, 320))     # None if the year is unknown
+    screen.blit(surf, rect)
+    cache.set_store(new_store)               # data reloaded: drops everything
+"""
+import threading
+from collections import OrderedDict
+
+import pygame
+
+try:
+    from hkvis_core.rainfallstore import MONTHS
+    from hkvis_core.chartexport import COLOR_ORANGE, COLOR_BLUE, COLOR_GRAY, nice_ticks, tick_label
+except ImportError:
+    from rainfallstore import MONTHS
+    from chartexport import COLOR_ORANGE, COLOR_BLUE, COLOR_GRAY, nice_ticks, tick_label
+
+BACKGROUND = (255, 255, 255)
+FOREGROUND = (0, 0, 0)
+# rendered charts kept; one panel size x a few dozen years
+DEFAULT_CAPACITY = 48
+
+
+def hex_rgb(color):
+    color = color.lstrip('#')
+    return tuple(int(color[i:i + 2], 16) for i in (0, 2, 4))
+
+
+class ChartRenderer:
+    """Draws chart surfaces; holds the fonts for each chart size.
+
+    pygame fonts must not be shared between threads, so a thread that
+    renders charts should have its own renderer.
+    """
+
+    def __init__(self, font_path=None):
+        self.font_path = font_path
+        self._fonts = {}
+        self.colors = (hex_rgb(COLOR_GRAY), hex_rgb(COLOR_ORANGE), hex_rgb(COLOR_BLUE))
+
+    def font(self, px):
+        px = max(8, int(px))
+        f = self._fonts.get(px)
+        if f is None:
+            try:
+                f = pygame.font.Font(self.font_path, px)
+            except Exception:
+                f = pygame.font.Font(None, px)
+            self._fonts[px] = f
+        return f
+
+    def fork(self):
+        """A renderer with the same settings and its own fonts, for another thread."""
+        return ChartRenderer(self.font_path)
+
+    def render(self, year, vals, size):
+        """A (w, h) surface with the bar chart of `vals` (12 monthly values)."""
+        w, h = size
+        vals = [float(v) for v in vals]
+        gray, orange, blue = self.colors
+        surf = pygame.Surface((w, h))
+        surf.fill(BACKGROUND)
+        title_font = self.font(h * 0.065)
+        label_font = self.font(h * 0.05)
+        tick_font = self.font(h * 0.045)
+
+        # vertical range with matplotlib's 5% headroom
+        top = max(vals) * 1.05 if max(vals) > 0 else 1.0
+        ticks = nice_ticks(top)
+        top = max(top, ticks[-1])
+        step = ticks[1] - ticks[0]
+        tick_surfs = [tick_font.render(tick_label(v, step), True, FOREGROUND) for v in ticks]
+
+        pad = max(4, int(h * 0.02))
+        tick_len = max(3, int(h * 0.012))
+        title = title_font.render(f"Monthly Rainfall in Hong Kong ({year})", True, FOREGROUND)
+        ylabel = pygame.transform.rotate(label_font.render("Rainfall (mm)", True, FOREGROUND), 90)
+        xlabel = label_font.render("Month", True, FOREGROUND)
+        month_surfs = [tick_font.render(m, True, FOREGROUND) for m in MONTHS]
+
+        left = pad + ylabel.get_width() + pad + max(s.get_width() for s in tick_surfs) + tick_len + 2
+        right = w - pad * 2
+        top_y = pad + title.get_height() + pad
+        bottom = h - pad - xlabel.get_height() - pad - month_surfs[0].get_height() - tick_len
+        plot = pygame.Rect(left, top_y, max(1, right - left), max(1, bottom - top_y))
+
+        surf.blit(title, ((plot.left + plot.right - title.get_width()) // 2, pad))
+        surf.blit(ylabel, (pad, plot.centery - ylabel.get_height() // 2))
+        surf.blit(xlabel, (plot.centerx - xlabel.get_width() // 2, h - pad - xlabel.get_height()))
+
+        def y_of(v):
+            return plot.bottom - int(round(v / top * plot.height))
+
+        # bars; first occurrence wins ties, like draw_rainfall_chart
+        colors = [gray] * 12
+        colors[vals.index(max(vals))] = orange
+        colors[vals.index(min(vals))] = blue
+        slot = plot.width / 12.0
+        for i, v in enumerate(vals):
+            x0 = plot.left + int(round(slot * (i + 0.1)))
+            x1 = plot.left + int(round(slot * (i + 0.9)))
+            y = y_of(v)
+            if v > 0:
+                surf.fill(colors[i], (x0, y, max(1, x1 - x0), plot.bottom - y))
+            label = month_surfs[i]
+            cx = plot.left + int(round(slot * (i + 0.5)))
+            pygame.draw.line(surf, FOREGROUND, (cx, plot.bottom), (cx, plot.bottom + tick_len))
+            surf.blit(label, (cx - label.get_width() // 2, plot.bottom + tick_len + 1))
+
+        for v, s in zip(ticks, tick_surfs):
+            y = y_of(v)
+            pygame.draw.line(surf, FOREGROUND, (plot.left - tick_len, y), (plot.left, y))
+            surf.blit(s, (plot.left - tick_len - 2 - s.get_width(), y - s.get_height() // 2))
+        pygame.draw.rect(surf, FOREGROUND, plot.inflate(2, 2), 1)
+
+        # legend, upper right inside the axes, no frame
+        box = max(6, int(label_font.get_height() * 0.7))
+        y = plot.top + pad
+        for color, text in ((orange, 'Highest Month'), (blue, 'Lowest Month')):
+            s = label_font.render(text, True, FOREGROUND)
+            x = plot.right - pad - s.get_width() - pad - box
+            surf.fill(color, (x, y + (s.get_height() - box) // 2, box, box))
+            surf.blit(s, (x + box + pad, y))
+            y += s.get_height() + 2
+        return surf
+
+
+class ChartCache:
+    """LRU of rendered chart surfaces for the years of a `RainfallStore`."""
+
+    def __init__(self, store, renderer=None, capacity=DEFAULT_CAPACITY):
+        self.store = store
+        self.renderer = renderer or ChartRenderer()
+        self.capacity = capacity
+        self.hits = 0
+        self.misses = 0
+        # bumped whenever the entries are dropped, so late background renders are discarded
+        self.generation = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def set_store(self, store):
+        with self._lock:
+            self.store = store
+            self._clear()
+
+    def clear(self):
+        with self._lock:
+            self._clear()
+
+    def _clear(self):
+        self._entries.clear()
+        self.generation += 1
+
+    def get(self, year, size):
+        """The chart for `year` at `size`, rendered on a miss; None if the year is unknown."""
+        key = (str(year), tuple(size))
+        with self._lock:
+            surf = self._entries.get(key)
+            if surf is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return surf
+            self.misses += 1
+            store, generation = self.store, self.generation
+        vals = store.values_list(key[0]) if store is not None else None
+        if vals is None:
+            return None
+        surf = self.renderer.render(key[0], vals, key[1])
+        self.put(key, surf, generation)
+        return surf
+
+    def put(self, key, surf, generation=None):
+        """Add a rendered chart; ignored if the cache was cleared since `generation`."""
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return False
+            self._entries[key] = surf
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.capacity:
+                self._entries.popitem(last=False)
+            return True
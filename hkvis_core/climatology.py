@@ -0,0 +1,244 @@
+"""Long-term statistics over the whole rainfall record.
+
+`Climatology` works on a `RainfallStore`'s (years x 12) matrix with numpy
+only, no per-year Python loops:
+
+- `range_mean(first, last)`: mean of each month over any span of years, in
+  O(1) from cumulative sums (missing cells are left out, not counted as 0)
+- `climatology`: the monthly means over the baseline period (default
+  1991-2020, the current WMO normal)
+- `anomalies` / `anomaly_pct`: each month against the climatology, and each
+  year's total against the climatology of the months it has (so a partial
+  current year gets a year-to-date anomaly)
+- `rolling_mean(window)`: trailing 10/30/...-year means of the annual total
+- `percentile` / `month_percentile`: where a year (or month) falls in the
+  record, and `ranking()` / `rank()` for the wettest and driest years
+
+Only years with all 12 months count as complete; annual totals, rolling
+means, percentiles and rankings use those. Totals are rounded to the feed's
+0.1 mm, so float32 noise neither shows up (2404.3, not 2404.3000106811523)
+nor splits tied years.
+
+Results are computed on first use and kept on the object. `for_store()`
+keeps one `Climatology` per store, so statistics are recomputed only when
+the dataset is reloaded (a new store).
+
+Usage:
+    from hkvis_core.climatology import for_store
+    clim = for_store(store)
+    clim.climatology                     # (12,) mm, 1991-2020
+    clim.year_stats('1997')              # total, anomaly %, rank, percentile
+    clim.ranking(5)                      # five wettest complete years
+    colors = clim.anomaly_colors()       # {year: (r, g, b)}, wet orange / dry blue
+"""
+import threading
+import weakref
+
+import numpy as np
+
+try:
+    from hkvis_core.chartexport import COLOR_ORANGE, COLOR_BLUE
+except ImportError:
+    from chartexport import COLOR_ORANGE, COLOR_BLUE
+
+BASELINE = (1991, 2020)
+ROLLING_WINDOWS = (10, 30)
+# anomaly (percent of normal) at which anomaly_colors reaches full tint
+COLOR_RANGE = 50.0
+# same meaning as the charts: orange for the most rain, blue for the least
+WET_RGB = tuple(int(COLOR_ORANGE[i:i + 2], 16) for i in (1, 3, 5))
+DRY_RGB = tuple(int(COLOR_BLUE[i:i + 2], 16) for i in (1, 3, 5))
+NEUTRAL_RGB = (255, 255, 255)
+# decimals of the feed's values (0.1 mm)
+DECIMALS = 1
+
+
+class Climatology:
+    def __init__(self, store, baseline=BASELINE):
+        # no reference back to the store, so the per-store cache in for_store() can let it go
+        self.year_labels = list(store.years)
+        self._index = dict(store.index)
+        self.baseline = tuple(baseline)
+        self.years = np.array([int(y) for y in store.years], dtype=np.int64)
+        self.valid = ~np.asarray(store.missing, dtype=bool)
+        self.values = np.where(self.valid, np.asarray(store.values, dtype=np.float64), np.nan)
+        self.complete = self.valid.all(axis=1)
+        # prefix sums over rows: row range [i, j) is csum[j] - csum[i]
+        zeros = np.zeros((1, 12))
+        self._csum = np.concatenate([zeros, np.cumsum(np.where(self.valid, self.values, 0.0), axis=0)])
+        self._ccount = np.concatenate([zeros, np.cumsum(self.valid, axis=0, dtype=np.float64)])
+        self._cache = {}
+
+    def _cached(self, key, compute):
+        value = self._cache.get(key)
+        if value is None:
+            value = self._cache[key] = compute()
+        return value
+
+    # --- range means ---
+    def _rows(self, first, last):
+        """Row range [i, j) of the years first..last (inclusive, by calendar year)."""
+        return (int(np.searchsorted(self.years, int(first), 'left')),
+                int(np.searchsorted(self.years, int(last), 'right')))
+
+    def range_mean(self, first, last):
+        """(12,) mean of each month over the years first..last; NaN where a month has no data."""
+        i, j = self._rows(first, last)
+        counts = self._ccount[j] - self._ccount[i]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return (self._csum[j] - self._csum[i]) / counts
+
+    # --- baseline ---
+    @property
+    def climatology(self):
+        """(12,) monthly means over the baseline period."""
+        return self._cached('climatology', lambda: self.range_mean(*self.baseline))
+
+    @property
+    def normal_total(self):
+        """Annual total of the climatology (mm)."""
+        return float(np.nansum(self.climatology))
+
+    @property
+    def anomalies(self):
+        """(years x 12) departure of each month from its climatology (mm); NaN where missing."""
+        return self._cached('anomalies', lambda: self.values - self.climatology)
+
+    @property
+    def totals(self):
+        """(years,) annual totals; NaN for incomplete years."""
+        return self._cached('totals', lambda: np.where(self.complete, self._sums, np.nan))
+
+    @property
+    def _sums(self):
+        # every year's sum of its valid months, at the feed's resolution
+        return self._cached('sums', lambda: np.round(np.nansum(self.values, axis=1), DECIMALS))
+
+    @property
+    def anomaly_pct(self):
+        """(years,) total as percent above (+) or below (-) the climatology of the same months."""
+        def compute():
+            observed = np.where(self.valid, self.values, 0.0).sum(axis=1)
+            normal = np.where(self.valid, self.climatology, 0.0).sum(axis=1)
+            with np.errstate(invalid='ignore', divide='ignore'):
+                return np.where(normal > 0, (observed / normal - 1.0) * 100.0, np.nan)
+        return self._cached('anomaly_pct', compute)
+
+    # --- rolling means ---
+    def rolling_mean(self, window, min_years=None):
+        """(years,) mean annual total over the `window` calendar years ending at each year.
+
+        Incomplete years (and the 1940s gap in the record) are left out; a
+        window with fewer than `min_years` (default half the window) complete
+        years is NaN.
+        """
+        window = int(window)
+        min_years = window // 2 if min_years is None else min_years
+
+        def compute():
+            totals = np.where(self.complete, self.totals, 0.0)
+            csum = np.concatenate([[0.0], np.cumsum(totals)])
+            ccount = np.concatenate([[0.0], np.cumsum(self.complete, dtype=np.float64)])
+            lo = np.searchsorted(self.years, self.years - window + 1, 'left')
+            hi = np.arange(1, len(self.years) + 1)
+            counts = ccount[hi] - ccount[lo]
+            with np.errstate(invalid='ignore', divide='ignore'):
+                means = (csum[hi] - csum[lo]) / counts
+            return np.where(counts >= max(1, min_years), means, np.nan)
+        return self._cached(('rolling', window, min_years), compute)
+
+    # --- ranks ---
+    @staticmethod
+    def _percentiles(values, sample):
+        """Percent of `sample` below each value (ties count half); NaN stays NaN."""
+        sample = np.sort(sample[~np.isnan(sample)])
+        if not len(sample):
+            return np.full(values.shape, np.nan)
+        below = np.searchsorted(sample, values, 'left')
+        at_or_below = np.searchsorted(sample, values, 'right')
+        pct = (below + at_or_below) / 2.0 / len(sample) * 100.0
+        return np.where(np.isnan(values), np.nan, pct)
+
+    @property
+    def percentile(self):
+        """(years,) percentile of each complete year's total among all complete years."""
+        return self._cached('percentile', lambda: self._percentiles(self.totals, self.totals))
+
+    @property
+    def month_percentile(self):
+        """(years x 12) percentile of each month among the same month in other years."""
+        def compute():
+            out = np.empty(self.values.shape)
+            for m in range(12):
+                out[:, m] = self._percentiles(self.values[:, m], self.values[:, m])
+            return out
+        return self._cached('month_percentile', compute)
+
+    @property
+    def _order(self):
+        # complete-year rows, wettest first (stable, so ties keep year order)
+        def compute():
+            rows = np.flatnonzero(self.complete)
+            return rows[np.argsort(-self.totals[rows], kind='stable')]
+        return self._cached('order', compute)
+
+    def ranking(self, n=10, wettest=True):
+        """[(year, total)] of the `n` wettest (or driest) complete years."""
+        order = self._order if wettest else self._order[::-1]
+        return [(self.year_labels[i], float(self.totals[i])) for i in order[:n]]
+
+    def rank(self, year):
+        """Wettest-first rank (1 = wettest) of a complete year, or None."""
+        ranks = self._cached('ranks', self._ranks)
+        i = self._index.get(str(year))
+        if i is None or not self.complete[i]:
+            return None
+        return int(ranks[i])
+
+    def _ranks(self):
+        ranks = np.zeros(len(self.years), dtype=np.int64)
+        ranks[self._order] = np.arange(1, len(self._order) + 1)
+        return ranks
+
+    # --- per-year summary ---
+    def year_stats(self, year):
+        """Dict of one year's statistics, or None if the year is unknown."""
+        i = self._index.get(str(year))
+        if i is None:
+            return None
+        out = {
+            'year': self.year_labels[i],
+            'complete': bool(self.complete[i]),
+            'total': float(self._sums[i]),
+            'anomaly_pct': float(self.anomaly_pct[i]),
+            'percentile': float(self.percentile[i]),
+            'rank': self.rank(year),
+            'of': len(self._order),
+        }
+        for window in ROLLING_WINDOWS:
+            out[f'mean_{window}y'] = float(self.rolling_mean(window)[i])
+        return out
+
+    def anomaly_colors(self, color_range=COLOR_RANGE):
+        """{year: (r, g, b)}: white tinted orange for wet years, blue for dry ones (like the charts)."""
+        def compute():
+            t = np.clip(np.nan_to_num(self.anomaly_pct) / color_range, -1.0, 1.0)[:, None] * 0.75
+            neutral = np.array(NEUTRAL_RGB, dtype=np.float64)
+            tint = np.where(t > 0, np.array(WET_RGB, dtype=np.float64), np.array(DRY_RGB, dtype=np.float64))
+            rgb = np.rint(neutral + (tint - neutral) * np.abs(t)).astype(np.int64)
+            return {y: tuple(c) for y, c in zip(self.year_labels, rgb.tolist())}
+        return self._cached(('colors', color_range), compute)
+
+
+_instances = weakref.WeakKeyDictionary()
+_lock = threading.Lock()
+
+
+def for_store(store, baseline=BASELINE):
+    """The shared `Climatology` of `store` (made on first use, dropped with the store)."""
+    with _lock:
+        per_store = _instances.setdefault(store, {})
+        clim = per_store.get(tuple(baseline))
+        if clim is None:
+            clim = per_store[tuple(baseline)] = Climatology(store, baseline)
+        return clim
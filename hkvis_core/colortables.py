@@ -0,0 +1,75 @@
+"""Precomputed color tables for the ASCII rain animation.
+
+Row base colors and the per-cell seed-derived phase/sparsity never change
+over time, so they are built once per (rows, cols, palette) configuration.
+`ColorTables.frame_colors` then produces a frame's full RGB array from the
+norm grid and the animation time in one vectorised pass. It follows
+`animationtest.final_cell_color` as used by Main.py step for step, but is
+only within 1 level per channel of it: numpy's vectorised `** 3` can round
+the whitening factor 1 ulp away from Python's, which may tip the final
+truncation to int (about 0.1% of cells).
+"""
+import numpy as np
+
+from hkvis_core import animationtest
+
+# density tint target used by animationtest.apply_density_tint
+_BRIGHT = np.array([230.0, 255.0, 255.0])
+
+
+class ColorTables:
+    def __init__(self, rows=animationtest.ROWS, cols=animationtest.COLS, palette=animationtest.BLUE_PALETTE,
+                 top_whiten=animationtest.TOP_WHITEN_BIAS, bottom_boost=animationtest.BOTTOM_WHITEN_BOOST):
+        self.rows = rows
+        self.cols = cols
+        # (rows, 1, 3) so it broadcasts over columns
+        self.row_base = np.array([animationtest.row_base_color(r, rows, top_whiten=top_whiten, bottom_boost=bottom_boost,
+                                                               palette=palette)
+                                  for r in range(rows)], dtype=np.float64)[:, None, :]
+        self.bright_delta = _BRIGHT - self.row_base
+        self.col_offset = np.arange(cols, dtype=np.float64) * 0.12
+        phase = np.empty((rows, cols), dtype=np.float64)
+        sparsity = np.empty((rows, cols), dtype=np.float64)
+        for r in range(rows):
+            for c in range(cols):
+                seed = (r * 1315423911) ^ (c * 2654435761)
+                phase[r, c] = (seed % 1000) / 1000.0
+                sparsity[r, c] = ((seed >> 3) & 31) / 31.0
+        self.phase = phase * 6.28318
+        self.sparsity = sparsity * 0.8
+
+    def white_factor(self, global_time):
+        white_osc = (np.sin(global_time * 1.5 + self.phase) + 1) / 2
+        return ((white_osc ** 3) * 0.9) * self.sparsity
+
+    def frame_colors(self, norm, global_time, out=None):
+        """Return a (rows, cols, 3) uint8 color array for one frame."""
+        col_mod = (np.sin((global_time * 1.2) + self.col_offset) + 1) / 2
+        mod = (1.0 + (col_mod - 0.5) * 0.08)[None, :, None]
+        n = norm[..., None]
+        # apply_density_tint
+        rgb = np.trunc(self.row_base + self.bright_delta * (n * 0.95))
+        rgb[..., 1:] = np.minimum(255.0, np.trunc(rgb[..., 1:] + n * [35.0, 70.0]))
+        # time modulation, then per-cell whitening
+        rgb = np.trunc(np.clip(rgb * mod, 0.0, 255.0))
+        wf = self.white_factor(global_time)[..., None]
+        rgb = 255 * wf + rgb * (1 - wf)
+        if out is None:
+            out = np.empty(rgb.shape, dtype=np.uint8)
+        np.trunc(rgb, out=rgb)
+        out[...] = rgb
+        return out
+
+
+_tables = {}
+
+
+def get_tables(rows=animationtest.ROWS, cols=animationtest.COLS, palette=animationtest.BLUE_PALETTE,
+               top_whiten=animationtest.TOP_WHITEN_BIAS, bottom_boost=animationtest.BOTTOM_WHITEN_BOOST):
+    """Return shared tables for a configuration, building them on first use."""
+    key = (rows, cols, tuple(tuple(c) for c in palette), top_whiten, bottom_boost)
+    tables = _tables.get(key)
+    if tables is None:
+        tables = ColorTables(rows, cols, palette, top_whiten, bottom_boost)
+        _tables[key] = tables
+    return tables
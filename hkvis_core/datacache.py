@@ -0,0 +1,153 @@
+"""Binary cache of the parsed rainfall table.
+
+Parsing monthlyElement.xml (a JSON document) on every start-up and every
+chart is wasteful: the decoded matrix is tiny and rarely changes. This
+module writes the values/flags arrays of a `RainfallStore` to .npy sidecar
+files plus a small JSON key (source mtime, size and sha256). Later loads
+read the arrays (a few KB) and skip the JSON parse entirely.
+
+The key is taken before the parse and the entry is only written if the
+source was not touched while it was being parsed, so a file replaced
+mid-parse (e.g. by a refresh while the data watcher reloads) never gets
+the old values saved under its key. The arrays are read into memory rather
+than memory-mapped, so the next write can replace the files (Windows
+refuses to replace a mapped file).
+
+The cache is best-effort: any problem reading or writing it falls back to
+parsing the source file.
+
+Usage:
+    from hkvis_core.datacache import load_store
+    store = load_store(xml_path)
+"""
+import hashlib
+import json
+import os
+import tempfile
+
+import numpy as np
+
+try:
+    from hkvis_core.rainfallstore import RainfallStore
+except ImportError:
+    from rainfallstore import RainfallStore
+
+CACHE_VERSION = 1
+CACHE_DIR_NAME = '.hkvis_cache'
+
+
+def default_cache_dir(xml_path):
+    return os.path.join(os.path.dirname(os.path.abspath(xml_path)), CACHE_DIR_NAME)
+
+
+def file_sha256(path):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 16), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _cache_paths(xml_path, code, cache_dir):
+    base = os.path.join(cache_dir, f"{os.path.basename(xml_path)}.{code}")
+    return base + '.json', base + '.values.npy', base + '.flags.npy'
+
+
+def _write_atomic(path, write):
+    fd, tmp = tempfile.mkstemp(prefix='.tmp_', dir=os.path.dirname(path))
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            write(f)
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, path)
+    except Exception:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+
+
+def source_key(xml_path):
+    """(mtime_ns, size, sha256) of the source as the cache key records it."""
+    st = os.stat(xml_path)
+    return {'mtime_ns': st.st_mtime_ns, 'size': st.st_size, 'sha256': file_sha256(xml_path)}
+
+
+def read_cache(xml_path, code='RF', cache_dir=None):
+    """Return the cached store if the cache matches the source, else None."""
+    cache_dir = cache_dir or default_cache_dir(xml_path)
+    meta_path, values_path, flags_path = _cache_paths(xml_path, code, cache_dir)
+    try:
+        with open(meta_path, 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        st = os.stat(xml_path)
+        if meta.get('version') != CACHE_VERSION or meta.get('size') != st.st_size:
+            return None
+        if meta.get('mtime_ns') != st.st_mtime_ns:
+            # touched but maybe unchanged: confirm with the content hash
+            if meta.get('sha256') != file_sha256(xml_path):
+                return None
+            meta['mtime_ns'] = st.st_mtime_ns
+            try:
+                _write_atomic(meta_path, lambda f: f.write(json.dumps(meta).encode('utf-8')))
+            except Exception:
+                pass
+        values = np.load(values_path)
+        flags = np.load(flags_path)
+        if values.shape != (len(meta['years']), 12) or flags.shape != values.shape:
+            return None
+        return RainfallStore(meta['years'], values, flags)
+    except Exception:
+        return None
+
+
+def write_cache(xml_path, store, code='RF', cache_dir=None, key=None):
+    """Write `store` as the cache entry for `xml_path`. Returns True on success.
+
+    `key` is the `source_key()` of the file `store` was parsed from, taken
+    before the parse; without it the file is keyed as it is now.
+    """
+    cache_dir = cache_dir or default_cache_dir(xml_path)
+    meta_path, values_path, flags_path = _cache_paths(xml_path, code, cache_dir)
+    try:
+        key = key or source_key(xml_path)
+        meta = {
+            'version': CACHE_VERSION,
+            'code': code,
+            'mtime_ns': key['mtime_ns'],
+            'size': key['size'],
+            'sha256': key['sha256'],
+            'years': list(store.years),
+        }
+        os.makedirs(cache_dir, exist_ok=True)
+        _write_atomic(values_path, lambda f: np.save(f, np.ascontiguousarray(store.values, dtype=np.float32)))
+        _write_atomic(flags_path, lambda f: np.save(f, np.ascontiguousarray(store.flags, dtype=np.uint8)))
+        # the key goes last so a half-written entry is never picked up
+        _write_atomic(meta_path, lambda f: f.write(json.dumps(meta).encode('utf-8')))
+        return True
+    except Exception:
+        return False
+
+
+def load_store(xml_path, code='RF', cache_dir=None, use_cache=True):
+    """Load the rainfall store for `xml_path`, using the binary cache when valid."""
+    if not use_cache:
+        return RainfallStore.load(xml_path, code)
+    store = read_cache(xml_path, code, cache_dir)
+    if store is not None:
+        return store
+    try:
+        key = source_key(xml_path)
+    except OSError:
+        key = None
+    store = RainfallStore.load(xml_path, code)
+    try:
+        st = os.stat(xml_path)
+        unchanged = key is not None and (st.st_mtime_ns, st.st_size) == (key['mtime_ns'], key['size'])
+    except OSError:
+        unchanged = False
+    # replaced while parsing: `store` may hold either version, so don't cache it
+    if unchanged:
+        write_cache(xml_path, store, code, cache_dir, key)
+    return store
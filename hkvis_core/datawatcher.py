@@ -0,0 +1,107 @@
+"""Background reloading of the rainfall dataset.
+
+`DataWatcher` polls the data file's mtime/size on a daemon thread. When the
+file changes (or `request_reload()` is called) it loads a new store on that
+thread, freezes it (read-only arrays, lazy caches built) and parks it. The
+render loop calls `poll()` once per frame; it returns the new store exactly
+once, so the swap happens between frames and the UI thread never parses.
+
+Usage:
+    store = load_store(xml_path)
+    watcher = DataWatcher(xml_path, load_store).start()
+    # each frame:
+    new_store = watcher.poll()
+    if new_store is not None:
+        store = new_store
+"""
+import os
+import threading
+import time
+
+POLL_INTERVAL = 1.0
+# a changed file must keep the same stat for this long before it is read
+SETTLE_TIME = 0.2
+
+
+def file_signature(path):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+class DataWatcher:
+    def __init__(self, path, loader, interval=POLL_INTERVAL, settle=SETTLE_TIME):
+        self.path = path
+        self.loader = loader
+        self.interval = interval
+        self.settle = settle
+        self.reloads = 0
+        self.error = None
+        # the caller has just loaded the file as it is now; only later changes reload
+        self._signature = file_signature(path)
+        self._pending = None
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._force = False
+        self._stopping = False
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='hkvis-datawatcher', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout=1.0):
+        self._stopping = True
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def request_reload(self):
+        """Reload on the watcher thread even if the file looks unchanged."""
+        self._force = True
+        self._wake.set()
+
+    def poll(self):
+        """The newly loaded store, once; None when nothing new is ready."""
+        if self._pending is None:
+            return None
+        with self._lock:
+            store, self._pending = self._pending, None
+        return store
+
+    def _run(self):
+        while not self._stopping:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            if self._stopping:
+                return
+            force, self._force = self._force, False
+            sig = file_signature(self.path)
+            if sig is None or (sig == self._signature and not force):
+                continue
+            # wait for writers to finish (atomic renames settle at once)
+            time.sleep(self.settle)
+            if file_signature(self.path) != sig:
+                self._wake.set()
+                self._force = self._force or force
+                continue
+            try:
+                store = self.loader(self.path)
+                if hasattr(store, 'freeze'):
+                    store.freeze()
+            except Exception as e:
+                # keep serving the old store; try again when the file changes
+                self.error = e
+                self._signature = sig
+                print(f"Reloading {self.path} failed: {e}")
+                continue
+            self.error = None
+            self._signature = sig
+            with self._lock:
+                self._pending = store
+            self.reloads += 1
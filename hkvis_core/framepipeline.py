@@ -0,0 +1,167 @@
+"""Background producer of animation frames for the render loop.
+
+A worker thread generates the char-index and color grids of upcoming frames
+into a small ring of preallocated arrays; the main loop only picks up the
+latest finished frame and blits it, so event handling never waits on the
+pattern or color math.
+
+The ring is a triple buffer: at any time one slot may be held by the main
+loop (`in_use`), one holds the newest finished frame (`ready`) and the
+worker writes into a third. A frame the main loop never picked up is simply
+overwritten by a newer one.
+
+Usage:
+    pipe = FramePipeline(cols, rows, get_tables(rows, cols))
+    pipe.start()
+    # each frame:
+    pipe.submit(key, intensity, time_scale, t_next, pattern_hz)
+    frame = pipe.acquire()           # FrameSlot or None before the first frame
+    atlas.render(surface, frame.char_idx, frame.colors, origin)
+    ...
+    pipe.stop()
+"""
+import threading
+import time
+
+import numpy as np
+
+from hkvis_core.patternengine import get_engine
+
+DEFAULT_SLOTS = 3
+
+
+class FrameSlot:
+    """One preallocated frame in the ring."""
+
+    __slots__ = ('index', 'char_idx', 'colors', 'time', 'key', 'seq')
+
+    def __init__(self, index, rows, cols):
+        self.index = index
+        self.char_idx = np.zeros((rows, cols), dtype=np.uint8)
+        self.colors = np.zeros((rows, cols, 3), dtype=np.uint8)
+        self.time = None
+        self.key = None
+        self.seq = -1
+
+
+class FramePipeline:
+    def __init__(self, cols, rows, tables, slots=DEFAULT_SLOTS):
+        if slots < 3:
+            raise ValueError('FramePipeline needs at least 3 slots')
+        self.cols = cols
+        self.rows = rows
+        self.engine = get_engine(cols, rows)
+        self.tables = tables
+        self.slots = [FrameSlot(i, rows, cols) for i in range(slots)]
+        self.produced = 0
+        self.consumed = 0
+        self.dropped = 0
+        # ms the worker spent on its latest frame (the loop only blits it, so this
+        # cost is invisible in the loop's own frame time)
+        self.work_ms = 0.0
+        self.error = None
+        self._cond = threading.Condition()
+        self._request = None
+        self._request_seq = 0
+        self._done_seq = 0
+        self._ready = None
+        self._in_use = None
+        self._stopping = False
+        self._thread = None
+        # grid reused between pattern updates when the request asks for a pattern rate
+        self._last_grid = None
+        self._last_grid_key = None
+        self._last_grid_time = 0.0
+
+    @property
+    def shape(self):
+        return self.rows, self.cols
+
+    @property
+    def alive(self):
+        return self._thread is not None and self._thread.is_alive() and self.error is None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='hkvis-framepipeline', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout=1.0):
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def submit(self, key, intensity, time_scale, global_time, pattern_hz=None):
+        """Ask for the frame at `global_time`; replaces any request not yet started.
+
+        `key` identifies the data (e.g. the year); `pattern_hz` lets the worker
+        reuse the last grid for 1/pattern_hz seconds while recoloring it.
+        """
+        with self._cond:
+            self._request = (key, intensity, time_scale, global_time, pattern_hz)
+            self._request_seq += 1
+            self._cond.notify_all()
+
+    def acquire(self, timeout=0.0):
+        """Return the newest finished frame, or the current one if nothing newer is ready.
+
+        The returned slot stays untouched by the worker until the next call.
+        Waits up to `timeout` seconds when no frame has been produced yet.
+        """
+        with self._cond:
+            if self._ready is None and self._in_use is None and timeout:
+                self._cond.wait_for(lambda: self._ready is not None or self._stopping or self.error is not None,
+                                    timeout)
+            if self._ready is not None:
+                self._in_use = self._ready
+                self._ready = None
+                self.consumed += 1
+            if self._in_use is None:
+                return None
+            return self.slots[self._in_use]
+
+    def _run(self):
+        try:
+            while True:
+                with self._cond:
+                    self._cond.wait_for(lambda: self._stopping or self._request_seq != self._done_seq)
+                    if self._stopping:
+                        return
+                    request = self._request
+                    seq = self._request_seq
+                    busy = (self._ready, self._in_use)
+                    slot = next(s for s in self.slots if s.index not in busy)
+                start = time.perf_counter()
+                self._produce(slot, request)
+                work_ms = (time.perf_counter() - start) * 1000.0
+                with self._cond:
+                    self.work_ms = work_ms
+                    slot.seq = seq
+                    if self._ready is not None:
+                        self.dropped += 1
+                    self._ready = slot.index
+                    self._done_seq = seq
+                    self.produced += 1
+                    self._cond.notify_all()
+        except Exception as e:
+            with self._cond:
+                self.error = e
+                self._cond.notify_all()
+
+    def _produce(self, slot, request):
+        key, intensity, time_scale, global_time, pattern_hz = request
+        grid = self._last_grid
+        if (grid is None or not pattern_hz or key != self._last_grid_key
+                or not 0.0 <= global_time - self._last_grid_time < 1.0 / pattern_hz):
+            grid = self.engine.generate_from_terms(intensity, time_scale, global_time)
+            self._last_grid = grid
+            self._last_grid_key = key
+            self._last_grid_time = global_time
+        np.copyto(slot.char_idx, grid.char_idx)
+        self.tables.frame_colors(grid.norm, global_time, out=slot.colors)
+        slot.time = global_time
+        slot.key = key
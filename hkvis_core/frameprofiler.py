@@ -0,0 +1,252 @@
+"""Per-frame phase timing and an on-screen profiling HUD.
+
+The main loop calls `begin_frame()` at the top of each iteration, `mark(name)`
+after each phase (the time since the previous mark is charged to `name`)
+and `end_frame()` before `FPS_CLOCK.tick`. The time spent in tick waiting for
+the next frame is not part of the frame time, but it is part of the FPS.
+
+Each phase keeps a rolling window of samples, from which the HUD shows FPS,
+p50/p99 frame time and a per-phase breakdown: p50/p99, the share of the
+frame time and a histogram of the window (all phases on the same ms scale,
+up to the frame p99, so they can be compared at a glance). Per-frame timings can also be
+streamed to a CSV or JSONL trace for offline analysis.
+
+Off by default. Enable with:
+    HKVIS_PROFILE=1                      show the HUD at start-up (F3 toggles it)
+    HKVIS_PROFILE_TRACE=trace.csv        write per-frame timings (.csv or .jsonl)
+
+Usage:
+    profiler = from_env()
+    profiler.begin_frame(); ...; profiler.mark('events'); ...; profiler.end_frame()
+    profiler.draw(screen, font)
+"""
+import json
+import os
+import time
+from collections import deque
+
+# phases in HUD/trace column order; unknown names are appended as they appear
+PHASES = ('events', 'layout', 'update', 'pattern', 'colors', 'glyphs', 'scale', 'widgets', 'hud', 'flip')
+WINDOW = 300            # frames kept per rolling window
+HUD_REFRESH_S = 0.25    # how often the HUD text is re-rendered
+HUD_BG = (0, 0, 0, 170)
+HUD_FG = (235, 235, 235)
+HUD_BAR = (90, 170, 230)
+HUD_HIST = (230, 180, 90)
+HIST_BINS = 16
+HIST_BIN_W = 3
+
+
+def percentile(sorted_vals, q):
+    if not sorted_vals:
+        return 0.0
+    k = (len(sorted_vals) - 1) * q
+    lo = int(k)
+    hi = min(lo + 1, len(sorted_vals) - 1)
+    return sorted_vals[lo] + (sorted_vals[hi] - sorted_vals[lo]) * (k - lo)
+
+
+class FrameProfiler:
+    """Lap timer over the phases of one frame, with rolling statistics."""
+
+    def __init__(self, show=False, trace_path=None, window=WINDOW):
+        self.show = show
+        self.window = window
+        self.phases = list(PHASES)
+        self.samples = {name: deque(maxlen=window) for name in self.phases}
+        self.frame_samples = deque(maxlen=window)
+        self.frame_ends = deque(maxlen=window)
+        self.frame_index = 0
+        self._current = {}
+        self._t0 = None
+        self._last = None
+        self._trace = None
+        self._trace_csv = False
+        self._hud = None
+        self._hud_time = 0.0
+        if trace_path:
+            self.open_trace(trace_path)
+
+    @property
+    def active(self):
+        """True when timings are being collected (HUD shown or trace open)."""
+        return self.show or self._trace is not None
+
+    def toggle(self):
+        self.show = not self.show
+        self._hud = None
+
+    # --- timing ---
+    def begin_frame(self):
+        if not self.active:
+            return
+        self._current = {}
+        self._t0 = self._last = time.perf_counter()
+
+    def mark(self, name):
+        """Charge the time since the previous mark (or frame start) to `name`."""
+        if self._last is None:
+            return
+        now = time.perf_counter()
+        self._current[name] = self._current.get(name, 0.0) + (now - self._last)
+        self._last = now
+
+    def end_frame(self):
+        if self._t0 is None:
+            return
+        now = time.perf_counter()
+        total = now - self._t0
+        for name in self._current:
+            if name not in self.samples:
+                self.phases.append(name)
+                self.samples[name] = deque(maxlen=self.window)
+        # every phase gets a sample each frame so the windows stay aligned
+        for name in self.phases:
+            self.samples[name].append(self._current.get(name, 0.0))
+        self.frame_samples.append(total)
+        self.frame_ends.append(now)
+        if self._trace is not None:
+            self._write_trace(now, total)
+        self.frame_index += 1
+        self._t0 = self._last = None
+
+    # --- statistics ---
+    def fps(self):
+        if len(self.frame_ends) < 2:
+            return 0.0
+        span = self.frame_ends[-1] - self.frame_ends[0]
+        return (len(self.frame_ends) - 1) / span if span > 0 else 0.0
+
+    def stats(self):
+        """Rolling stats in ms: {'fps', 'frame': {...}, 'phases': {name: {...}}}."""
+        def summary(samples):
+            vals = sorted(samples)
+            n = len(vals)
+            return {
+                'mean': (sum(vals) / n * 1000) if n else 0.0,
+                'p50': percentile(vals, 0.50) * 1000,
+                'p99': percentile(vals, 0.99) * 1000,
+            }
+        return {
+            'fps': self.fps(),
+            'frames': len(self.frame_samples),
+            'frame': summary(self.frame_samples),
+            'phases': {name: summary(self.samples[name]) for name in self.phases},
+        }
+
+    def histogram(self, name, bins=10, max_ms=None):
+        """Counts of the rolling samples of `name` ('frame' for whole frames) in equal-width ms bins."""
+        samples = self.frame_samples if name == 'frame' else self.samples.get(name, ())
+        vals = [s * 1000 for s in samples]
+        if not vals:
+            return [0] * bins, 0.0
+        top = max_ms or max(vals) or 1.0
+        counts = [0] * bins
+        for v in vals:
+            counts[min(bins - 1, int(v / top * bins))] += 1
+        return counts, top
+
+    # --- trace output ---
+    def open_trace(self, path):
+        self.close_trace()
+        self._trace_csv = not path.lower().endswith(('.jsonl', '.json'))
+        self._trace = open(path, 'w', encoding='utf-8', buffering=1 << 16)
+        if self._trace_csv:
+            self._trace.write('frame,time,frame_ms,' + ','.join(f'{p}_ms' for p in self.phases) + '\n')
+
+    def _write_trace(self, now, total):
+        if self._trace_csv:
+            # the CSV header is fixed when the trace opens; extra phases go to JSONL only
+            cols = [f'{self._current.get(p, 0.0) * 1000:.4f}' for p in self.phases[:len(PHASES)]]
+            self._trace.write(f'{self.frame_index},{now:.6f},{total * 1000:.4f},' + ','.join(cols) + '\n')
+        else:
+            rec = {'frame': self.frame_index, 'time': round(now, 6), 'frame_ms': round(total * 1000, 4)}
+            rec.update({p: round(s * 1000, 4) for p, s in self._current.items()})
+            self._trace.write(json.dumps(rec) + '\n')
+
+    def close_trace(self):
+        if self._trace is not None:
+            try:
+                self._trace.close()
+            finally:
+                self._trace = None
+
+    close = close_trace
+
+    # --- HUD ---
+    def draw(self, surface, font, pos=(10, 10)):
+        """Blit the HUD onto `surface`; returns the painted rect (None when hidden).
+
+        The text is re-rendered at most every HUD_REFRESH_S seconds.
+        """
+        if not self.show:
+            return None
+        now = time.perf_counter()
+        if self._hud is None or now - self._hud_time >= HUD_REFRESH_S:
+            self._hud = self._render_hud(font)
+            self._hud_time = now
+        return surface.blit(self._hud, pos)
+
+    def hud_due(self):
+        """True when the next `draw` re-renders the HUD (callers that repaint only dirty areas)."""
+        return self.show and (self._hud is None or time.perf_counter() - self._hud_time >= HUD_REFRESH_S)
+
+    def _render_hud(self, font):
+        import pygame
+        st = self.stats()
+        frame = st['frame']
+        # one ms scale for every histogram; slower samples land in the last bin
+        hist_ms = frame['p99'] or 1.0
+        header = font.render(f"FPS {st['fps']:5.1f}   frame p50 {frame['p50']:6.2f} ms   p99 {frame['p99']:6.2f} ms"
+                             f"   hist 0-{hist_ms:.1f} ms", True, HUD_FG)
+        total_mean = frame['mean'] or 1.0
+        rows = [(font.render('frame', True, HUD_FG), None, None, self.histogram('frame', HIST_BINS, hist_ms)[0])]
+        for name in self.phases:
+            ph = st['phases'][name]
+            if ph['p99'] <= 0.0:
+                continue
+            rows.append((font.render(name, True, HUD_FG),
+                         font.render(f"p50 {ph['p50']:6.2f}   p99 {ph['p99']:6.2f} ms", True, HUD_FG),
+                         ph['mean'] / total_mean,
+                         self.histogram(name, HIST_BINS, hist_ms)[0]))
+        line_h = font.get_linesize()
+        bar_w = 80
+        hist_w = HIST_BINS * HIST_BIN_W
+        # the proportional UI font needs explicit columns to keep the numbers aligned
+        name_w = max(r[0].get_width() for r in rows) + 12
+        stats_w = max([r[1].get_width() for r in rows if r[1] is not None] + [0])
+        width = max(header.get_width(), name_w + stats_w + bar_w + hist_w + 24) + 16
+        height = line_h * (len(rows) + 1) + 12
+        hud = pygame.Surface((width, height), pygame.SRCALPHA)
+        hud.fill(HUD_BG)
+        hud.blit(header, (8, 6))
+        hist_x = width - hist_w - 8
+        bar_x = hist_x - bar_w - 12
+        for i, (name_surf, stats_surf, share, counts) in enumerate(rows):
+            y = 6 + (i + 1) * line_h
+            hud.blit(name_surf, (8, y))
+            if stats_surf is not None:
+                hud.blit(stats_surf, (8 + name_w, y))
+                # bar: share of the mean frame time spent in this phase
+                bw = max(1, int(bar_w * min(1.0, share)))
+                pygame.draw.rect(hud, HUD_BAR, (bar_x, y + line_h // 4, bw, line_h // 2))
+            # histogram of the rolling window, bar heights relative to the fullest bin
+            peak = max(counts) or 1
+            hist_h = line_h - 2
+            for b, n in enumerate(counts):
+                if n:
+                    bh = max(1, int(hist_h * n / peak))
+                    hud.fill(HUD_HIST, (hist_x + b * HIST_BIN_W, y + line_h - 1 - bh, HIST_BIN_W - 1, bh))
+        return hud
+
+
+def from_env(environ=None):
+    """Profiler configured from HKVIS_PROFILE / HKVIS_PROFILE_TRACE."""
+    environ = os.environ if environ is None else environ
+    show = environ.get('HKVIS_PROFILE', '').lower() in ('1', 'true', 'yes', 'on')
+    trace_path = environ.get('HKVIS_PROFILE_TRACE') or None
+    try:
+        return FrameProfiler(show=show, trace_path=trace_path)
+    except OSError as e:
+        print(f'Could not open profile trace {trace_path}: {e}')
+        return FrameProfiler(show=show)
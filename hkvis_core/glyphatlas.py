@@ -0,0 +1,108 @@
+"""Glyph atlas for the ASCII rain animation.
+
+Each character in ASCII_CHARS is rasterised once as a white alpha mask.
+Frames are then built from the cached masks instead of calling
+`font.render` for every cell:
+
+- `render` composites the whole grid in one pass through pygame.surfarray
+  (the animation background is black, so a cell is simply color * coverage).
+  The math is integer: a cell's color is packed into one uint64 with each
+  channel in its own 16-bit lane, a single multiply by the coverage (0..256)
+  tints all three channels, and the high byte of each lane is the result,
+  already in the surface's pixel layout;
+- `blit_cells` is the fallback that tints and blits each cached mask.
+"""
+import sys
+
+import pygame
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+class GlyphAtlas:
+    def __init__(self, font, chars, cell_size=None):
+        self.chars = chars
+        if cell_size is None:
+            cell_size = font.render('M', True, (255, 255, 255)).get_size()
+        self.cell_w, self.cell_h = cell_size
+        self.masks = []
+        for ch in chars:
+            mask = pygame.Surface((self.cell_w, self.cell_h), pygame.SRCALPHA)
+            mask.fill((255, 255, 255, 0))
+            glyph = font.render(ch, True, (255, 255, 255))
+            mask.blit(glyph, (0, 0))
+            self.masks.append(mask)
+        # (n_chars, cell_w, cell_h) coverage in 0..256 (255 -> 256, so full coverage keeps
+        # the color exactly), surfarray (x, y) order; uint64 to multiply packed colors
+        self.coverage = None
+        if np is not None:
+            try:
+                alpha = np.stack([pygame.surfarray.array_alpha(m) for m in self.masks]).astype(np.uint64)
+                self.coverage = alpha + (alpha >> 7)
+            except Exception:
+                self.coverage = None
+
+    @staticmethod
+    def _lanes(surface):
+        """16-bit lane of R, G, B in the packed product and whether it maps 1:1 onto pixels2d."""
+        shifts = surface.get_shifts()[:3]
+        masks = surface.get_masks()
+        packed = (surface.get_bytesize() == 4 and sys.byteorder == 'little' and not masks[3]
+                  and all(m == 0xFF << sh for m, sh in zip(masks[:3], shifts)))
+        return (tuple(sh // 8 for sh in shifts), True) if packed else ((0, 1, 2), False)
+
+    def render(self, surface, char_idx, colors, origin=(0, 0)):
+        """Composite a (rows, cols) grid onto `surface` at `origin`.
+
+        `char_idx` holds indices into `chars` and `colors` is a
+        (rows, cols, 3) uint8 array. The target area must already be black.
+        Falls back to `blit_cells` when surfarray is unavailable.
+        """
+        if self.coverage is None:
+            return self.blit_cells(surface, char_idx, colors, origin)
+        rows, cols = char_idx.shape
+        cw, chh = self.cell_w, self.cell_h
+        ox, oy = origin
+        w = min(cols * cw, surface.get_width() - ox)
+        h = min(rows * chh, surface.get_height() - oy)
+        if w <= 0 or h <= 0:
+            return
+        lanes, packed = self._lanes(surface)
+        c = colors.astype(np.uint64)
+        color64 = (c[..., 0] << (16 * lanes[0])) | (c[..., 1] << (16 * lanes[1])) | (c[..., 2] << (16 * lanes[2]))
+        # built straight in surfarray layout: (cols, cw, rows, chh) -> (x, y)
+        product = self.coverage[char_idx.T].transpose(0, 2, 1, 3) * color64.T[:, None, :, None]
+        # high byte of every 16-bit lane (the little-endian odd bytes)
+        high = product[..., None].view(np.uint8)[..., 1::2]
+        try:
+            if packed:
+                pixels = pygame.surfarray.pixels2d(surface)
+                pixels[ox:ox + w, oy:oy + h] = np.ascontiguousarray(high).view(np.uint32)[..., 0].reshape(
+                    cols * cw, rows * chh)[:w, :h]
+            else:
+                if sys.byteorder != 'little':
+                    high = product[..., None].view(np.uint8)[..., 6::-2]
+                pixels = pygame.surfarray.pixels3d(surface)
+                pixels[ox:ox + w, oy:oy + h] = high[..., :3].reshape(cols * cw, rows * chh, 3)[:w, :h]
+        except Exception:
+            return self.blit_cells(surface, char_idx, colors, origin)
+        del pixels  # release the surface lock
+
+    def blit_cells(self, surface, char_idx, colors, origin=(0, 0)):
+        """Tint and blit the cached mask for every cell."""
+        ox, oy = origin
+        cw, chh = self.cell_w, self.cell_h
+        masks = self.masks
+        if hasattr(char_idx, 'tolist'):
+            char_idx = char_idx.tolist()
+        if hasattr(colors, 'tolist'):
+            colors = colors.tolist()
+        for row_idx, (idx_row, color_row) in enumerate(zip(char_idx, colors)):
+            y = oy + row_idx * chh
+            for col_idx, (i, color) in enumerate(zip(idx_row, color_row)):
+                tinted = masks[i].copy()
+                tinted.fill((color[0], color[1], color[2]), special_flags=pygame.BLEND_RGB_MULT)
+                surface.blit(tinted, (ox + col_idx * cw, y))
@@ -0,0 +1,198 @@
+"""Headless offline renderer for the ASCII rain animation.
+
+Renders the same frames as the Main.py animation (array pattern engine,
+color tables and glyph atlas) with a fixed timestep under SDL's dummy video
+driver, and writes them out as:
+
+- png: a numbered PNG sequence in a directory
+- gif: an animated GIF (needs Pillow)
+- raw: packed RGB24 frames, to a file or stdout for piping into an encoder
+
+Each frame depends only on its time value and the year's data, so frames
+are rendered in parallel across worker processes.
+
+Usage:
+    python -m hkvis_core.offlinerender --year 1997 --frames 300 --fps 30 --format png --out frames_1997
+    python -m hkvis_core.offlinerender --year 1997 --format raw --out - | \\
+        ffmpeg -f rawvideo -pix_fmt rgb24 -s 816x340 -r 30 -i - rain_1997.mp4
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+
+import pygame
+
+from hkvis_core import animationtest
+from hkvis_core.colortables import get_tables
+from hkvis_core.glyphatlas import GlyphAtlas
+from hkvis_core.patternengine import PatternEngine
+
+DEFAULT_XML = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data', 'monthlyElement.xml')
+
+
+def load_font(size=animationtest.FONT_SIZE):
+    # same font choice as the animation in Main.py
+    monos = pygame.font.match_font('consolas, courier, monospace')
+    if monos:
+        return pygame.font.Font(monos, size)
+    return pygame.font.SysFont('couriernew', size)
+
+
+class FrameRenderer:
+    """Renders animation frames for one year's data onto an off-screen surface."""
+
+    def __init__(self, data, cols=animationtest.COLS, rows=animationtest.ROWS, size=None):
+        pygame.font.init()
+        self.data = data
+        font = load_font()
+        self.atlas = GlyphAtlas(font, animationtest.ASCII_CHARS)
+        self.engine = PatternEngine(cols, rows)
+        self.tables = get_tables(rows, cols)
+        self.intensity, self.time_scale = self.engine.column_terms(data)
+        pad = animationtest.PADDING
+        self.surface = pygame.Surface((self.atlas.cell_w * cols + pad * 2, self.atlas.cell_h * rows + pad * 2))
+        self.size = tuple(size) if size else self.surface.get_size()
+
+    def render(self, global_time):
+        """Return the frame at `global_time` as a surface of `self.size`."""
+        grid = self.engine.generate_from_terms(self.intensity, self.time_scale, global_time)
+        colors = self.tables.frame_colors(grid.norm, global_time)
+        self.surface.fill(animationtest.BG_COLOR)
+        pad = animationtest.PADDING
+        self.atlas.render(self.surface, grid.char_idx, colors, (pad, pad))
+        if self.size != self.surface.get_size():
+            return pygame.transform.smoothscale(self.surface, self.size)
+        return self.surface
+
+
+# --- worker process state ---
+_renderer = None
+
+
+def _init_worker(data, cols, rows, size):
+    global _renderer
+    _renderer = FrameRenderer(data, cols, rows, size)
+
+
+def _render_frame(job):
+    """Render one frame; saves PNGs in the worker, otherwise returns RGB bytes."""
+    index, global_time, png_path = job
+    surf = _renderer.render(global_time)
+    if png_path:
+        pygame.image.save(surf, png_path)
+        return index, None
+    return index, pygame.image.tobytes(surf, 'RGB')
+
+
+def render_frames(data, frames, fps, start_time=0.0, cols=animationtest.COLS, rows=animationtest.ROWS,
+                  size=None, png_dir=None, workers=None):
+    """Yield (index, rgb_bytes_or_None) in frame order.
+
+    With `png_dir` each frame is saved there as frame_00000.png and None is
+    yielded instead of the pixel data.
+    """
+    jobs = []
+    for i in range(frames):
+        path = os.path.join(png_dir, f'frame_{i:05d}.png') if png_dir else None
+        jobs.append((i, start_time + i / fps, path))
+    if workers == 1:
+        _init_worker(data, cols, rows, size)
+        for job in jobs:
+            yield _render_frame(job)
+        return
+    workers = workers or os.cpu_count() or 1
+    chunk = max(1, min(16, frames // (workers * 4) or 1))
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(data, cols, rows, size)) as pool:
+        for res in pool.map(_render_frame, jobs, chunksize=chunk):
+            yield res
+
+
+def year_data(year, xml_path=DEFAULT_XML):
+    """Monthly values for `year`, or the demo RAIN_DATA when unavailable."""
+    if year is not None:
+        try:
+            from hkvis_core.datacache import load_store
+            vals = load_store(xml_path).values_list(year)
+            if vals is not None:
+                return list(vals)
+        except Exception as e:
+            print(f'Could not load rainfall data: {e}', file=sys.stderr)
+        print(f'Year {year} not found; using demo data', file=sys.stderr)
+    return list(animationtest.RAIN_DATA)
+
+
+def parse_size(text):
+    w, h = text.lower().split('x')
+    return int(w), int(h)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Render the rainfall animation offline.')
+    parser.add_argument('--year', help='year to animate (default: demo data)')
+    parser.add_argument('--xml', default=DEFAULT_XML, help='path to monthlyElement.xml')
+    parser.add_argument('--frames', type=int, default=300)
+    parser.add_argument('--fps', type=float, default=30.0, help='timestep is 1/fps seconds')
+    parser.add_argument('--start', type=float, default=0.0, help='animation time of the first frame (s)')
+    parser.add_argument('--cols', type=int, default=animationtest.COLS)
+    parser.add_argument('--rows', type=int, default=animationtest.ROWS)
+    parser.add_argument('--size', type=parse_size, help='output size WxH (default: native grid size)')
+    parser.add_argument('--format', choices=('png', 'gif', 'raw'), default='png')
+    parser.add_argument('--out', required=True, help="output directory (png), file (gif/raw) or '-' for raw to stdout")
+    parser.add_argument('--workers', type=int, default=None, help='worker processes (default: CPU count, 1 = serial)')
+    args = parser.parse_args(argv)
+
+    data = year_data(args.year, args.xml)
+    png_dir = None
+    gif_frames = []
+    raw_out = None
+    if args.format == 'png':
+        png_dir = args.out
+        os.makedirs(png_dir, exist_ok=True)
+    elif args.format == 'gif':
+        try:
+            from PIL import Image
+        except ImportError:
+            print('GIF output needs Pillow (pip install pillow)', file=sys.stderr)
+            return 2
+    else:
+        raw_out = sys.stdout.buffer if args.out == '-' else open(args.out, 'wb')
+
+    # output size, for the encoder hint and GIF frames
+    pygame.font.init()
+    probe = FrameRenderer(data, args.cols, args.rows, args.size)
+    out_w, out_h = probe.size
+
+    start = time.perf_counter()
+    try:
+        for index, rgb in render_frames(data, args.frames, args.fps, args.start, args.cols, args.rows,
+                                        args.size, png_dir, args.workers):
+            if raw_out is not None:
+                raw_out.write(rgb)
+            elif args.format == 'gif':
+                gif_frames.append(Image.frombytes('RGB', (out_w, out_h), rgb))
+    finally:
+        if raw_out is not None and raw_out is not sys.stdout.buffer:
+            raw_out.close()
+    elapsed = time.perf_counter() - start
+
+    if gif_frames:
+        gif_frames[0].save(args.out, save_all=True, append_images=gif_frames[1:],
+                           duration=int(round(1000 / args.fps)), loop=0)
+
+    clip = args.frames / args.fps
+    print(f'{args.frames} frames ({out_w}x{out_h}) in {elapsed:.2f}s: '
+          f'{args.frames / max(elapsed, 1e-9):.1f} fps, {clip / max(elapsed, 1e-9):.1f}x real time', file=sys.stderr)
+    if args.format == 'raw':
+        print(f'encode with: ffmpeg -f rawvideo -pix_fmt rgb24 -s {out_w}x{out_h} -r {args.fps:g} -i <input> out.mp4',
+              file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,137 @@
+"""Vectorised NumPy engine for the ASCII rain animation.
+
+Computes the same field as `animationtest.generate_fluid_pattern`, but for
+the whole grid at once instead of one cell at a time. The result is a
+`PatternGrid` holding character indices and norm values as arrays.
+
+Usage:
+    from hkvis_core.patternengine import generate_fluid_pattern_np
+    grid = generate_fluid_pattern_np(data, t, cols=100, rows=36)
+    grid.char_idx   # (rows, cols) uint8 indices into ASCII_CHARS
+    grid.norm       # (rows, cols) float64 values in 0..1
+"""
+import numpy as np
+
+from hkvis_core import animationtest
+
+
+class PatternGrid:
+    """Array-backed animation grid (char indices plus norm values)."""
+
+    __slots__ = ('char_idx', 'norm', 'chars')
+
+    def __init__(self, char_idx, norm, chars=animationtest.ASCII_CHARS):
+        self.char_idx = char_idx
+        self.norm = norm
+        self.chars = chars
+
+    @property
+    def shape(self):
+        return self.norm.shape
+
+    def to_rows(self):
+        # same list-of-rows-of-(char, norm) layout the scalar path returns
+        chars = self.chars
+        return [[(chars[i], n) for i, n in zip(idx_row, norm_row)]
+                for idx_row, norm_row in zip(self.char_idx.tolist(), self.norm.tolist())]
+
+
+class PatternEngine:
+    """Holds the time-independent parts of the pattern for one grid size."""
+
+    def __init__(self, cols=animationtest.COLS, rows=animationtest.ROWS, chars=animationtest.ASCII_CHARS):
+        self.cols = cols
+        self.rows = rows
+        self.chars = chars
+        x = np.arange(cols, dtype=np.float64)
+        y = np.arange(rows, dtype=np.float64)
+        self.x, self.y = np.meshgrid(x, y)
+        x, y = self.x, self.y
+        # terms that only depend on the cell position
+        self.x018 = x * 0.18
+        self.x008 = x * 0.08
+        self.x025 = x * 0.25
+        self.x015 = x * 0.15
+        self.x05 = x * 0.5
+        self.diag_xy = (x * 0.08) + (y * 0.08)
+        self.noise2_xy = x * 0.7 + y * 0.3
+        self.rand_xy = x * 1.2 + y * 0.8
+        self.rand_cos = np.cos(x * 0.6 + y * 1.1)
+        self.char_xy = x * 0.3 + y * 0.5
+        # column -> month lookup, cached per data length
+        self._col_index = {}
+
+    def column_index(self, n):
+        idx = self._col_index.get(n)
+        if idx is None:
+            cols = self.cols
+            idx = np.array([min(int((c / cols) * n), n - 1) for c in range(cols)], dtype=np.intp)
+            self._col_index[n] = idx
+        return idx
+
+    def column_terms(self, data, speed_factor=animationtest.SPEED_FACTOR, base_scale=animationtest.BASE_TIME_SCALE):
+        """Return the per-column (intensity, time_scale) vectors for `data`."""
+        intensity, time_scale, _ = self.data_terms(data, speed_factor, base_scale)
+        return intensity, time_scale
+
+    def data_terms(self, data, speed_factor=animationtest.SPEED_FACTOR, base_scale=animationtest.BASE_TIME_SCALE):
+        """Return (intensity, time_scale, data_speed_multiplier) for `data`."""
+        if not data or len(data) == 0:
+            data = [0.0] * 12
+        data = [max(0.0, float(v) if v is not None else 0.0) for v in data]
+        max_val = max(max(data), 1.0)
+        mean_intensity = min(1.0, (sum(data) / len(data)) / animationtest.GLOBAL_MEAN_CAP)
+        data_speed_multiplier = 0.3 + (mean_intensity ** 0.7) * 2.0
+        effective_speed_factor = speed_factor * data_speed_multiplier * animationtest.SPEED_MULTIPLIER
+        vals = np.asarray(data, dtype=np.float64)
+        intensity = vals[self.column_index(len(data))] / max_val
+        time_scale = base_scale + intensity * effective_speed_factor
+        return intensity, time_scale, data_speed_multiplier
+
+    def generate_from_terms(self, intensity, time_scale, global_time):
+        """Build a `PatternGrid` from precomputed per-column terms."""
+        x = self.x
+        y = self.y
+        t = global_time * time_scale  # broadcasts over rows
+        flowX = x + (t * 0.2)
+        flowY = y - (t * 0.8)
+        wave1 = np.sin(self.x018 + (flowY * 0.12) + (t * 0.05)) * 0.5 + 0.5
+        wave2 = np.sin(self.x008 + (flowY * 0.22) + (t * 0.08)) * 0.4 + 0.6
+        wave3 = np.cos(self.x025 + (flowY * 0.08) - (t * 0.06)) * 0.5 + 0.5
+        wave4 = np.sin((flowX * 0.15) + (flowY * 0.35) + (t * 0.1)) * 0.3 + 0.7
+        horizontalFlow = np.sin(self.x015 + (t * 0.12)) * 0.3
+        diagonalFlow = np.cos(self.diag_xy + (t * 0.09)) * 0.25
+        combined = (wave1 + wave2 + wave3 + wave4) / 4.0 + horizontalFlow + diagonalFlow
+        modulated = combined * intensity
+        noise1 = np.sin(self.x05 + flowY * 0.4 + t * 0.15) * 0.2
+        noise2 = np.cos(self.noise2_xy + t * 0.12) * 0.15
+        randomness = np.sin(self.rand_xy + t * 0.18) * self.rand_cos * 0.25
+        final = modulated + noise1 + noise2 + randomness
+        charRandom = np.sin(self.char_xy + t * 0.1) * 0.1
+        adjustedFinal = final + charRandom
+        norm = (np.tanh(adjustedFinal) + 1.0) / 2.0
+        last = len(self.chars) - 1
+        char_idx = np.clip((norm * last).astype(np.intp), 0, last).astype(np.uint8)
+        return PatternGrid(char_idx, norm, self.chars)
+
+    def generate(self, data, global_time, speed_factor=animationtest.SPEED_FACTOR, base_scale=animationtest.BASE_TIME_SCALE):
+        intensity, time_scale = self.column_terms(data, speed_factor, base_scale)
+        return self.generate_from_terms(intensity, time_scale, global_time)
+
+
+_engines = {}
+
+
+def get_engine(cols=animationtest.COLS, rows=animationtest.ROWS):
+    """Return a shared engine for the given grid size."""
+    engine = _engines.get((cols, rows))
+    if engine is None:
+        engine = PatternEngine(cols, rows)
+        _engines[(cols, rows)] = engine
+    return engine
+
+
+def generate_fluid_pattern_np(data, global_time, cols=animationtest.COLS, rows=animationtest.ROWS,
+                              speed_factor=animationtest.SPEED_FACTOR, base_scale=animationtest.BASE_TIME_SCALE):
+    """Array version of `animationtest.generate_fluid_pattern`."""
+    return get_engine(cols, rows).generate(data, global_time, speed_factor, base_scale)
@@ -0,0 +1,149 @@
+"""Indexed rainfall data store shared by viewchart, downloadchart and Main.
+
+`RainfallStore` keeps the monthly rainfall table from monthlyElement.xml in
+one contiguous float32 (years x 12) array, with a year -> row index and
+per-year statistics computed once at load time.
+
+Cells that are not plain numbers are stored as 0.0 in `values` (as the old
+loaders did) but are flagged separately:
+- `missing`: "***", empty or unparsable cells
+- `trace`:   "Trace" (rainfall below 0.05 mm)
+
+Usage:
+    from hkvis_core.rainfallstore import RainfallStore
+    store = RainfallStore.load(xml_path)
+    vals = store.get('2025')          # float32 row view, or None
+    lo, hi = store.minmax('2025')
+"""
+import json
+
+import numpy as np
+
+MONTHS = ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
+
+# bits used in the packed flags array (see `flags`)
+FLAG_MISSING = 1
+FLAG_TRACE = 2
+
+
+def parse_cell(v):
+    """Return (value, flag) for one monthData cell."""
+    v = v.strip() if isinstance(v, str) else v
+    if v == "Trace":
+        return 0.0, FLAG_TRACE
+    if v in ("", "***", None):
+        return 0.0, FLAG_MISSING
+    try:
+        return float(v), 0
+    except Exception:
+        return 0.0, FLAG_MISSING
+
+
+class RainfallStore:
+    def __init__(self, years, values, flags=None):
+        self.years = [str(y) for y in years]
+        self.values = np.ascontiguousarray(values, dtype=np.float32).reshape(len(self.years), 12)
+        if flags is None:
+            flags = np.zeros(self.values.shape, dtype=np.uint8)
+        self.flags = np.ascontiguousarray(flags, dtype=np.uint8).reshape(self.values.shape)
+        self.missing = (self.flags & FLAG_MISSING) != 0
+        self.trace = (self.flags & FLAG_TRACE) != 0
+        self.index = {y: i for i, y in enumerate(self.years)}
+        # per-year statistics; missing/trace cells count as 0.0 like the old loaders
+        if len(self.years):
+            self.month_min = self.values.min(axis=1)
+            self.month_max = self.values.max(axis=1)
+            self.total = self.values.sum(axis=1, dtype=np.float64).astype(np.float32)
+            self.month_mean = self.total / np.float32(12)
+        else:
+            self.month_min = self.month_max = self.total = self.month_mean = np.zeros(0, dtype=np.float32)
+        self._lists = None
+
+    # --- construction ---
+    @classmethod
+    def from_month_data(cls, month_data):
+        """Build a store from HKO `monthData` rows ([year, m1, ..., m12])."""
+        n = len(month_data)
+        values = np.zeros((n, 12), dtype=np.float32)
+        flags = np.full((n, 12), FLAG_MISSING, dtype=np.uint8)
+        years = []
+        for i, row in enumerate(month_data):
+            years.append(str(row[0]).strip())
+            for m, cell in enumerate(row[1:13]):
+                values[i, m], flags[i, m] = parse_cell(cell)
+        return cls(years, values, flags)
+
+    @classmethod
+    def from_json_text(cls, content, code='RF'):
+        data = json.loads(content)
+        section = None
+        for s in data['stn']['data']:
+            if s.get('code') == code:
+                section = s
+                break
+        if not section:
+            raise ValueError(f'Rainfall data ({code}) not found in file.')
+        return cls.from_month_data(section['monthData'])
+
+    @classmethod
+    def load(cls, xml_path, code='RF'):
+        # streamed: only the requested element is kept, however big the feed
+        try:
+            from hkvis_core.streamparse import load_store
+        except ImportError:
+            from streamparse import load_store
+        return load_store(xml_path, code)
+
+    # --- lookups ---
+    def __len__(self):
+        return len(self.years)
+
+    def __contains__(self, year):
+        return str(year) in self.index
+
+    def row(self, year):
+        """Row index for `year` (str or int), or None."""
+        return self.index.get(str(year))
+
+    def get(self, year, default=None):
+        i = self.index.get(str(year))
+        if i is None:
+            return default
+        return self.values[i]
+
+    def minmax(self, year):
+        i = self.index.get(str(year))
+        if i is None:
+            return None
+        return float(self.month_min[i]), float(self.month_max[i])
+
+    def rainfall_lists(self):
+        """Per-year lists of Python floats (built once, shared).
+
+        Each float32 goes through its shortest repr, so the lists hold the
+        values as written in the feed (67.2, not 67.19999694824219), as the
+        old loaders returned them.
+        """
+        if self._lists is None:
+            self._lists = self.values.astype(str).astype(np.float64).tolist()
+        return self._lists
+
+    def values_list(self, year, default=None):
+        i = self.index.get(str(year))
+        if i is None:
+            return default
+        return self.rainfall_lists()[i]
+
+    def freeze(self):
+        """Build the lazy caches and make the arrays read-only, so the store can be
+        handed between threads and shared without copying. Returns self."""
+        self.rainfall_lists()
+        for arr in (self.values, self.flags, self.missing, self.trace,
+                    self.month_min, self.month_max, self.total, self.month_mean):
+            if arr.flags.writeable:
+                arr.flags.writeable = False
+        return self
+
+    def to_lists(self):
+        """Return (years, rainfall) in the old `load_rainfall_data` format."""
+        return list(self.years), [list(v) for v in self.rainfall_lists()]
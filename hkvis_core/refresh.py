@@ -0,0 +1,209 @@
+"""Refresh the downloaded data files (monthlyElement.xml and the HTML page).
+
+Both files are fetched concurrently: each request runs in a worker thread
+via `asyncio.to_thread` (plain urllib, no extra dependencies). Requests are
+conditional: the ETag and Last-Modified of the last download are kept in a
+small sidecar under data/.hkvis_cache, so an unchanged file costs a 304.
+Failed requests are retried with exponential backoff, and new content is
+written to a temp file and renamed into place, so readers never see a
+partial file.
+
+Usage:
+    python -m hkvis_core.refresh                 # refresh both files
+    python -m hkvis_core.refresh --only xml --force
+
+    from hkvis_core.refresh import refresh, start_background_refresh
+    results = refresh()                                   # blocking
+    start_background_refresh(on_done=lambda results: ...)  # from a GUI
+"""
+import argparse
+import asyncio
+import email.utils
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import namedtuple
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+DATA_DIR = os.path.join(REPO_ROOT, 'data')
+META_DIR_NAME = '.hkvis_cache'
+
+XML_URL = "https://www.hko.gov.hk/cis/individual_month/monthlyElement.xml"
+HTML_URL = "https://www.hko.gov.hk/en/cis/monthlyElement.htm?stn=HKO&ele=RF"
+HEADERS = {
+    "User-Agent": "hkvis-refresh/1.0 (+https://www.hko.gov.hk/)",
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+}
+
+Target = namedtuple('Target', 'name url path')
+# status is 'updated', 'unchanged' (304 or same bytes) or 'failed'
+FetchResult = namedtuple('FetchResult', 'name path status changed size attempts seconds error')
+
+RETRY_STATUS = (408, 429, 500, 502, 503, 504)
+
+
+def default_targets(data_dir=DATA_DIR):
+    return [
+        Target('xml', XML_URL, os.path.join(data_dir, 'monthlyElement.xml')),
+        Target('html', HTML_URL, os.path.join(data_dir, 'monthlyElement.html')),
+    ]
+
+
+def meta_path(path):
+    return os.path.join(os.path.dirname(os.path.abspath(path)), META_DIR_NAME,
+                        os.path.basename(path) + '.http.json')
+
+
+def read_meta(path):
+    try:
+        with open(meta_path(path), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except Exception:
+        return {}
+
+
+def _write_atomic(path, data):
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(prefix='.tmp_', dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, path)
+    except Exception:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+
+
+def write_meta(path, meta):
+    _write_atomic(meta_path(path), json.dumps(meta, indent=1).encode('utf-8'))
+
+
+def fetch_once(target, timeout=15, force=False):
+    """One conditional GET; returns (http_status, body_or_None, response_headers)."""
+    headers = dict(HEADERS)
+    meta = {} if force or not os.path.exists(target.path) else read_meta(target.path)
+    if meta.get('etag'):
+        headers['If-None-Match'] = meta['etag']
+    if meta.get('last_modified'):
+        headers['If-Modified-Since'] = meta['last_modified']
+    req = urllib.request.Request(target.url, headers=headers)
+    try:
+        with urllib.request.urlopen(req, timeout=timeout) as resp:
+            return resp.status, resp.read(), resp.headers
+    except urllib.error.HTTPError as e:
+        if e.code == 304:
+            return 304, None, e.headers
+        raise
+
+
+def store_response(target, body, headers):
+    """Write `body` atomically if it differs from the file on disk; returns True if it changed."""
+    digest = hashlib.sha256(body).hexdigest()
+    meta = read_meta(target.path)
+    changed = not (os.path.exists(target.path) and meta.get('sha256') == digest)
+    if changed:
+        _write_atomic(target.path, body)
+    write_meta(target.path, {
+        'url': target.url,
+        'etag': headers.get('ETag'),
+        'last_modified': headers.get('Last-Modified'),
+        'sha256': digest,
+        'size': len(body),
+        'fetched_at': email.utils.formatdate(usegmt=True),
+    })
+    return changed
+
+
+async def fetch_target(target, timeout=15, retries=3, backoff=1.0, force=False):
+    """Fetch one target with retries; never raises, the outcome is in the FetchResult."""
+    start = time.perf_counter()
+    error = None
+    for attempt in range(1, retries + 2):
+        try:
+            status, body, headers = await asyncio.to_thread(fetch_once, target, timeout, force)
+            if status == 304:
+                return FetchResult(target.name, target.path, 'unchanged', False, None, attempt,
+                                   time.perf_counter() - start, None)
+            changed = await asyncio.to_thread(store_response, target, body, headers)
+            return FetchResult(target.name, target.path, 'updated' if changed else 'unchanged', changed,
+                               len(body), attempt, time.perf_counter() - start, None)
+        except urllib.error.HTTPError as e:
+            error = e
+            if e.code not in RETRY_STATUS:
+                break
+        except (urllib.error.URLError, TimeoutError, ConnectionError) as e:
+            error = e
+        except Exception as e:
+            # e.g. a failed write: retrying won't help
+            error = e
+            break
+        if attempt <= retries:
+            await asyncio.sleep(backoff * (2 ** (attempt - 1)))
+    return FetchResult(target.name, target.path, 'failed', False, None, attempt,
+                       time.perf_counter() - start, f'{type(error).__name__}: {error}')
+
+
+async def refresh_async(targets=None, timeout=15, retries=3, backoff=1.0, force=False):
+    """Fetch all targets concurrently; returns the FetchResults in target order."""
+    targets = default_targets() if targets is None else targets
+    return list(await asyncio.gather(*(fetch_target(t, timeout, retries, backoff, force) for t in targets)))
+
+
+def refresh(targets=None, timeout=15, retries=3, backoff=1.0, force=False, on_changed=None):
+    """Blocking refresh. `on_changed(results)` is called if any file changed."""
+    results = asyncio.run(refresh_async(targets, timeout, retries, backoff, force))
+    if on_changed and any(r.changed for r in results):
+        on_changed(results)
+    return results
+
+
+def start_background_refresh(on_done=None, targets=None, **kwargs):
+    """Run `refresh` on a daemon thread; `on_done(results)` is called from that thread."""
+    def run():
+        try:
+            results = refresh(targets, **kwargs)
+        except Exception as e:
+            results = [FetchResult('refresh', None, 'failed', False, None, 0, 0.0, f'{type(e).__name__}: {e}')]
+        if on_done:
+            on_done(results)
+    thread = threading.Thread(target=run, name='hkvis-refresh', daemon=True)
+    thread.start()
+    return thread
+
+
+def describe(result):
+    if result.status == 'failed':
+        return f'{result.name}: failed after {result.attempts} attempt(s): {result.error}'
+    size = f', {result.size} bytes' if result.size is not None else ''
+    return f'{result.name}: {result.status}{size} ({result.seconds:.2f}s) -> {result.path}'
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Refresh the downloaded rainfall data files.')
+    parser.add_argument('--only', choices=('xml', 'html'), action='append', help='refresh only this file')
+    parser.add_argument('--data-dir', default=DATA_DIR)
+    parser.add_argument('--timeout', type=float, default=15)
+    parser.add_argument('--retries', type=int, default=3)
+    parser.add_argument('--force', action='store_true', help='ignore the stored ETag/Last-Modified')
+    args = parser.parse_args(argv)
+
+    targets = [t for t in default_targets(args.data_dir) if not args.only or t.name in args.only]
+    results = refresh(targets, args.timeout, args.retries, force=args.force)
+    for r in results:
+        print(describe(r))
+    return 1 if any(r.status == 'failed' for r in results) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
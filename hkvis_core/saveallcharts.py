@@ -1,16 +1,56 @@
-from hkvis_core.downloadchart import load_rainfall_data, plot_rainfall_for_year
+from hkvis_core.datacache import load_store
+from hkvis_core.chartexport import sync_charts
+import argparse
 import os
-import matplotlib.pyplot as plt
+import time
 
 script_dir = os.path.dirname(os.path.abspath(__file__))
 xml_path = os.path.join(script_dir, '..', 'data', 'monthlyElement.xml')
 out_dir = 'rainfall_charts'
-years, _ = load_rainfall_data(xml_path)
-if not os.path.exists(out_dir):
-    os.makedirs(out_dir)
-for year in years:
-    fig, ax = plot_rainfall_for_year(xml_path, year)
-    out_path = os.path.join(out_dir, f'rainfall_{year}.png')
-    fig.savefig(out_path)
-    plt.close(fig)
-    print(f'Saved: {out_path}')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Save a rainfall chart PNG for every year (only stale charts are re-rendered).')
+    parser.add_argument('--xml', default=xml_path, help='path to monthlyElement.xml')
+    parser.add_argument('--out-dir', default=out_dir, help='output directory for the PNGs')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='worker processes (default: CPU count, 1 = serial)')
+    parser.add_argument('--force', action='store_true',
+                        help='re-render every chart, not just the stale or missing ones')
+    parser.add_argument('--no-atlas', action='store_true',
+                        help='do not repack the charts into charts.atlas (see hkvis_core.chartatlas)')
+    parser.add_argument('--svg', action='store_true',
+                        help='also write rainfall_<year>.svg for every year (see hkvis_core.svgchart)')
+    args = parser.parse_args(argv)
+
+    store = load_store(args.xml)
+    start = time.perf_counter()
+    timings = []
+
+    def report(year, path, seconds):
+        timings.append(seconds)
+        print(f'Saved: {path} ({seconds * 1000:.0f} ms)')
+
+    summary = sync_charts(store, args.out_dir, workers=args.workers, force=args.force, on_done=report)
+    total = time.perf_counter() - start
+    for year in summary['removed']:
+        print(f'Removed: {os.path.join(args.out_dir, f"rainfall_{year}.png")}')
+    print(f"{len(summary['rendered'])} rendered, {len(summary['skipped'])} up to date, "
+          f"{len(summary['removed'])} removed in {total:.2f}s")
+    if timings:
+        print(f'mean {sum(timings) / len(timings) * 1000:.0f} ms per chart, max {max(timings) * 1000:.0f} ms')
+    if not args.no_atlas:
+        from hkvis_core import chartatlas
+        base = chartatlas.default_base(args.out_dir)
+        if summary['rendered'] or summary['removed'] or not os.path.exists(base + '.json'):
+            meta = chartatlas.build_atlas(args.out_dir, store=store)
+            print(f"Packed {len(meta['years'])} charts into {base}.png")
+    if args.svg:
+        from hkvis_core.svgchart import export_svgs
+        start = time.perf_counter()
+        paths = export_svgs(store, args.out_dir)
+        print(f'Wrote {len(paths)} SVGs in {(time.perf_counter() - start) * 1000:.0f} ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+"""Start-up import benchmark for Main.py.
+
+Runs `python -X importtime -c "import Main"` in fresh interpreters, then
+reports the total import time, the slowest modules and whether any module
+that should stay out of start-up (matplotlib, requests, ...) was loaded.
+
+Usage:
+    python -m hkvis_core.startupbench [--runs 5] [--top 15] [--json out.json]
+
+Exits with status 1 if a forbidden module was imported, so it can be used
+as a CI check.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# modules Main.py must not load at start-up
+FORBIDDEN = ('matplotlib', 'requests', 'lxml', 'drawsvg', 'dotenv')
+
+
+def parse_importtime(stderr):
+    """Parse `-X importtime` output into a list of (module, self_us, cumulative_us, depth)."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        parts = line[len('import time:'):].split('|')
+        if len(parts) != 3:
+            continue
+        try:
+            self_us = int(parts[0].strip())
+            cumulative_us = int(parts[1].strip())
+        except ValueError:
+            continue  # header line
+        name = parts[2].rstrip()
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((name.strip(), self_us, cumulative_us, depth))
+    return rows
+
+
+def run_once(target='Main', python=sys.executable):
+    env = dict(os.environ)
+    env.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+    proc = subprocess.run([python, '-X', 'importtime', '-c', f'import {target}'],
+                          cwd=REPO_ROOT, env=env, capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(f'import {target} failed:\n{proc.stderr[-2000:]}')
+    rows = parse_importtime(proc.stderr)
+    # top-level entries (depth 0) add up to the whole import
+    total_us = sum(r[2] for r in rows if r[3] == 0)
+    return total_us, rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Measure Main.py start-up import time.')
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--top', type=int, default=15, help='number of slowest modules to list')
+    parser.add_argument('--target', default='Main', help='module to import (default: Main)')
+    parser.add_argument('--json', help='write results to this JSON file')
+    args = parser.parse_args(argv)
+
+    totals = []
+    last_rows = []
+    for _ in range(args.runs):
+        total_us, last_rows = run_once(args.target)
+        totals.append(total_us)
+
+    loaded = {r[0] for r in last_rows}
+    forbidden = sorted(m for m in loaded if m.split('.')[0] in FORBIDDEN)
+    slowest = sorted(last_rows, key=lambda r: r[1], reverse=True)[:args.top]
+
+    print(f'import {args.target}: median {statistics.median(totals) / 1000:.1f} ms, '
+          f'min {min(totals) / 1000:.1f} ms over {len(totals)} runs ({len(loaded)} modules)')
+    print('slowest modules (self time):')
+    for name, self_us, cumulative_us, _ in slowest:
+        print(f'  {self_us / 1000:8.2f} ms  (cumulative {cumulative_us / 1000:8.2f} ms)  {name}')
+    if forbidden:
+        print('forbidden modules loaded at start-up: ' + ', '.join(forbidden))
+    else:
+        print('no forbidden modules loaded')
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({
+                'target': args.target,
+                'runs_us': totals,
+                'median_us': statistics.median(totals),
+                'modules': len(loaded),
+                'forbidden': forbidden,
+                'slowest': [{'module': r[0], 'self_us': r[1], 'cumulative_us': r[2]} for r in slowest],
+            }, f, indent=2)
+    return 1 if forbidden else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
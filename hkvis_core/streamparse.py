@@ -0,0 +1,219 @@
+"""Streaming parser for the HKO monthlyElement.xml feed.
+
+The feed is a JSON document with one section per element (RF, temperature,
+humidity, ...), each holding a `monthData` table. `json.loads` has to build
+the whole document in memory; this module reads the file in chunks through a
+small regex tokenizer and only keeps the sections whose code was asked for.
+Their rows are parsed straight into preallocated float32/uint8 arrays, other
+sections are tokenized and dropped, and reading stops as soon as every
+requested code has been found. Memory stays bounded by the chunk size plus
+the requested tables, whatever the size of the feed.
+
+A run of flat arrays of scalars (consecutive `monthData` rows) is matched as
+a single token, so a skipped table costs about one regex match per chunk and
+a kept one a findall per row, rather than a token per cell.
+
+Usage:
+    from hkvis_core.streamparse import parse_elements, load_store
+    store = load_store(xml_path)                         # RF only
+    stores = parse_elements(xml_path, codes=('RF', 'MEANTEMP'))
+"""
+import json
+import re
+
+import numpy as np
+
+try:
+    from hkvis_core.rainfallstore import RainfallStore, parse_cell, FLAG_MISSING
+except ImportError:
+    from rainfallstore import RainfallStore, parse_cell, FLAG_MISSING
+
+CHUNK_SIZE = 1 << 16
+# refill before matching when fewer characters than this are buffered, so rows
+# are not split across chunks (a split row still parses, just more slowly)
+LOOKAHEAD = 4096
+INITIAL_ROWS = 256
+
+_SCALAR = r'(?:"[^"\\]*"|[-+.\w]+)'
+_ROW = r'\[\s*(?:%s(?:\s*,\s*%s)*)?\s*\]' % (_SCALAR, _SCALAR)
+TOKEN_RE = re.compile(r'''\s*(?:
+      (?P<rows>%s(?:\s*,\s*%s)*)
+    | "(?P<str>(?:[^"\\]|\\.)*)"
+    | (?P<punct>[\[\]{}:,])
+    | (?P<lit>[-+.\w]+)
+    )''' % (_ROW, _ROW), re.X | re.S)
+ROW_RE = re.compile(_ROW)
+CELL_RE = re.compile(r'"([^"\\]*)"|([-+.\w]+)')
+
+
+def iter_tokens(f, chunk_size=CHUNK_SIZE):
+    """Yield (kind, text) tokens from a text file object.
+
+    `kind` is 'rows' (comma-separated flat arrays of scalars, raw text),
+    'str' (decoded), 'punct' or 'lit' (numbers, true/false/null as written).
+    """
+    buf = ''
+    pos = 0
+    eof = False
+    while True:
+        if not eof and len(buf) - pos < LOOKAHEAD:
+            chunk = f.read(chunk_size)
+            buf = buf[pos:] + chunk
+            pos = 0
+            eof = not chunk
+        m = TOKEN_RE.match(buf, pos)
+        if m is None or (m.end() == len(buf) and not eof):
+            if not eof:
+                # token longer than the lookahead: read until it is complete
+                chunk = f.read(chunk_size)
+                buf = buf[pos:] + chunk
+                pos = 0
+                eof = not chunk
+                continue
+            if buf[pos:].strip():
+                raise ValueError(f'Malformed JSON near: {buf[pos:pos + 40]!r}')
+            return
+        pos = m.end()
+        kind = m.lastgroup
+        text = m.group(kind)
+        if kind == 'str' and '\\' in text:
+            text = json.loads('"' + text + '"')
+        yield kind, text
+
+
+def iter_rows(text):
+    """Cell strings of each array in a 'rows' token."""
+    for m in ROW_RE.finditer(text):
+        # exactly one group matches; the other is ''
+        yield [s or lit for s, lit in CELL_RE.findall(m.group())]
+
+
+class RowSink:
+    """Growable (rows x 12) value/flag arrays filled one monthData row at a time."""
+
+    def __init__(self, capacity=INITIAL_ROWS):
+        self.years = []
+        self.values = np.zeros((capacity, 12), dtype=np.float32)
+        self.flags = np.full((capacity, 12), FLAG_MISSING, dtype=np.uint8)
+
+    def __len__(self):
+        return len(self.years)
+
+    def add(self, cells):
+        if not cells:
+            return
+        i = len(self.years)
+        if i == len(self.values):
+            grow = len(self.values)
+            self.values = np.concatenate([self.values, np.zeros((grow, 12), dtype=np.float32)])
+            self.flags = np.concatenate([self.flags, np.full((grow, 12), FLAG_MISSING, dtype=np.uint8)])
+        self.years.append(str(cells[0]).strip())
+        values, flags = self.values[i], self.flags[i]
+        for m, cell in enumerate(cells[1:13]):
+            values[m], flags[m] = parse_cell(cell)
+
+    def to_store(self):
+        n = len(self.years)
+        return RainfallStore(self.years, self.values[:n].copy(), self.flags[:n].copy())
+
+
+class _Frame:
+    __slots__ = ('is_obj', 'key', 'expect_key', 'section', 'role', 'cells')
+
+    def __init__(self, is_obj, section=None, role=None):
+        self.is_obj = is_obj
+        self.key = None
+        self.expect_key = is_obj
+        self.section = section
+        self.role = role
+        self.cells = [] if role == 'row' else None
+
+
+class _Section:
+    """An object that may turn out to be an element section."""
+
+    __slots__ = ('code', 'skip', 'sink')
+
+    def __init__(self):
+        self.code = None
+        self.skip = False
+        self.sink = None
+
+    def add_row(self, cells):
+        if self.skip:
+            return
+        if self.sink is None:
+            self.sink = RowSink()
+        self.sink.add(cells)
+
+
+def parse_elements(source, codes=('RF',), chunk_size=CHUNK_SIZE):
+    """Return {code: RainfallStore} for the requested element codes found in `source`.
+
+    `source` is a path or a text file object. Any object with a string `code`
+    and a `monthData` array counts as a section; the first section of each
+    code wins. Codes that are not in the file are missing from the result.
+    """
+    if isinstance(source, str):
+        with open(source, 'r', encoding='utf-8') as f:
+            return parse_elements(f, codes, chunk_size)
+    codes = set(codes)
+    results = {}
+    stack = []
+    for kind, text in iter_tokens(source, chunk_size):
+        top = stack[-1] if stack else None
+        if kind == 'punct':
+            if text == '{':
+                stack.append(_Frame(True, _Section()))
+            elif text == '[':
+                role = None
+                section = None
+                if top is not None:
+                    if top.is_obj and top.key == 'monthData':
+                        role, section = 'monthData', top.section
+                    elif top.role == 'monthData':
+                        role, section = 'row', top.section
+                stack.append(_Frame(False, section, role))
+            elif text == '}':
+                frame = stack.pop()
+                sec = frame.section
+                if sec.code in codes and sec.code not in results and sec.sink is not None:
+                    results[sec.code] = sec.sink.to_store()
+                    if len(results) == len(codes):
+                        # everything asked for is in; don't read the rest of the file
+                        break
+            elif text == ']':
+                frame = stack.pop()
+                if frame.role == 'row':
+                    frame.section.add_row(frame.cells)
+            elif text == ',' and top is not None and top.is_obj:
+                top.expect_key = True
+            continue
+        if top is None:
+            continue
+        if top.is_obj:
+            if top.expect_key and kind == 'str':
+                top.key = text
+                top.expect_key = False
+            elif top.key == 'code' and kind == 'str':
+                sec = top.section
+                sec.code = text
+                if text not in codes:
+                    # rows already buffered for this object are no use either
+                    sec.skip = True
+                    sec.sink = None
+        elif top.role == 'monthData':
+            if kind == 'rows' and not top.section.skip:
+                for cells in iter_rows(text):
+                    top.section.add_row(cells)
+        elif top.role == 'row' and kind != 'rows':
+            top.cells.append(text)
+    return results
+
+
+def load_store(source, code='RF', chunk_size=CHUNK_SIZE):
+    """Parse one element of the feed; raises ValueError if it is not there."""
+    store = parse_elements(source, (code,), chunk_size).get(code)
+    if store is None:
+        raise ValueError(f'Rainfall data ({code}) not found in file.')
+    return store
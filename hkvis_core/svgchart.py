@@ -0,0 +1,210 @@
+"""Matplotlib-free SVG export of the yearly rainfall charts.
+
+Every chart has the same frame: axes, month ticks and labels, axis titles
+and the legend. `SvgChartTemplate` lays that out once as a format string
+(sized like the matplotlib PNGs, FIGSIZE at 100 dpi) and a year only fills
+in its title, the 12 bars (height and colour) and the y ticks, so all
+years render in a few milliseconds instead of a matplotlib figure,
+tight_layout and Agg rasterisation per year.
+
+PNG output is optional and needs cairosvg, which rasterises the SVG. It
+is refused in a directory that holds the matplotlib charts (a chartexport
+manifest, or PNGs without an SVG beside them, like rainfall_charts/):
+the manifest would still mark the replaced PNGs as fresh and chartatlas
+would pack them.
+
+Usage:
+    python -m hkvis_core.svgchart --out-dir docs/charts
+    python -m hkvis_core.svgchart --out-dir docs/charts --png
+
+    from hkvis_core.svgchart import render_svg, export_svgs
+    svg = render_svg('1997', store.values_list('1997'))
+    export_svgs(store, 'docs/charts')
+"""
+import argparse
+import os
+import sys
+import time
+from xml.sax.saxutils import escape
+
+try:
+    from hkvis_core.rainfallstore import MONTHS
+    from hkvis_core.chartexport import (COLOR_ORANGE, COLOR_BLUE, COLOR_GRAY, FIGSIZE, MANIFEST_NAME,
+                                        nice_ticks, tick_label)
+except ImportError:
+    from rainfallstore import MONTHS
+    from chartexport import COLOR_ORANGE, COLOR_BLUE, COLOR_GRAY, FIGSIZE, MANIFEST_NAME, nice_ticks, tick_label
+
+DPI = 100
+FONT_FAMILY = 'DejaVu Sans, Arial, Helvetica, sans-serif'
+# matplotlib's default sizes at 100 dpi: 'large' title, 10 pt labels
+TITLE_SIZE = 16.7
+LABEL_SIZE = 13.9
+# about as many y ticks as matplotlib's AutoLocator picks for this height
+Y_TICKS = 9
+
+
+class SvgChartTemplate:
+    """The chart's fixed layout as a format string; `render` fills in one year."""
+
+    def __init__(self, width=FIGSIZE[0] * DPI, height=FIGSIZE[1] * DPI):
+        self.width = width
+        self.height = height
+        # axes box, as tight_layout places it on the 1000x500 PNGs (scaled for other sizes)
+        sx, sy = width / 1000.0, height / 500.0
+        self.left, self.right = 70 * sx, 985 * sx
+        self.top, self.bottom = 36 * sy, 441 * sy
+        # categorical x axis: bars at 0..11, 0.8 wide, with matplotlib's 5% margins
+        lo, hi = -0.99, 11.99
+        unit = (self.right - self.left) / (hi - lo)
+        self.bar_x = [self.left + (i - 0.4 - lo) * unit for i in range(12)]
+        self.bar_w = 0.8 * unit
+        self.tick = 3.5
+        self.template = self._build(unit, lo)
+
+    def _build(self, unit, lo):
+        w, h = self.width, self.height
+        left, right, top, bottom = self.left, self.right, self.top, self.bottom
+        parts = [
+            f'<svg xmlns="http://www.w3.org/2000/svg" width="{w}" height="{h}" viewBox="0 0 {w} {h}">',
+            f'<rect width="{w}" height="{h}" fill="#ffffff"/>',
+            f'<g font-family="{FONT_FAMILY}" font-size="{LABEL_SIZE}" fill="#000000">',
+            f'<text x="{(left + right) / 2:.1f}" y="{top - 12:.1f}" font-size="{TITLE_SIZE}" '
+            f'text-anchor="middle">{{title}}</text>',
+        ]
+        parts += [f'{{bar{i}}}' for i in range(12)]
+        parts.append('{yticks}')
+        parts.append(f'<rect x="{left:.1f}" y="{top:.1f}" width="{right - left:.1f}" height="{bottom - top:.1f}" '
+                     f'fill="none" stroke="#000000" stroke-width="0.8"/>')
+        for i, month in enumerate(MONTHS):
+            cx = left + (i - lo) * unit
+            parts.append(f'<line x1="{cx:.1f}" y1="{bottom:.1f}" x2="{cx:.1f}" y2="{bottom + self.tick:.1f}" '
+                         f'stroke="#000000" stroke-width="0.8"/>')
+            parts.append(f'<text x="{cx:.1f}" y="{bottom + self.tick + 15:.1f}" text-anchor="middle">{month}</text>')
+        parts.append(f'<text x="{(left + right) / 2:.1f}" y="{h - 18:.1f}" text-anchor="middle">Month</text>')
+        ycenter = (top + bottom) / 2
+        parts.append(f'<text x="22" y="{ycenter:.1f}" text-anchor="middle" '
+                     f'transform="rotate(-90 22 {ycenter:.1f})">Rainfall (mm)</text>')
+        # legend, upper right inside the axes, no frame
+        for row, (color, label) in enumerate(((COLOR_ORANGE, 'Highest Month'), (COLOR_BLUE, 'Lowest Month'))):
+            y = top + 19 + row * 23
+            parts.append(f'<rect x="{right - 169:.1f}" y="{y - 5:.1f}" width="28" height="10" fill="{color}"/>')
+            parts.append(f'<text x="{right - 130:.1f}" y="{y + 5:.1f}">{label}</text>')
+        parts.append('</g></svg>')
+        return '\n'.join(parts) + '\n'
+
+    def render(self, year, vals):
+        """SVG text of the chart for `year` (12 monthly values)."""
+        vals = [float(v) for v in vals]
+        ymax = max(vals)
+        ticks = nice_ticks(ymax * 1.05, Y_TICKS) if ymax > 0 else [0.0, 1.0]
+        top = ymax * 1.05 if ymax > 0 else 1.0
+        scale = (self.bottom - self.top) / top
+        # first occurrence wins ties, like draw_rainfall_chart
+        colors = [COLOR_GRAY] * 12
+        colors[vals.index(ymax)] = COLOR_ORANGE
+        colors[vals.index(min(vals))] = COLOR_BLUE
+        fields = {'title': f'Monthly Rainfall in Hong Kong ({escape(str(year))})'}
+        for i, v in enumerate(vals):
+            bh = max(0.0, v) * scale
+            fields[f'bar{i}'] = (f'<rect x="{self.bar_x[i]:.1f}" y="{self.bottom - bh:.1f}" '
+                                 f'width="{self.bar_w:.1f}" height="{bh:.1f}" fill="{colors[i]}"/>')
+        step = ticks[1] - ticks[0]
+        yticks = []
+        for t in ticks:
+            y = self.bottom - t * scale
+            yticks.append(f'<line x1="{self.left - self.tick:.1f}" y1="{y:.1f}" x2="{self.left:.1f}" y2="{y:.1f}" '
+                          f'stroke="#000000" stroke-width="0.8"/>'
+                          f'<text x="{self.left - self.tick - 3.5:.1f}" y="{y + 5:.1f}" '
+                          f'text-anchor="end">{tick_label(t, step)}</text>')
+        fields['yticks'] = '\n'.join(yticks)
+        return self.template.format_map(fields)
+
+
+_default_template = None
+
+
+def render_svg(year, vals):
+    """SVG text of one chart at the default (matplotlib PNG) size."""
+    global _default_template
+    if _default_template is None:
+        _default_template = SvgChartTemplate()
+    return _default_template.render(year, vals)
+
+
+def _holds_other_charts(out_dir):
+    """True if `out_dir` has a chartexport manifest or PNG charts without an SVG beside them."""
+    if os.path.exists(os.path.join(out_dir, MANIFEST_NAME)):
+        return True
+    names = set(os.listdir(out_dir))
+    return any(n.startswith('rainfall_') and n.endswith('.png') and n[:-4] + '.svg' not in names
+               for n in names)
+
+
+def _png_writer(out_dir):
+    """Return write(svg_text, path), rasterising with cairosvg."""
+    if _holds_other_charts(out_dir):
+        raise RuntimeError(f'{out_dir} holds the matplotlib charts; write the SVG PNGs somewhere else')
+    try:
+        import cairosvg
+    except ImportError:
+        raise RuntimeError('PNG output needs cairosvg (pip install cairosvg)')
+
+    def write(svg, path):
+        cairosvg.svg2png(bytestring=svg.encode('utf-8'), write_to=path)
+    return write
+
+
+def export_svgs(store, out_dir, years=None, png=False, template=None, on_done=None):
+    """Write rainfall_<year>.svg (and .png with `png`) for `years` (default: all); returns the paths."""
+    template = template or SvgChartTemplate()
+    years = store.years if years is None else years
+    os.makedirs(out_dir, exist_ok=True)
+    write_png = _png_writer(out_dir) if png else None
+    paths = []
+    for year in years:
+        vals = store.values_list(year)
+        if vals is None:
+            continue
+        svg = template.render(year, vals)
+        path = os.path.join(out_dir, f'rainfall_{year}.svg')
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(svg)
+        paths.append(path)
+        if write_png is not None:
+            png_path = os.path.join(out_dir, f'rainfall_{year}.png')
+            write_png(svg, png_path)
+            paths.append(png_path)
+        if on_done:
+            on_done(year, path)
+    return paths
+
+
+def main(argv=None):
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    parser = argparse.ArgumentParser(description='Export the yearly rainfall charts as SVG (no matplotlib).')
+    parser.add_argument('--xml', default=os.path.join(script_dir, '..', 'data', 'monthlyElement.xml'))
+    parser.add_argument('--out-dir', default='rainfall_charts_svg')
+    parser.add_argument('--years', nargs='*', help='only these years')
+    parser.add_argument('--png', action='store_true',
+                        help='also write rainfall_<year>.png (needs cairosvg; not into a chartexport directory)')
+    args = parser.parse_args(argv)
+
+    try:
+        from hkvis_core.datacache import load_store
+    except ImportError:
+        from datacache import load_store
+    store = load_store(args.xml)
+    start = time.perf_counter()
+    try:
+        paths = export_svgs(store, args.out_dir, args.years, args.png)
+    except RuntimeError as e:
+        print(f'Error: {e}')
+        return 1
+    total = time.perf_counter() - start
+    print(f'{len(paths)} files written to {args.out_dir} in {total * 1000:.0f} ms')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
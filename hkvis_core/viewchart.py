@@ -1,79 +1,54 @@
 import os
-import datetime
-import json
-import requests
-import dotenv
-from lxml import html
-import matplotlib.pyplot as plt
-import drawsvg as draw
 
-# Import our custom utilities
-
-
-print("All libraries imported successfully!")
-
-# Display the loaded environment variables
-dotenv.load_dotenv()
-
-# Let's look at our scraping utilities
-import inspect
+try:
+    from hkvis_core.rainfallstore import RainfallStore, MONTHS
+    from hkvis_core.datacache import load_store
+except ImportError:
+    from rainfallstore import RainfallStore, MONTHS
+    from datacache import load_store
 
+# matplotlib and the climatology are imported inside plot_rainfall_for_year so
+# that importing this module for the data helpers stays cheap.
 
 
 # --- Rainfall Monthly Rate Table from monthlyElement.xml ---
 def load_rainfall_data(xml_path):
-    with open(xml_path, 'r', encoding='utf-8') as f:
-        content = f.read()
-    data = json.loads(content)
-    rf = None
-    for section in data['stn']['data']:
-        if section.get('code') == 'RF':
-            rf = section
-            break
-    if not rf:
-        raise ValueError('Rainfall data (RF) not found in file.')
-    monthdata = rf['monthData']
-    years = []
-    rainfall = []
-    for row in monthdata:
-        year = row[0]
-        vals = []
-        for v in row[1:]:
-            v = v.strip()
-            if v in ("Trace", "", "***"):
-                vals.append(0.0)
-            else:
-                try:
-                    vals.append(float(v))
-                except Exception:
-                    vals.append(0.0)
-        years.append(year)
-        rainfall.append(vals)
-    return years, rainfall
+    # kept for existing callers; new code should use RainfallStore directly
+    return load_store(xml_path).to_lists()
 
-def print_rainfall_table(years, rainfall, year):
-    months = ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
-    if year not in years:
+def _store_and_year(store, args):
+    # (store, year), or the old (years, rainfall, year) lists from load_rainfall_data
+    if len(args) == 2:
+        years, (rainfall, year) = store, args
+        return RainfallStore(years, rainfall), year
+    return store, args[0]
+
+def print_rainfall_table(store, *args):
+    store, year = _store_and_year(store, args)
+    months = MONTHS
+    vals = store.values_list(year)
+    if vals is None:
         print(f"Year {year} not found in rainfall data.")
         return
-    idx = years.index(year)
     print(f"\nRainfall Monthly Rate Table for {year}")
     print("Month\t" + "\t".join(months))
-    print("Rain(mm)\t" + "\t".join(f"{v:.1f}" for v in rainfall[idx]))
+    print("Rain(mm)\t" + "\t".join(f"{v:.1f}" for v in vals))
 
-def plot_rainfall_for_year(years, rainfall, year):
-    months = ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
-    if year not in years:
+def plot_rainfall_for_year(store, *args):
+    store, year = _store_and_year(store, args)
+    import matplotlib.pyplot as plt
+    months = MONTHS
+    idx = store.row(year)
+    if idx is None:
         print(f"Year {year} not found in rainfall data.")
         return
-    idx = years.index(year)
     plt.figure(figsize=(6, 4))
     manager = plt.get_current_fig_manager()
     try:
         manager.window.setGeometry(100, 100, 800, 500)
     except Exception:
         pass
-    vals = rainfall[idx]
+    vals = store.values_list(year)
     max_idx = vals.index(max(vals))
     min_idx = vals.index(min(vals))
     colors = ['#b8b8b8'] * 12  # gray for others
@@ -94,26 +69,41 @@ def plot_rainfall_for_year(years, rainfall, year):
     plt.gca().spines['right'].set_visible(False)
     plt.show()
     print(f"\nRainfall Statistics:")
-    vals = rainfall[idx]
-    print(f"Highest: {max(vals):.1f} mm")
-    print(f"Lowest: {min(vals):.1f} mm")
-    print(f"Average: {sum(vals)/len(vals):.1f} mm")
-    print(f"Range: {max(vals)-min(vals):.1f} mm")
+    hi = float(store.month_max[idx])
+    lo = float(store.month_min[idx])
+    print(f"Highest: {hi:.1f} mm")
+    print(f"Lowest: {lo:.1f} mm")
+    print(f"Average: {float(store.month_mean[idx]):.1f} mm")
+    print(f"Range: {hi-lo:.1f} mm")
+    try:
+        from hkvis_core.climatology import for_store, BASELINE
+    except ImportError:
+        from climatology import for_store, BASELINE
+    stats = for_store(store).year_stats(year)
+    print(f"Anomaly: {stats['anomaly_pct']:+.0f}% vs {BASELINE[0]}-{BASELINE[1]} normal")
+    if stats['rank'] is not None:
+        print(f"Rank: {stats['rank']} wettest of {stats['of']} complete years "
+              f"({stats['percentile']:.0f}th percentile)")
 
 if __name__ == "__main__":
+    try:
+        import dotenv
+        dotenv.load_dotenv()
+    except ImportError:
+        pass
     xml_path = os.path.join(os.path.dirname(__file__), 'data', 'monthlyElement.xml')
-    years, rainfall = load_rainfall_data(xml_path)
-    min_year = min(years)
-    max_year = max(years)
+    store = load_store(xml_path)
+    min_year = min(store.years)
+    max_year = max(store.years)
     while True:
         print(f"\nChoose a year to view rainfall data (from {min_year} to {max_year})")
         choice = input("Enter year (or 'q' to quit): ").strip()
         if choice.lower() == 'q':
             print("Exiting.")
             break
-        if choice not in years:
+        if choice not in store:
             print("Invalid year. Please try again.")
             continue
         year = choice
-        print_rainfall_table(years, rainfall, year)
-        plot_rainfall_for_year(years, rainfall, year)
+        print_rainfall_table(store, year)
+        plot_rainfall_for_year(store, year)
@@ -1,18 +1,23 @@
-import requests
 import os
 
-def download_xml():
-    url = "https://www.hko.gov.hk/cis/individual_month/monthlyElement.xml"
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    output_file = os.path.join(script_dir, "data", "monthlyElement.xml")
-    try:
-        response = requests.get(url, timeout=15)
-        response.raise_for_status()
-        with open(output_file, "wb") as f:
-            f.write(response.content)
+try:
+    from hkvis_core import refresh
+except ImportError:
+    import refresh
+
+
+def download_xml(output_file=None):
+    # conditional, retried download with an atomic write (see hkvis_core.refresh)
+    output_file = output_file or os.path.join(refresh.DATA_DIR, "monthlyElement.xml")
+    target = refresh.Target("xml", refresh.XML_URL, output_file)
+    result = refresh.refresh([target])[0]
+    if result.status == "failed":
+        print("下載失敗:", result.error)
+    elif result.changed:
         print(f"已下載 XML 檔案到: {output_file}")
-    except Exception as e:
-        print("下載失敗:", e)
+    else:
+        print(f"XML 檔案未變更: {output_file}")
+    return result
 
 if __name__ == "__main__":
     download_xml()
@@ -0,0 +1,119 @@
+"""Per-year cache of the data-dependent animation terms.
+
+The animation field for a year depends on its 12 monthly values only via
+per-column vectors: the intensity, the time scale and the speed multiplier
+derived from the year's mean intensity. `YearTermsCache` keeps those
+vectors per (year, cols, rows) in an LRU, so switching year while dragging
+the slider is a dictionary lookup rather than a recompute.
+
+`start_precompute()` fills the cache from a background thread, starting
+with the years nearest the current one.
+
+Usage:
+    cache = YearTermsCache(store)
+    cache.start_precompute(center='1997')
+    terms = cache.get('1997')
+    grid = get_engine(terms.cols, terms.rows).generate_from_terms(terms.intensity, terms.time_scale, t)
+"""
+import threading
+from collections import OrderedDict, namedtuple
+
+from hkvis_core import animationtest
+from hkvis_core.patternengine import get_engine
+
+YearTerms = namedtuple('YearTerms', 'year cols rows intensity time_scale speed_multiplier')
+
+# comfortably above the number of years in the record at one grid size
+DEFAULT_CAPACITY = 512
+
+
+class YearTermsCache:
+    """Thread-safe LRU of `YearTerms` for the years in a `RainfallStore`."""
+
+    def __init__(self, store, capacity=DEFAULT_CAPACITY, speed_factor=animationtest.SPEED_FACTOR,
+                 base_scale=animationtest.BASE_TIME_SCALE):
+        self.store = store
+        self.capacity = capacity
+        self.speed_factor = speed_factor
+        self.base_scale = base_scale
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stop = threading.Event()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _compute(self, year, cols, rows):
+        data = self.store.values_list(year)
+        if data is None:
+            return None
+        intensity, time_scale, multiplier = get_engine(cols, rows).data_terms(data, self.speed_factor, self.base_scale)
+        # shared between threads: make sure nobody modifies them in place
+        intensity.flags.writeable = False
+        time_scale.flags.writeable = False
+        return YearTerms(str(year), cols, rows, intensity, time_scale, multiplier)
+
+    def _put(self, key, terms):
+        # caller holds the lock
+        self._entries[key] = terms
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.capacity:
+            self._entries.popitem(last=False)
+
+    def get(self, year, cols=animationtest.COLS, rows=animationtest.ROWS):
+        """Terms for `year` at this grid size (computed on a miss); None if the year is unknown."""
+        key = (str(year), cols, rows)
+        with self._lock:
+            terms = self._entries.get(key)
+            if terms is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return terms
+            self.misses += 1
+        terms = self._compute(key[0], cols, rows)
+        if terms is not None:
+            with self._lock:
+                self._put(key, terms)
+        return terms
+
+    def precompute(self, center=None, cols=animationtest.COLS, rows=animationtest.ROWS):
+        """Fill the cache for every year, nearest to `center` first. Stops early on `stop()` or when full."""
+        years = list(self.store.years)
+        if center is not None and str(center) in self.store:
+            c = years.index(str(center))
+            years = [y for _, y in sorted(enumerate(years), key=lambda iy: abs(iy[0] - c))]
+        for year in years[:self.capacity]:
+            if self._stop.is_set():
+                return
+            key = (year, cols, rows)
+            with self._lock:
+                if key in self._entries:
+                    continue
+                # a full cache would evict the new entry (it goes in at the cold end) right away
+                if len(self._entries) >= self.capacity:
+                    return
+            terms = self._compute(year, cols, rows)
+            if terms is not None:
+                with self._lock:
+                    # don't count as a use: precomputed entries go to the cold end
+                    if key not in self._entries and len(self._entries) < self.capacity:
+                        self._entries[key] = terms
+                        self._entries.move_to_end(key, last=False)
+
+    def start_precompute(self, center=None, cols=animationtest.COLS, rows=animationtest.ROWS):
+        """Run `precompute` on a daemon thread; returns the thread."""
+        self.stop()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self.precompute, args=(center, cols, rows),
+                                        name='hkvis-yearcache', daemon=True)
+        self._thread.start()
+        return self._thread
+
+    def stop(self, timeout=1.0):
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join(timeout)
+            self._thread = None
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# let `pytest` run from any directory without installing the package
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
@@ -0,0 +1,37 @@
+"""hkvis_core.climatology: totals at the feed's 0.1 mm resolution."""
+import numpy as np
+
+from hkvis_core.climatology import Climatology
+from hkvis_core.rainfallstore import FLAG_MISSING, RainfallStore
+
+# months whose float32 sums are noisy in float64 (2404.3000106811523 and the like)
+MONTHS_A = [24.1, 36.7, 77.3, 145.9, 309.2, 456.1, 376.8, 431.9, 327.4, 120.3, 35.5, 63.1]
+MONTHS_B = MONTHS_A[::-1]
+
+
+def store(rows, flags=None):
+    return RainfallStore([str(1990 + i) for i in range(len(rows))], rows, flags)
+
+
+def test_totals_are_rounded_to_the_feed():
+    clim = Climatology(store([MONTHS_A, [67.2] * 12]))
+    assert list(clim.totals) == [2404.3, 806.4]
+    assert clim.year_stats('1990')['total'] == 2404.3
+    assert clim.ranking(1) == [('1990', 2404.3)]
+
+
+def test_partial_year_total_is_rounded():
+    flags = np.zeros((2, 12), dtype=np.uint8)
+    flags[1, 6:] = FLAG_MISSING
+    clim = Climatology(store([MONTHS_A, MONTHS_A[:6] + [0.0] * 6], flags))
+    stats = clim.year_stats('1991')
+    assert not stats['complete'] and stats['rank'] is None
+    assert stats['total'] == 1049.3
+
+
+def test_same_total_in_another_order_ties():
+    # the same months summed in another order: equal totals, so equal percentiles and year order in the ranking
+    clim = Climatology(store([MONTHS_A, MONTHS_B, [1.0] * 12]))
+    assert clim.totals[0] == clim.totals[1]
+    assert clim.percentile[0] == clim.percentile[1]
+    assert [y for y, _ in clim.ranking()] == ['1990', '1991', '1992']
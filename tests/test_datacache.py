@@ -0,0 +1,115 @@
+"""hkvis_core.datacache: cache hits, invalidation and the parse/replace race."""
+import json
+import mmap
+import os
+
+import numpy as np
+import pytest
+
+from hkvis_core import datacache
+from hkvis_core.rainfallstore import RainfallStore
+
+
+def write_feed(path, offset=0.0, years=5):
+    rows = [[str(1990 + i)] + [f'{i * 12 + m + offset:.1f}' for m in range(12)] for i in range(years)]
+    doc = {'stn': {'data': [{'code': 'RF', 'monthData': rows}]}}
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(doc, f)
+
+
+@pytest.fixture
+def feed(tmp_path):
+    path = str(tmp_path / 'monthlyElement.xml')
+    write_feed(path)
+    return path
+
+
+@pytest.fixture
+def cache_dir(tmp_path):
+    return str(tmp_path / 'cache')
+
+
+def memory_mapped(arr):
+    while arr is not None:
+        if isinstance(arr, (np.memmap, mmap.mmap)):
+            return True
+        arr = getattr(arr, 'base', None)
+    return False
+
+
+def count_parses(monkeypatch):
+    calls = []
+    parse = RainfallStore.load.__func__
+
+    def load(cls, xml_path, code='RF'):
+        calls.append(xml_path)
+        return parse(cls, xml_path, code)
+    monkeypatch.setattr(RainfallStore, 'load', classmethod(load))
+    return calls
+
+
+def test_second_load_is_a_cache_hit(feed, cache_dir, monkeypatch):
+    calls = count_parses(monkeypatch)
+    first = datacache.load_store(feed, cache_dir=cache_dir)
+    second = datacache.load_store(feed, cache_dir=cache_dir)
+    assert len(calls) == 1
+    assert second.years == first.years
+    np.testing.assert_array_equal(second.values, first.values)
+    np.testing.assert_array_equal(second.flags, first.flags)
+
+
+def test_changed_source_is_reparsed(feed, cache_dir):
+    datacache.load_store(feed, cache_dir=cache_dir)
+    write_feed(feed, offset=0.5, years=6)
+    store = datacache.load_store(feed, cache_dir=cache_dir)
+    assert len(store) == 6 and float(store.values[0, 0]) == 0.5
+
+
+def test_touched_but_unchanged_source_still_hits(feed, cache_dir, monkeypatch):
+    datacache.load_store(feed, cache_dir=cache_dir)
+    st = os.stat(feed)
+    os.utime(feed, ns=(st.st_atime_ns, st.st_mtime_ns + 10 ** 9))
+    calls = count_parses(monkeypatch)
+    datacache.load_store(feed, cache_dir=cache_dir)
+    assert calls == []
+
+
+def test_source_replaced_during_parse_is_not_cached(feed, cache_dir, monkeypatch):
+    parse = RainfallStore.load.__func__
+
+    def load_then_replace(cls, xml_path, code='RF'):
+        store = parse(cls, xml_path, code)
+        # a refresh lands while the old file is being parsed
+        tmp = xml_path + '.new'
+        write_feed(tmp, offset=0.5)
+        st = os.stat(xml_path)
+        os.utime(tmp, ns=(st.st_atime_ns, st.st_mtime_ns + 10 ** 9))
+        os.replace(tmp, xml_path)
+        return store
+    monkeypatch.setattr(RainfallStore, 'load', classmethod(load_then_replace))
+    old = datacache.load_store(feed, cache_dir=cache_dir)
+    assert float(old.values[0, 0]) == 0.0
+    monkeypatch.undo()
+    assert datacache.read_cache(feed, cache_dir=cache_dir) is None
+    assert float(datacache.load_store(feed, cache_dir=cache_dir).values[0, 0]) == 0.5
+
+
+def test_key_is_taken_before_the_parse(feed, cache_dir):
+    key = datacache.source_key(feed)
+    store = datacache.load_store(feed, cache_dir=cache_dir, use_cache=False)
+    write_feed(feed, offset=0.5)
+    # written with the pre-parse key: the new file does not match it
+    assert datacache.write_cache(feed, store, cache_dir=cache_dir, key=key)
+    assert datacache.read_cache(feed, cache_dir=cache_dir) is None
+
+
+def test_cached_arrays_are_not_memory_mapped(feed, cache_dir):
+    datacache.load_store(feed, cache_dir=cache_dir)
+    store = datacache.read_cache(feed, cache_dir=cache_dir)
+    assert store is not None
+    assert not memory_mapped(store.values) and not memory_mapped(store.flags)
+    # the live store must not stop the next entry from replacing the files
+    write_feed(feed, offset=0.5)
+    assert float(datacache.load_store(feed, cache_dir=cache_dir).values[0, 0]) == 0.5
+    assert float(datacache.read_cache(feed, cache_dir=cache_dir).values[0, 0]) == 0.5
+    assert float(store.values[0, 0]) == 0.0
@@ -0,0 +1,178 @@
+"""hkvis_core.refresh against a local stand-in for the HKO server."""
+import asyncio
+import os
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from hkvis_core import refresh
+
+LAST_MODIFIED = 'Mon, 06 Oct 2025 01:00:00 GMT'
+
+
+class StandIn:
+    """Serves queued responses on 127.0.0.1 and records every request."""
+
+    def __init__(self):
+        self.responses = []
+        self.default = (200, {'ETag': '"v1"', 'Last-Modified': LAST_MODIFIED}, b'body v1')
+        self.requests = []
+        self.lock = threading.Lock()
+        stand_in = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                with stand_in.lock:
+                    stand_in.requests.append((time.perf_counter(), self.path, dict(self.headers)))
+                    status, headers, body = stand_in.responses.pop(0) if stand_in.responses else stand_in.default
+                self.send_response(status)
+                for k, v in headers.items():
+                    self.send_header(k, v)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.thread = threading.Thread(target=self.server.serve_forever, args=(0.05,), daemon=True)
+
+    def url(self, path='/monthlyElement.xml'):
+        return f'http://127.0.0.1:{self.server.server_port}{path}'
+
+
+@pytest.fixture
+def server():
+    s = StandIn()
+    s.thread.start()
+    yield s
+    s.server.shutdown()
+    s.server.server_close()
+
+
+@pytest.fixture
+def target(server, tmp_path):
+    return refresh.Target('xml', server.url(), str(tmp_path / 'monthlyElement.xml'))
+
+
+def fetch(target, **kwargs):
+    kwargs.setdefault('timeout', 5)
+    kwargs.setdefault('backoff', 0.01)
+    return asyncio.run(refresh.fetch_target(target, **kwargs))
+
+
+def test_first_fetch_writes_file_and_validators(target):
+    result = fetch(target)
+    assert (result.status, result.changed, result.size, result.attempts) == ('updated', True, 7, 1)
+    with open(target.path, 'rb') as f:
+        assert f.read() == b'body v1'
+    meta = refresh.read_meta(target.path)
+    assert meta['etag'] == '"v1"'
+    assert meta['last_modified'] == LAST_MODIFIED
+
+
+def test_conditional_request_and_304(server, target):
+    fetch(target)
+    server.responses.append((304, {'ETag': '"v1"'}, b''))
+    result = fetch(target)
+    assert (result.status, result.changed) == ('unchanged', False)
+    headers = server.requests[-1][2]
+    assert headers['If-None-Match'] == '"v1"'
+    assert headers['If-Modified-Since'] == LAST_MODIFIED
+    with open(target.path, 'rb') as f:
+        assert f.read() == b'body v1'
+
+
+def test_force_skips_validators(server, target):
+    fetch(target)
+    fetch(target, force=True)
+    headers = server.requests[-1][2]
+    assert 'If-None-Match' not in headers and 'If-Modified-Since' not in headers
+
+
+def test_changed_etag_replaces_file(server, target):
+    fetch(target)
+    server.responses.append((200, {'ETag': '"v2"'}, b'body v2 longer'))
+    result = fetch(target)
+    assert (result.status, result.changed) == ('updated', True)
+    with open(target.path, 'rb') as f:
+        assert f.read() == b'body v2 longer'
+    assert refresh.read_meta(target.path)['etag'] == '"v2"'
+
+
+def test_unchanged_hash_leaves_file_alone(server, target):
+    fetch(target)
+    before = os.stat(target.path)
+    # new validators but the same bytes (e.g. the server lost its ETag state)
+    server.responses.append((200, {'ETag': '"v1-again"'}, b'body v1'))
+    result = fetch(target)
+    assert (result.status, result.changed) == ('unchanged', False)
+    after = os.stat(target.path)
+    assert (after.st_ino, after.st_mtime_ns) == (before.st_ino, before.st_mtime_ns)
+    assert refresh.read_meta(target.path)['etag'] == '"v1-again"'
+
+
+@pytest.mark.parametrize('status', [503, 429])
+def test_retries_with_backoff(server, target, status):
+    server.responses += [(status, {}, b'busy'), (status, {}, b'busy')]
+    result = fetch(target, retries=3, backoff=0.05)
+    assert (result.status, result.attempts) == ('updated', 3)
+    times = [t for t, _, _ in server.requests]
+    # waits of 0.05 then 0.1 s between the attempts
+    assert times[1] - times[0] >= 0.04
+    assert times[2] - times[1] >= 0.09
+
+
+def test_gives_up_after_retries(server, target):
+    server.responses += [(503, {}, b'busy')] * 3
+    result = fetch(target, retries=2)
+    assert (result.status, result.attempts) == ('failed', 3)
+    assert '503' in result.error
+    assert not os.path.exists(target.path)
+
+
+def test_no_retry_on_404(server, target):
+    server.responses.append((404, {}, b'gone'))
+    result = fetch(target, retries=3)
+    assert (result.status, result.attempts) == ('failed', 1)
+    assert len(server.requests) == 1
+
+
+def test_refused_connection(tmp_path):
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        port = s.getsockname()[1]
+    # nothing listens on `port` now
+    target = refresh.Target('xml', f'http://127.0.0.1:{port}/x', str(tmp_path / 'x.xml'))
+    result = fetch(target, retries=1)
+    assert (result.status, result.attempts) == ('failed', 2)
+    assert 'URLError' in result.error
+    assert not os.path.exists(target.path)
+
+
+def test_write_is_atomic(server, target, monkeypatch):
+    fetch(target)
+    server.responses.append((200, {'ETag': '"v2"'}, b'body v2'))
+
+    def failing_replace(src, dst):
+        raise OSError('disk full')
+    monkeypatch.setattr(refresh.os, 'replace', failing_replace)
+    result = fetch(target)
+    assert result.status == 'failed' and 'disk full' in result.error
+    # the old file is intact and no temp file is left behind
+    with open(target.path, 'rb') as f:
+        assert f.read() == b'body v1'
+    assert not [n for n in os.listdir(os.path.dirname(target.path)) if n.startswith('.tmp_')]
+
+
+def test_concurrent_refresh(server, tmp_path):
+    targets = [refresh.Target(name, server.url('/' + name), str(tmp_path / name))
+               for name in ('xml', 'html')]
+    results = refresh.refresh(targets, timeout=5, backoff=0.01)
+    assert [r.name for r in results] == ['xml', 'html']
+    assert all(r.status == 'updated' for r in results)
+    assert sorted(path for _, path, _ in server.requests) == ['/html', '/xml']
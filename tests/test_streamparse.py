@@ -0,0 +1,108 @@
+"""hkvis_core.streamparse must agree with json.loads (RainfallStore.from_json_text)."""
+import io
+import json
+
+import numpy as np
+import pytest
+
+from hkvis_core.rainfallstore import RainfallStore
+from hkvis_core.streamparse import iter_tokens, load_store, parse_elements
+
+
+def month_data(first_year, n, offset=0.0):
+    rows = []
+    for i in range(n):
+        rows.append([str(first_year + i)] + [f'{(i * 12 + m) * 1.7 + offset:.1f}' for m in range(12)])
+    return rows
+
+
+def feed(sections, indent=None):
+    doc = {'type': 'monthlyElement', 'stn': {'code': 'HKO', 'data': sections}}
+    return json.dumps(doc, indent=indent)
+
+
+SECTIONS = [
+    {'code': 'MEANTEMP', 'name': 'Mean Temperature', 'monthData': month_data(1884, 20, 0.3)},
+    {'code': 'RF', 'name': 'Total Rainfall', 'unit': 'mm', 'monthData': month_data(1884, 30)},
+    {'code': 'RH', 'name': 'Mean Relative Humidity', 'monthData': month_data(1884, 10, 0.7)},
+]
+
+
+def assert_same(store, text, code='RF'):
+    expected = RainfallStore.from_json_text(text, code)
+    assert store.years == expected.years
+    np.testing.assert_array_equal(store.values, expected.values)
+    np.testing.assert_array_equal(store.flags, expected.flags)
+
+
+@pytest.mark.parametrize('chunk_size', [3, 7, 64, 1000, 4096, 65536])
+def test_matches_json_across_chunk_sizes(chunk_size):
+    text = feed(SECTIONS)
+    assert_same(load_store(io.StringIO(text), chunk_size=chunk_size), text)
+
+
+@pytest.mark.parametrize('indent', [None, 1, 4, '\t'])
+def test_matches_json_when_indented(indent):
+    text = feed(SECTIONS, indent)
+    for code in ('RF', 'MEANTEMP', 'RH'):
+        assert_same(load_store(io.StringIO(text), code, chunk_size=256), text, code)
+
+
+def test_code_after_month_data():
+    sections = [{'monthData': month_data(1900, 5, 0.2), 'code': 'MEANTEMP'},
+                {'monthData': month_data(1900, 8), 'name': 'Total Rainfall', 'code': 'RF'}]
+    text = feed(sections, 1)
+    assert_same(load_store(io.StringIO(text), chunk_size=16), text)
+
+
+def test_odd_cells():
+    rows = [
+        ['1940', '***', None, 'Trace', '', ' 12.5 ', 3, 4.25, '-1', '1e2', 'n/a', '0', '7'],
+        [1941, '1.0', '2.0', '3.0', '4.0', '5.0', '6.0', '7.0', '8.0', '9.0', '10.0', '11.0', '12.0'],
+        ['1942', 'say \\"hi\\"', 'back\\\\slash', 'µ', '1', '2', '3', '4', '5', '6', '7', '8', '9'],
+        ['1943', '1', '2', '3'],
+    ]
+    sections = [{'code': 'RF', 'note': 'escaped "quote" and \\ backslash', 'flag': True, 'empty': [],
+                 'nested': {'code': 'XX', 'list': [1, [2, 3], {'a': None}]}, 'monthData': rows}]
+    text = feed(sections)
+    for chunk_size in (5, 64, 65536):
+        assert_same(load_store(io.StringIO(text), chunk_size=chunk_size), text)
+
+
+def test_several_codes_and_missing_code():
+    text = feed(SECTIONS)
+    stores = parse_elements(io.StringIO(text), ('RF', 'RH', 'NOPE'), chunk_size=128)
+    assert sorted(stores) == ['RF', 'RH']
+    assert_same(stores['RH'], text, 'RH')
+    with pytest.raises(ValueError):
+        load_store(io.StringIO(text), 'NOPE')
+
+
+def test_first_section_of_a_code_wins():
+    sections = SECTIONS[1:2] + [{'code': 'RF', 'monthData': month_data(2000, 3)}]
+    text = feed(sections)
+    assert load_store(io.StringIO(text)).years == [str(1884 + i) for i in range(30)]
+
+
+class CountingReader(io.StringIO):
+    def __init__(self, text):
+        super().__init__(text)
+        self.chars = 0
+
+    def read(self, size=-1):
+        chunk = super().read(size)
+        self.chars += len(chunk)
+        return chunk
+
+
+def test_stops_reading_once_found():
+    sections = SECTIONS[1:2] + [{'code': 'BIG', 'monthData': month_data(1, 5000)}]
+    text = feed(sections)
+    reader = CountingReader(text)
+    assert_same(load_store(reader, chunk_size=1024), text)
+    assert reader.chars < len(text) // 10
+
+
+def test_malformed_input():
+    with pytest.raises(ValueError):
+        list(iter_tokens(io.StringIO('{"code": "RF", "monthData": [[1, 2] ? ]}')))
@@ -0,0 +1,47 @@
+"""hkvis_core.viewchart keeps accepting the old (years, rainfall, year) arguments."""
+import os
+import subprocess
+import sys
+
+import pytest
+
+from hkvis_core import viewchart
+from hkvis_core.rainfallstore import RainfallStore
+
+YEARS = ['2023', '2024']
+RAINFALL = [[float(m) + 0.1 for m in range(12)], [67.2] * 12]
+
+
+def table(capsys, *args):
+    viewchart.print_rainfall_table(*args)
+    return capsys.readouterr().out
+
+
+@pytest.mark.parametrize('year', ['2024', '1999'])
+def test_old_and_new_arguments_print_the_same_table(capsys, year):
+    new = table(capsys, RainfallStore(YEARS, RAINFALL), year)
+    old = table(capsys, YEARS, RAINFALL, year)
+    assert old == new
+
+
+def test_old_arguments_from_load_rainfall_data(capsys):
+    out = table(capsys, YEARS, RAINFALL, '2023')
+    assert 'Rain(mm)\t0.1\t1.1\t2.1' in out
+
+
+def test_plot_with_old_arguments(capsys, monkeypatch):
+    plt = pytest.importorskip('matplotlib.pyplot')
+    monkeypatch.setattr(plt, 'show', lambda: None)
+    viewchart.plot_rainfall_for_year(YEARS, RAINFALL, '2024')
+    plt.close('all')
+    assert 'Highest: 67.2 mm' in capsys.readouterr().out
+
+
+def test_import_stays_light():
+    # the climatology (and through it chartexport) is only needed by plot_rainfall_for_year
+    code = ('import sys, hkvis_core.viewchart; '
+            'print(sorted(m for m in ("hkvis_core.climatology", "hkvis_core.chartexport", "multiprocessing") '
+            'if m in sys.modules))')
+    out = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True,
+                         cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))).stdout
+    assert out.strip() == '[]'